@@ -0,0 +1,101 @@
+"""
+Perfil que atiende cada vista: el activo en las rutas de la raíz y el del slug en las
+rutas /p/<slug>/. Las instancias se guardan en memoria del proceso junto con versiones
+leídas de la caché compartida: una por perfil, que cambia al guardar o borrar ese perfil o
+sus secciones, y otra para el conjunto de perfiles (cuál es el activo, qué slugs existen),
+que cambia al crear, guardar o borrar un perfil. Guardar un perfil no descarta los demás
+perfiles memorizados; cada worker vuelve a consultar la base solo por el que cambió.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import DatosPersonales
+
+CLAVE_PERFILES = 'perfil_activo:perfiles'
+CLAVE_VERSION = 'perfil_activo:version:{}'
+
+# (versión de los perfiles, versión del perfil, instancia) del perfil activo en este proceso
+_memo = (None, None, None)
+
+# slug -> (versión de los perfiles, versión del perfil, instancia o None), los PERFILES_MEMORIZADOS más recientes.
+# Con instancia basta la versión del perfil (cambiar el slug es guardarlo); sin ella, la de los perfiles
+_memo_slugs = OrderedDict()
+_lock_slugs = threading.Lock()
+
+
+def _version(clave):
+    version = cache.get(clave)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(clave, version, None):
+            version = cache.get(clave, version)
+    return version
+
+
+def _cargar(pk):
+    """(versión, instancia) del perfil 'pk': la versión se lee antes para no memorizar un cambio a medias."""
+    if pk is None:
+        return None, None
+    version = _version(CLAVE_VERSION.format(pk))
+    return version, DatosPersonales.objects.filter(pk=pk).first()
+
+
+def perfil_activo():
+    """El perfil con perfilactivo=1 (o el primero, si ninguno lo está); None si no hay perfiles."""
+    global _memo
+    perfiles = _version(CLAVE_PERFILES)
+    memo_perfiles, memo_version, perfil = _memo
+    if memo_perfiles == perfiles and (perfil is None or memo_version == _version(CLAVE_VERSION.format(perfil.pk))):
+        return perfil
+    pk = (DatosPersonales.objects.filter(perfilactivo=1).values_list('pk', flat=True).first()
+          or DatosPersonales.objects.values_list('pk', flat=True).first())
+    version, perfil = _cargar(pk)
+    _memo = (perfiles, version, perfil)
+    return perfil
+
+
+def perfil_por_slug(slug):
+    """El perfil con ese slug (consultas por el índice único y la clave primaria la primera vez); None si no existe."""
+    with _lock_slugs:
+        memo = _memo_slugs.get(slug)
+    if memo is not None:
+        memo_perfiles, memo_version, perfil = memo
+        if perfil is None:
+            vigente = memo_perfiles == _version(CLAVE_PERFILES)
+        else:
+            vigente = memo_version == _version(CLAVE_VERSION.format(perfil.pk))
+        if vigente:
+            with _lock_slugs:
+                if slug in _memo_slugs:
+                    _memo_slugs.move_to_end(slug)
+            return perfil
+    perfiles = _version(CLAVE_PERFILES)
+    version, perfil = _cargar(DatosPersonales.objects.filter(slug=slug).values_list('pk', flat=True).first())
+    if perfil is not None and perfil.slug != slug:
+        perfil = None  # Cambió de slug entre las dos consultas
+    with _lock_slugs:
+        _memo_slugs[slug] = (perfiles, version, perfil)
+        _memo_slugs.move_to_end(slug)
+        while len(_memo_slugs) > settings.PERFILES_MEMORIZADOS:
+            _memo_slugs.popitem(last=False)
+    return perfil
+
+
+def obtener_perfil(slug=None):
+    """Perfil de la ruta: el del slug si viene en la URL, si no el activo."""
+    return perfil_activo() if slug is None else perfil_por_slug(slug)
+
+
+def invalidar(idperfil):
+    """Descarta en todos los workers el perfil 'idperfil' memorizado cuando se confirma la transacción en curso."""
+    transaction.on_commit(lambda: cache.set(CLAVE_VERSION.format(idperfil), time.time_ns(), None))
+
+
+def invalidar_perfiles():
+    """Igual para cuál es el perfil activo y qué slugs existen (al crear, guardar o borrar un perfil)."""
+    transaction.on_commit(lambda: cache.set(CLAVE_PERFILES, time.time_ns(), None))
@@ -1,18 +1,34 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db import transaction
+from .fotos import borrar_variantes, generar_variantes, nombres_variantes
+from .ingesta import CAMPOS_METADATOS, ingerir_certificado
 from .models import (
     DatosPersonales, ExperienciaLaboral, Reconocimientos, 
-    CursosRealizados, ProductosAcademicos, ProductosLaborales, VentaGarage
+    CursosRealizados, ProductosAcademicos, ProductosLaborales, VentaGarage,
+    TrabajoPDF
 )
 
+class IngestaCertificadoMixin:
+    """Valida y normaliza el certificado al guardarlo, solo cuando se sube uno nuevo."""
+    readonly_fields = CAMPOS_METADATOS
+
+    def save_model(self, request, obj, form, change):
+        if 'rutacertificado' in form.changed_data:
+            error = ingerir_certificado(obj)
+            if error:
+                messages.warning(request, f"El certificado no es válido ({error}); no se anexará al PDF.")
+        super().save_model(request, obj, form, change)
+
 @admin.register(DatosPersonales)
 class DatosPersonalesAdmin(admin.ModelAdmin):
-    list_display = ('idperfil', 'nombres', 'apellidos', 'numerocedula', 'correo', 'perfilactivo')
-    search_fields = ('nombres', 'apellidos', 'numerocedula', 'correo')
+    list_display = ('idperfil', 'nombres', 'apellidos', 'slug', 'numerocedula', 'correo', 'perfilactivo')
+    search_fields = ('nombres', 'apellidos', 'slug', 'numerocedula', 'correo')
+    prepopulated_fields = {'slug': ('nombres', 'apellidos')}
     list_filter = ('sexo', 'nacionalidad', 'perfilactivo')
     
     fieldsets = (
         ('Información Básica', {
-            'fields': ('foto_perfil', 'nombres', 'apellidos', 'numerocedula', 'correo', 'sexo', 'fechanacimiento')
+            'fields': ('foto_perfil', 'nombres', 'apellidos', 'slug', 'numerocedula', 'correo', 'sexo', 'fechanacimiento')
         }),
         ('Ubicación y Contacto', {
             'fields': ('nacionalidad', 'lugarnacimiento', 'telefonoconvencional', 'telefonofijo', 'direcciondomiciliaria', 'sitioweb')
@@ -35,18 +51,18 @@ class DatosPersonalesAdmin(admin.ModelAdmin):
     )
 
 @admin.register(ExperienciaLaboral)
-class ExperienciaLaboralAdmin(admin.ModelAdmin):
+class ExperienciaLaboralAdmin(IngestaCertificadoMixin, admin.ModelAdmin):
     list_display = ('cargodesempenado', 'nombrempresa', 'idperfil', 'fechainiciogestion')
     list_filter = ('nombrempresa', 'activarparaqueseveaenfront')
     search_fields = ('cargodesempenado', 'nombrempresa')
 
 @admin.register(Reconocimientos)
-class ReconocimientosAdmin(admin.ModelAdmin):
+class ReconocimientosAdmin(IngestaCertificadoMixin, admin.ModelAdmin):
     list_display = ('tiporeconocimiento', 'descripcionreconocimiento', 'entidadpatrocinadora', 'idperfil')
     list_filter = ('tiporeconocimiento', 'activarparaqueseveaenfront')
 
 @admin.register(CursosRealizados)
-class CursosRealizadosAdmin(admin.ModelAdmin):
+class CursosRealizadosAdmin(IngestaCertificadoMixin, admin.ModelAdmin):
     list_display = ('nombrecurso', 'entidadpatrocinadora', 'totalhoras', 'idperfil')
     search_fields = ('nombrecurso', 'entidadpatrocinadora')
 
@@ -61,4 +77,25 @@ class ProductosLaboralesAdmin(admin.ModelAdmin):
 @admin.register(VentaGarage)
 class VentaGarageAdmin(admin.ModelAdmin):
     list_display = ('nombreproducto', 'valordelbien', 'estadoproducto', 'fechapublicacion', 'idperfil')
-    list_filter = ('estadoproducto', 'activarparaqueseveaenfront')
\ No newline at end of file
+    list_filter = ('estadoproducto', 'activarparaqueseveaenfront')
+
+    def save_model(self, request, obj, form, change):
+        # Las variantes reducidas se generan una vez, al subir la foto
+        if 'fotoproducto' in form.changed_data:
+            anteriores = nombres_variantes(obj.fotoproducto_variantes)
+            error = generar_variantes(obj)
+            if error:
+                messages.warning(request, f"No se pudieron generar las variantes de la foto ({error}); se mostrará el original.")
+            sobrantes = anteriores - nombres_variantes(obj.fotoproducto_variantes)
+            almacenamiento = obj.fotoproducto.storage
+            transaction.on_commit(lambda: borrar_variantes(almacenamiento, sobrantes))
+        super().save_model(request, obj, form, change)
+
+@admin.register(TrabajoPDF)
+class TrabajoPDFAdmin(admin.ModelAdmin):
+    list_display = ('token', 'idperfil', 'secciones', 'estado', 'fechacreacion', 'fechafin')
+    list_filter = ('estado',)
+    readonly_fields = ('token', 'idperfil', 'secciones', 'estado', 'rutaarchivo', 'error', 'fechacreacion', 'fechainicio', 'fechafin')
+
+    def has_add_permission(self, request):
+        return False
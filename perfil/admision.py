@@ -0,0 +1,132 @@
+"""
+Control de admisión para el armado del PDF: limita cuántos se hacen a la vez dentro de
+cada worker (semáforo) y entre todos los workers (un archivo de bloqueo por turno), para
+que las páginas HTML sigan teniendo workers libres durante una ráfaga de descargas.
+Cada perfil además tiene sus propios turnos (PDF_MAX_CONCURRENTES_PERFIL), así que una
+ráfaga sobre un perfil no se queda con todos los turnos globales.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows (desarrollo): solo queda el límite por proceso
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_semaforo = None
+_contadores = {'activos': 0, 'en_cola': 0, 'admitidos': 0, 'rechazados': 0}
+
+
+class Rechazado(Exception):
+    """No hubo turno libre dentro de PDF_ESPERA_ADMISION."""
+
+
+def _semaforo_proceso():
+    global _semaforo
+    with _lock:
+        if _semaforo is None:
+            _semaforo = threading.BoundedSemaphore(settings.PDF_MAX_CONCURRENTES_PROCESO)
+        return _semaforo
+
+
+def _sumar(clave, n=1):
+    with _lock:
+        _contadores[clave] += n
+
+
+def estadisticas():
+    """Contadores de este proceso (cada worker de gunicorn lleva los suyos)."""
+    with _lock:
+        datos = dict(_contadores)
+    datos.update(
+        pid=os.getpid(),
+        max_proceso=settings.PDF_MAX_CONCURRENTES_PROCESO,
+        max_global=settings.PDF_MAX_CONCURRENTES if fcntl else None,
+        max_perfil=settings.PDF_MAX_CONCURRENTES_PERFIL if fcntl else None,
+    )
+    return datos
+
+
+def _tomar_turno(nombres, limite):
+    """
+    Intenta bloquear alguno de los archivos de turno 'nombres' hasta 'limite'.
+    Devuelve el descriptor bloqueado; el sistema libera el bloqueo si el proceso muere.
+    """
+    os.makedirs(settings.PDF_ADMISION_DIR, exist_ok=True)
+    while True:
+        for nombre in nombres:
+            fd = os.open(os.path.join(settings.PDF_ADMISION_DIR, nombre), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        if time.monotonic() >= limite:
+            return None
+        time.sleep(0.05)
+
+
+def _soltar(fd):
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+@contextmanager
+def admitir(perfil=None):
+    """
+    Bloque con turno para armar un PDF; lanza Rechazado si no lo consigue a tiempo.
+    El turno del perfil se pide primero: mientras un perfil espera el suyo no ocupa el
+    semáforo del proceso ni los turnos globales que podrían usar los demás.
+    """
+    limite = time.monotonic() + settings.PDF_ESPERA_ADMISION
+    semaforo = _semaforo_proceso()
+    _sumar('en_cola')
+    fd_perfil = fd = None
+    try:
+        if fcntl is not None and perfil is not None:
+            fd_perfil = _tomar_turno(
+                [f'perfil-{perfil.pk}-{n}.lock' for n in range(settings.PDF_MAX_CONCURRENTES_PERFIL)], limite,
+            )
+            if fd_perfil is None:
+                raise Rechazado()
+        try:
+            if not semaforo.acquire(timeout=max(0, limite - time.monotonic())):
+                raise Rechazado()
+            try:
+                if fcntl is not None:
+                    fd = _tomar_turno([f'turno-{n}.lock' for n in range(settings.PDF_MAX_CONCURRENTES)], limite)
+                    if fd is None:
+                        raise Rechazado()
+            except BaseException:
+                semaforo.release()
+                raise
+        except BaseException:
+            if fd_perfil is not None:
+                _soltar(fd_perfil)
+            raise
+    except Rechazado:
+        _sumar('rechazados')
+        logger.warning("PDF rechazado por falta de turno (activos en este proceso: %s)", _contadores['activos'])
+        raise
+    finally:
+        _sumar('en_cola', -1)
+
+    _sumar('activos')
+    _sumar('admitidos')
+    try:
+        yield
+    finally:
+        _sumar('activos', -1)
+        if fd is not None:
+            _soltar(fd)
+        if fd_perfil is not None:
+            _soltar(fd_perfil)
+        semaforo.release()
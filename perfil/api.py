@@ -0,0 +1,180 @@
+"""
+API JSON de solo lectura de un perfil y sus secciones (el activo, o el de /p/<slug>/api/...).
+
+    GET /api/perfil/?fields=nombres,apellidos
+    GET /api/<seccion>/?fields=nombrecurso,fechainicio&limite=50&cursor=...
+    GET /api/buscar/?q=python&limite=20
+
+Solo se leen de la base los campos pedidos (values()), las secciones se paginan por
+cursor igual que las páginas HTML y la respuesta lleva ETag/Last-Modified derivados de
+la versión del contenido del perfil: si nada cambió se responde 304 sin consultar.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import FileField
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition, require_GET
+
+from . import busqueda
+from .activo import obtener_perfil
+from .models import (
+    DatosPersonales, ExperienciaLaboral, CursosRealizados,
+    Reconocimientos, ProductosAcademicos, ProductosLaborales, VentaGarage
+)
+from .paginacion import ORDEN_SECCIONES, codificar_cursor, consulta_pagina, visibles
+from .validadores import etag_contenido, ultima_modificacion
+
+# /api/<seccion>/ -> (modelo, interruptor del Admin que la habilita)
+SECCIONES_API = {
+    'experiencia': (ExperienciaLaboral, 'ver_experiencia'),
+    'cursos': (CursosRealizados, 'ver_cursos'),
+    'reconocimientos': (Reconocimientos, 'ver_reconocimientos'),
+    'productos-academicos': (ProductosAcademicos, 'ver_productos_academicos'),
+    'productos-laborales': (ProductosLaborales, 'ver_productos_laborales'),
+    'garage': (VentaGarage, 'ver_garage'),
+}
+
+# Campos internos que la API nunca expone
+PRIVADOS = {
+    'idperfil', 'perfilactivo', 'version_contenido', 'activarparaqueseveaenfront',
+    'certificado_valido', 'certificado_paginas', 'certificado_bytes', 'certificado_sha256',
+    'fotoproducto_variantes',
+}
+
+LIMITE_DEFECTO = 50
+LIMITE_MAXIMO = 500
+
+
+class ErrorParametros(Exception):
+    pass
+
+
+def campos_publicos(modelo):
+    return [
+        f.name for f in modelo._meta.concrete_fields
+        if f.name not in PRIVADOS and not f.name.startswith('ver_')
+    ]
+
+
+def campos_pedidos(modelo, parametros):
+    """Campos de ?fields=a,b (todos los públicos si no se indica). Lanza ErrorParametros si hay alguno desconocido."""
+    publicos = campos_publicos(modelo)
+    if not parametros.get('fields'):
+        return publicos
+    pedidos = [c.strip() for c in parametros['fields'].split(',') if c.strip()]
+    desconocidos = [c for c in pedidos if c not in publicos]
+    if desconocidos:
+        raise ErrorParametros(f"Campos desconocidos: {', '.join(desconocidos)}. Disponibles: {', '.join(publicos)}")
+    return pedidos
+
+
+def _limite(parametros):
+    try:
+        limite = int(parametros.get('limite', LIMITE_DEFECTO))
+    except ValueError:
+        raise ErrorParametros("'limite' debe ser un número entero.")
+    return max(1, min(limite, LIMITE_MAXIMO))
+
+
+def _proyectar(modelo, campos):
+    """Función que deja en la fila solo 'campos' y convierte los archivos a su URL."""
+    archivos = {c: modelo._meta.get_field(c) for c in campos if isinstance(modelo._meta.get_field(c), FileField)}
+
+    def proyectar(fila):
+        datos = {c: fila[c] for c in campos}
+        for campo, field in archivos.items():
+            datos[campo] = field.storage.url(datos[campo]) if datos[campo] else None
+        return datos
+    return proyectar
+
+
+def _error(mensaje, status=400):
+    return JsonResponse({'error': mensaje}, status=status, json_dumps_params={'ensure_ascii': False})
+
+
+# --- VISTAS ---
+
+@require_GET
+@condition(etag_func=etag_contenido, last_modified_func=ultima_modificacion)
+def api_perfil(request, slug=None):
+    perfil = obtener_perfil(slug)
+    if perfil is None:
+        raise Http404("No hay perfiles creados.")
+    try:
+        campos = campos_pedidos(DatosPersonales, request.GET)
+    except ErrorParametros as e:
+        return _error(str(e))
+    fila = DatosPersonales.objects.filter(pk=perfil.pk).values(*campos).first()
+    if fila is None:
+        raise Http404("No hay perfiles creados.")
+    datos = _proyectar(DatosPersonales, campos)(fila)
+    datos['secciones'] = [nombre for nombre, (_, interruptor) in SECCIONES_API.items() if getattr(perfil, interruptor)]
+    return JsonResponse(datos, json_dumps_params={'ensure_ascii': False})
+
+
+def _serializar_pagina(filas, proyectar, orden, limite):
+    """Genera el JSON por partes: no se arma la lista completa en memoria."""
+    yield '{"items":['
+    siguiente = None
+    ultima = None
+    for n, fila in enumerate(filas):
+        if n == limite:
+            siguiente = codificar_cursor(ultima[campo.lstrip('-')] for campo in orden)
+            break
+        yield (',' if n else '') + json.dumps(proyectar(fila), cls=DjangoJSONEncoder, ensure_ascii=False)
+        ultima = fila
+    yield '],"siguiente":' + json.dumps(siguiente) + '}'
+
+
+@require_GET
+@condition(etag_func=etag_contenido, last_modified_func=ultima_modificacion)
+def api_seccion(request, seccion, slug=None):
+    if seccion not in SECCIONES_API:
+        raise Http404("Sección desconocida.")
+    modelo, interruptor = SECCIONES_API[seccion]
+    perfil = obtener_perfil(slug)
+    if perfil is None or not getattr(perfil, interruptor):
+        raise Http404("Sección no disponible.")
+    try:
+        campos = campos_pedidos(modelo, request.GET)
+        limite = _limite(request.GET)
+    except ErrorParametros as e:
+        return _error(str(e))
+
+    # Se leen también los campos de orden, que hacen falta para el cursor de la página siguiente
+    orden = ORDEN_SECCIONES[modelo]
+    columnas = list(dict.fromkeys(campos + [campo.lstrip('-') for campo in orden]))
+    consulta = consulta_pagina(visibles(modelo, perfil).values(*columnas), orden, request.GET.get('cursor'))
+    filas = consulta[:limite + 1].iterator(chunk_size=min(limite + 1, 200))
+    return StreamingHttpResponse(
+        _serializar_pagina(filas, _proyectar(modelo, campos), orden, limite),
+        content_type='application/json',
+    )
+
+
+@require_GET
+@condition(etag_func=etag_contenido, last_modified_func=ultima_modificacion)
+def api_buscar(request, slug=None):
+    """Resultados por relevancia; 'fragmento' es HTML escapado con las coincidencias en <mark>."""
+    perfil = obtener_perfil(slug)
+    if perfil is None:
+        raise Http404("No hay perfiles creados.")
+    consulta = request.GET.get('q', '').strip()
+    if not busqueda.terminos(consulta):
+        return _error("Falta el texto a buscar: ?q=...")
+    try:
+        limite = _limite(request.GET)
+    except ErrorParametros as e:
+        return _error(str(e))
+    items = [
+        {
+            'seccion': r.seccion,
+            'id': r.idobjeto,
+            'titulo': r.titulo,
+            'fragmento': busqueda.resaltar(r.fragmento),
+            'puntaje': float(r.puntaje),
+        }
+        for r in busqueda.buscar(perfil, consulta, limite)
+    ]
+    return JsonResponse({'consulta': consulta, 'items': items}, json_dumps_params={'ensure_ascii': False})
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class PerfilConfig(AppConfig):
     name = 'perfil'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (conecta la invalidación de cachés)
@@ -0,0 +1,151 @@
+"""
+Búsqueda de texto en las secciones del perfil. Cada fila visible tiene una copia de su texto
+en IndiceBusqueda (la mantienen las señales) y el motor de la base la indexa:
+
+    PostgreSQL: columna tsvector generada ('spanish', título con más peso) con índice GIN
+    SQLite:     tabla virtual FTS5 con triggers (perfil_indicebusqueda_fts)
+
+Así una consulta devuelve los resultados ya ordenados por relevancia en una sola sentencia,
+en vez de un icontains por cada tabla. Ambos se crean en la migración 0017.
+"""
+import re
+from collections import namedtuple
+
+from django.apps import apps
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .reportes import SECCIONES
+
+# Modelo -> (código de la sección, campos del título, campos del texto, URL de la sección)
+FUENTES = {
+    'ExperienciaLaboral': ('exp', ('cargodesempenado', 'nombrempresa'), ('descripcionfunciones', 'lugarempresa'), 'experiencia'),
+    'CursosRealizados': ('cur', ('nombrecurso',), ('descripcioncurso', 'entidadpatrocinadora'), 'cursos'),
+    'Reconocimientos': ('rec', ('tiporeconocimiento',), ('descripcionreconocimiento', 'entidadpatrocinadora'), 'reconocimientos'),
+    'ProductosAcademicos': ('aca', ('nombrerecurso',), ('descripcion', 'clasificador'), 'productos_academicos'),
+    'ProductosLaborales': ('lab', ('nombreproducto',), ('descripcion',), 'productos_laborales'),
+    'VentaGarage': ('gar', ('nombreproducto',), ('descripcion', 'estadoproducto'), 'garage'),
+}
+NOMBRES_SECCION = {
+    'exp': 'Experiencia', 'cur': 'Cursos', 'rec': 'Reconocimientos',
+    'aca': 'Productos académicos', 'lab': 'Productos laborales', 'gar': 'Garage',
+}
+URLS_SECCION = {codigo: url for codigo, _, _, url in FUENTES.values()}
+
+MAX_TERMINOS = 8
+# Marcas del fragmento resaltado: caracteres de control que no aparecen en el texto
+INICIO_MARCA, FIN_MARCA = '\x02', '\x03'
+
+Resultado = namedtuple('Resultado', ['seccion', 'idobjeto', 'titulo', 'fragmento', 'puntaje'])
+
+
+def _unir(instancia, campos):
+    return ' '.join(str(getattr(instancia, campo) or '') for campo in campos).strip()
+
+
+def indexar(instancia):
+    """Guarda (o quita, si está oculta) la fila en el índice."""
+    IndiceBusqueda = apps.get_model('perfil', 'IndiceBusqueda')
+    codigo, titulo, texto, _ = FUENTES[type(instancia).__name__]
+    if not instancia.activarparaqueseveaenfront:
+        desindexar(instancia)
+        return
+    IndiceBusqueda.objects.update_or_create(
+        seccion=codigo, idobjeto=instancia.pk,
+        defaults={
+            'idperfil_id': instancia.idperfil_id,
+            'titulo': _unir(instancia, titulo)[:255],
+            'texto': _unir(instancia, texto),
+        },
+    )
+
+
+def desindexar(instancia):
+    IndiceBusqueda = apps.get_model('perfil', 'IndiceBusqueda')
+    codigo = FUENTES[type(instancia).__name__][0]
+    IndiceBusqueda.objects.filter(seccion=codigo, idobjeto=instancia.pk).delete()
+
+
+def reconstruir():
+    """Vuelve a llenar el índice desde las secciones (la migración 0017 lleva su propia copia)."""
+    IndiceBusqueda = apps.get_model('perfil', 'IndiceBusqueda')
+    IndiceBusqueda.objects.all().delete()
+    total = 0
+    for nombre, (codigo, titulo, texto, _) in FUENTES.items():
+        filas = apps.get_model('perfil', nombre).objects.filter(activarparaqueseveaenfront=True)
+        total += len(IndiceBusqueda.objects.bulk_create(
+            (IndiceBusqueda(
+                idperfil_id=fila.idperfil_id, seccion=codigo, idobjeto=fila.pk,
+                titulo=_unir(fila, titulo)[:255], texto=_unir(fila, texto),
+            ) for fila in filas.iterator()),
+            batch_size=500,
+        ))
+    return total
+
+
+def terminos(consulta):
+    """Palabras de la consulta (sin la sintaxis de cada motor, que no se deja pasar al usuario)."""
+    return re.findall(r'\w+', consulta.lower())[:MAX_TERMINOS]
+
+
+def _secciones_visibles(perfil):
+    return [codigo for codigo, campo in SECCIONES if getattr(perfil, campo)]
+
+
+def buscar(perfil, consulta, limite=20):
+    """Resultados ordenados por relevancia (todas las palabras, cada una como prefijo)."""
+    palabras = terminos(consulta)
+    secciones = _secciones_visibles(perfil)
+    if not palabras or not secciones:
+        return []
+    marcadores = ', '.join(['%s'] * len(secciones))
+
+    if connection.vendor == 'postgresql':
+        sql = f"""
+            SELECT i.seccion, i.idobjeto, i.titulo,
+                   ts_headline('spanish', i.texto, q, %s), ts_rank(i.vector, q) AS puntaje
+            FROM perfil_indicebusqueda i, to_tsquery('spanish', %s) q
+            WHERE i.vector @@ q AND i.idperfil_id = %s AND i.seccion IN ({marcadores})
+            ORDER BY puntaje DESC, i.idindice
+            LIMIT %s
+        """
+        opciones = f'StartSel={INICIO_MARCA}, StopSel={FIN_MARCA}, MaxWords=25, MinWords=10'
+        parametros = [opciones, ' & '.join(f'{p}:*' for p in palabras), perfil.pk, *secciones, limite]
+    elif connection.vendor == 'sqlite':
+        # bm25() es menor cuanto más relevante; el título pesa 10 veces más que el texto
+        sql = f"""
+            SELECT i.seccion, i.idobjeto, i.titulo,
+                   snippet(perfil_indicebusqueda_fts, 1, %s, %s, '…', 20),
+                   -bm25(perfil_indicebusqueda_fts, 10.0, 1.0) AS puntaje
+            FROM perfil_indicebusqueda_fts
+            JOIN perfil_indicebusqueda i ON i.idindice = perfil_indicebusqueda_fts.rowid
+            WHERE perfil_indicebusqueda_fts MATCH %s AND i.idperfil_id = %s AND i.seccion IN ({marcadores})
+            ORDER BY puntaje DESC, i.idindice
+            LIMIT %s
+        """
+        parametros = [INICIO_MARCA, FIN_MARCA, ' '.join(f'"{p}"*' for p in palabras), perfil.pk, *secciones, limite]
+    else:
+        return _buscar_sin_indice(perfil, palabras, secciones, limite)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        return [Resultado(*fila) for fila in cursor.fetchall()]
+
+
+def _buscar_sin_indice(perfil, palabras, secciones, limite):
+    """Otros motores: icontains sobre la tabla del índice, sin orden por relevancia."""
+    IndiceBusqueda = apps.get_model('perfil', 'IndiceBusqueda')
+    filas = IndiceBusqueda.objects.filter(idperfil=perfil, seccion__in=secciones)
+    for palabra in palabras:
+        filas = filas.filter(Q(titulo__icontains=palabra) | Q(texto__icontains=palabra))
+    return [
+        Resultado(fila.seccion, fila.idobjeto, fila.titulo, fila.texto[:160], 0.0)
+        for fila in filas.order_by('idindice')[:limite]
+    ]
+
+
+def resaltar(fragmento):
+    """Fragmento escapado con las coincidencias en <mark>."""
+    return mark_safe(escape(fragmento).replace(INICIO_MARCA, '<mark>').replace(FIN_MARCA, '</mark>'))
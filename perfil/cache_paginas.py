@@ -0,0 +1,110 @@
+"""
+Caché de página completa para las vistas públicas. La clave incluye la versión del
+contenido del perfil (la misma que el ETag, ver validadores.py), así que un cambio en el
+Admin se ve al instante sin esperar a que venza nada. Pasado PAGINAS_CACHE_FRESCO la copia
+se sigue sirviendo mientras un hilo la vuelve a generar (stale-while-revalidate). Cada perfil
+guarda sus páginas en su propia caché (cache_perfil.py).
+"""
+import hashlib
+import logging
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+from .activo import obtener_perfil
+from .cache_perfil import cache_de
+from .validadores import etag_contenido
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_contadores = {'aciertos': 0, 'obsoletos': 0, 'fallos': 0, 'omitidos': 0, 'regenerados': 0}
+
+
+def _contar(clave):
+    with _lock:
+        _contadores[clave] += 1
+
+
+def estadisticas():
+    """Contadores de este proceso y tasa de aciertos (las copias obsoletas servidas cuentan como acierto)."""
+    with _lock:
+        datos = dict(_contadores)
+    consultas = datos['aciertos'] + datos['obsoletos'] + datos['fallos']
+    datos['tasa_aciertos'] = round((datos['aciertos'] + datos['obsoletos']) / consultas, 3) if consultas else None
+    return datos
+
+
+def _cache(perfil):
+    return cache_de(perfil, settings.PAGINAS_CACHE_ALIAS)
+
+
+def _clave(request, kwargs):
+    etag = etag_contenido(request, **kwargs)
+    if etag is None:
+        return None
+    return 'pagina:' + hashlib.sha1(f'{etag}:{settings.PDF_MODO_ASINCRONO}'.encode('utf-8')).hexdigest()
+
+
+def _guardar(cache, clave, response):
+    cache.set(clave, {
+        'contenido': response.content,
+        'content_type': response['Content-Type'],
+        'fresco_hasta': time.time() + settings.PAGINAS_CACHE_FRESCO,
+    }, settings.PAGINAS_CACHE_TIMEOUT)
+
+
+def _regenerar(vista, request, args, kwargs, cache, clave):
+    try:
+        response = vista(request, *args, **kwargs)
+        if response.status_code == 200:
+            _guardar(cache, clave, response)
+            _contar('regenerados')
+    except Exception:
+        logger.exception("No se pudo regenerar la página %s en segundo plano", request.path)
+    finally:
+        cache.delete(clave + ':regenerando')
+        connections.close_all()  # Las conexiones de este hilo
+
+
+def cache_pagina(vista):
+    """Sirve la vista desde caché para GET anónimos (sin cookie de sesión)."""
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        if settings.PDF_MODO_ASINCRONO:
+            # El formulario del PDF lee el token de la cookie: la página cacheada no lo lleva
+            get_token(request)
+        clave = perfil = None
+        if request.method in ('GET', 'HEAD') and settings.SESSION_COOKIE_NAME not in request.COOKIES:
+            perfil = obtener_perfil(kwargs.get('slug'))
+            clave = _clave(request, kwargs) if perfil is not None else None
+        if clave is None:
+            _contar('omitidos')
+            return vista(request, *args, **kwargs)
+
+        cache = _cache(perfil)
+        copia = cache.get(clave)
+        if copia is not None:
+            estado = 'HIT'
+            if time.time() > copia['fresco_hasta']:
+                estado = 'STALE'
+                # Un solo hilo regenera aunque lleguen muchas peticiones a la vez
+                if cache.add(clave + ':regenerando', 1, 60):
+                    threading.Thread(target=_regenerar, args=(vista, request, args, kwargs, cache, clave), daemon=True).start()
+            _contar('aciertos' if estado == 'HIT' else 'obsoletos')
+            response = HttpResponse(copia['contenido'], content_type=copia['content_type'])
+            response['X-Cache-Pagina'] = estado
+            return response
+
+        _contar('fallos')
+        response = vista(request, *args, **kwargs)
+        if response.status_code == 200:
+            _guardar(cache, clave, response)
+        response['X-Cache-Pagina'] = 'MISS'
+        return response
+    return envoltura
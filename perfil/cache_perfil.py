@@ -0,0 +1,77 @@
+"""
+Caché propia de cada perfil para las páginas y los PDF terminados. Con una sola caché
+compartida, el perfil más visitado llena MAX_ENTRIES y el descarte se lleva las entradas
+de los demás; aquí cada perfil tiene su carpeta (FileBasedCache) o su espacio (LocMemCache)
+con PERFIL_CACHE_MAX_ENTRIES, así que solo se descarta lo suyo. Otros backends (Redis,
+Memcached) comparten el servidor: se separan solo por prefijo de clave.
+
+Cada worker guarda las instancias de los PERFILES_MEMORIZADOS perfiles usados más
+recientemente. El clear() de la caché compartida no entra en las carpetas de los perfiles
+(FileBasedCache borra solo los archivos de su nivel): cada una se vacía con cache_de(perfil).clear().
+"""
+import copy
+import os
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError
+from django.core.signals import setting_changed
+from django.utils.module_loading import import_string
+
+_lock = threading.Lock()
+_caches = OrderedDict()  # (alias, idperfil) -> instancia, la más reciente al final
+
+
+def _configuracion(alias, idperfil):
+    try:
+        configuracion = copy.deepcopy(settings.CACHES[alias])
+    except KeyError:
+        raise InvalidCacheBackendError(f"No existe la caché '{alias}'")
+    backend = configuracion.pop('BACKEND')
+    opciones = configuracion.setdefault('OPTIONS', {})
+    if backend.endswith('FileBasedCache'):
+        # Subcarpeta de la caché compartida (cache.clear() no la toca; ver el docstring)
+        configuracion['LOCATION'] = os.path.join(configuracion['LOCATION'], 'perfiles', str(idperfil))
+        opciones['MAX_ENTRIES'] = settings.PERFIL_CACHE_MAX_ENTRIES
+    elif backend.endswith('LocMemCache'):
+        configuracion['LOCATION'] = f"{configuracion.get('LOCATION', '')}:perfil:{idperfil}"
+        opciones['MAX_ENTRIES'] = settings.PERFIL_CACHE_MAX_ENTRIES
+    else:
+        configuracion['KEY_PREFIX'] = f"{configuracion.get('KEY_PREFIX', '')}perfil{idperfil}"
+    return backend, configuracion
+
+
+def cache_de(perfil, alias='default'):
+    """Caché del perfil, construida sobre la configuración de CACHES[alias]."""
+    clave = (alias, perfil.pk)
+    with _lock:
+        instancia = _caches.get(clave)
+        if instancia is not None:
+            _caches.move_to_end(clave)
+            return instancia
+        backend, configuracion = _configuracion(alias, perfil.pk)
+        location = configuracion.pop('LOCATION', '')
+        instancia = _caches[clave] = import_string(backend)(location, configuracion)
+        while len(_caches) > settings.PERFILES_MEMORIZADOS:
+            _, descartada = _caches.popitem(last=False)
+            _soltar(descartada)
+        return instancia
+
+
+def _soltar(instancia):
+    # LocMemCache guarda los datos en un diccionario global por LOCATION que sobrevive a la
+    # instancia: se vacía para que no crezca con cada perfil visitado. Los archivos de
+    # FileBasedCache y las claves de Redis/Memcached quedan donde están y se reutilizan.
+    if type(instancia).__name__ == 'LocMemCache':
+        instancia.clear()
+
+
+def _cambio_de_configuracion(setting, **kwargs):
+    # override_settings(CACHES=...) en los benchmarks: las instancias viejas ya no sirven
+    if setting in ('CACHES', 'PERFIL_CACHE_MAX_ENTRIES'):
+        with _lock:
+            _caches.clear()
+
+
+setting_changed.connect(_cambio_de_configuracion)
@@ -0,0 +1,317 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows (desarrollo): los blobs en uso solo se protegen dentro del proceso
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Resultado de cada descarga: 'ruta' apunta al archivo en la caché local o es None si falló ('error').
+# 'origen' indica de dónde salió: 'cache', 'revalidado' (304 del servidor) o 'red'.
+Descarga = namedtuple('Descarga', ['url', 'ruta', 'origen', 'error'])
+
+_sesion = None
+_lock_stats = threading.Lock()
+_stats = {'aciertos': 0, 'revalidados': 0, 'fallos': 0, 'errores': 0, 'desalojados': 0}
+
+# Blobs que los armados en curso de este proceso todavía van a leer (ruta -> cuántos): el desalojo no los toca.
+# Entre procesos los protege el bloqueo compartido que cada armado tiene sobre ellos (_arrendar)
+_lock_en_uso = threading.Lock()
+_en_uso = Counter()
+
+
+def _config(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+def _contar(clave, n=1):
+    with _lock_stats:
+        _stats[clave] += n
+
+
+def estadisticas():
+    """Contadores acumulados de la caché de certificados en este proceso."""
+    with _lock_stats:
+        return dict(_stats)
+
+
+def obtener_sesion():
+    """Sesión HTTP compartida con pool de conexiones (reutiliza TLS hacia Cloudinary)."""
+    global _sesion
+    if _sesion is None:
+        hilos = _config('CERTIFICADOS_MAX_HILOS', 6)
+        adaptador = HTTPAdapter(pool_connections=hilos, pool_maxsize=hilos)
+        sesion = requests.Session()
+        sesion.mount('http://', adaptador)
+        sesion.mount('https://', adaptador)
+        _sesion = sesion
+    return _sesion
+
+
+# --- CACHÉ EN DISCO DIRECCIONADA POR CONTENIDO ---
+# meta/<sha1 del nombre en storage>.json -> {etag, last_modified, sha256, validado}
+# blobs/<sha256>.pdf                      -> contenido del certificado
+
+def _directorio(sub):
+    ruta = os.path.join(_config('CERTIFICADOS_CACHE_DIR', os.path.join(settings.BASE_DIR, 'cache', 'certificados')), sub)
+    os.makedirs(ruta, exist_ok=True)
+    return ruta
+
+
+def _ruta_meta(nombre):
+    return os.path.join(_directorio('meta'), hashlib.sha1(nombre.encode('utf-8')).hexdigest() + '.json')
+
+
+def _ruta_blob(sha256):
+    return os.path.join(_directorio('blobs'), sha256 + '.pdf')
+
+
+def _leer_meta(nombre):
+    try:
+        with open(_ruta_meta(nombre), encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not os.path.exists(_ruta_blob(meta.get('sha256', ''))):
+        return None
+    return meta
+
+
+def _escribir_meta(nombre, meta):
+    destino = _ruta_meta(nombre)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(destino), suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp, destino)
+
+
+def _arrendar(ruta):
+    """
+    Abre el blob con un bloqueo compartido (flock) que dura hasta cerrar el descriptor.
+    None si ya no existe: otro proceso lo desalojó antes de que se tomara el bloqueo.
+    """
+    try:
+        fd = os.open(ruta, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH)
+        # El desalojo borra con el bloqueo exclusivo tomado: si llegó primero, la ruta ya es otra
+        if os.stat(ruta).st_ino == os.fstat(fd).st_ino:
+            return fd
+    except OSError:
+        pass
+    os.close(fd)
+    return None
+
+
+def _borrar_si_libre(ruta):
+    """Borra el blob si ningún armado (de ningún proceso) lo tiene arrendado."""
+    try:
+        fd = os.open(ruta, os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        os.remove(ruta)
+        return True
+    except OSError:  # BlockingIOError: arrendado
+        return False
+    finally:
+        os.close(fd)
+
+
+def _desalojar():
+    """Borra los blobs usados hace más tiempo (mtime) hasta quedar bajo el límite, salvo los en uso."""
+    maximo = _config('CERTIFICADOS_CACHE_MAX_BYTES', 500 * 1024 * 1024)
+    entradas = []
+    total = 0
+    with os.scandir(_directorio('blobs')) as it:
+        for e in it:
+            if e.is_file() and e.name.endswith('.pdf'):
+                st = e.stat()
+                entradas.append((st.st_mtime, st.st_size, e.path))
+                total += st.st_size
+    if total <= maximo:
+        return
+    entradas.sort()
+    with _lock_en_uso:
+        en_uso = set(_en_uso)
+    for _, tamano, ruta in entradas:
+        if total <= maximo * 0.9:
+            break
+        if ruta in en_uso or not _borrar_si_libre(ruta):
+            continue
+        total -= tamano
+        _contar('desalojados')
+
+
+def _guardar_respuesta(response, max_bytes, limite):
+    """Escribe el cuerpo en disco mientras calcula el hash; nunca lo tiene entero en memoria."""
+    declarado = response.headers.get('Content-Length')
+    if declarado and declarado.isdigit() and int(declarado) > max_bytes:
+        raise ValueError(f'excede {max_bytes} bytes')
+    sha = hashlib.sha256()
+    total = 0
+    fd, tmp = tempfile.mkstemp(dir=_directorio('blobs'), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for parte in response.iter_content(chunk_size=64 * 1024):
+                total += len(parte)
+                if total > max_bytes:
+                    raise ValueError(f'excede {max_bytes} bytes')
+                if time.monotonic() > limite:
+                    raise ValueError('tiempo total agotado')
+                sha.update(parte)
+                f.write(parte)
+        digest = sha.hexdigest()
+        # Sin reemplazar un blob que ya existe: tiene el mismo contenido y puede estar arrendado
+        try:
+            os.link(tmp, _ruta_blob(digest))
+        except FileExistsError:
+            pass
+        os.remove(tmp)
+        return digest
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def _descargar(nombre, url, limite):
+    max_bytes = _config('CERTIFICADOS_MAX_BYTES', 15 * 1024 * 1024)
+    timeout_archivo = _config('CERTIFICADOS_TIMEOUT', 10)
+
+    meta = _leer_meta(nombre)
+    if meta and time.time() - meta['validado'] < _config('CERTIFICADOS_CACHE_REVALIDAR', 24 * 3600):
+        ruta = _ruta_blob(meta['sha256'])
+        try:
+            os.utime(ruta)  # Marca de uso para el LRU
+            _contar('aciertos')
+            return Descarga(url, ruta, 'cache', None)
+        except OSError:
+            meta = None  # Desalojado por otro proceso entre la lectura y el uso
+
+    restante = limite - time.monotonic()
+    if restante <= 0:
+        _contar('errores')
+        return Descarga(url, None, 'red', 'tiempo total agotado')
+
+    cabeceras = {}
+    if meta:
+        if meta.get('etag'):
+            cabeceras['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            cabeceras['If-Modified-Since'] = meta['last_modified']
+    try:
+        with obtener_sesion().get(url, headers=cabeceras, timeout=min(timeout_archivo, restante), stream=True) as response:
+            if response.status_code == 304 and meta:
+                meta['validado'] = time.time()
+                _escribir_meta(nombre, meta)
+                ruta = _ruta_blob(meta['sha256'])
+                os.utime(ruta)
+                _contar('revalidados')
+                return Descarga(url, ruta, 'revalidado', None)
+            if response.status_code != 200:
+                _contar('errores')
+                return Descarga(url, None, 'red', f'HTTP {response.status_code}')
+            sha256 = _guardar_respuesta(response, max_bytes, limite)
+            _escribir_meta(nombre, {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'sha256': sha256,
+                'validado': time.time(),
+            })
+    except (requests.RequestException, ValueError, OSError) as e:
+        _contar('errores')
+        return Descarga(url, None, 'red', str(e))
+
+    _contar('fallos')
+    return Descarga(url, _ruta_blob(sha256), 'red', None)
+
+
+@contextmanager
+def descargar_certificados(archivos):
+    """
+    Resuelve los certificados [(nombre_en_storage, url), ...] contra la caché en disco,
+    descargando en paralelo solo los que faltan, con un límite total de tiempo.
+    Entrega una lista de Descarga en el mismo orden que 'archivos'. Mientras dura el bloque
+    sus blobs no se desalojan: cada uno queda con un bloqueo compartido que respeta el
+    desalojo de todos los workers (sin fcntl, solo el de este proceso). Un blob desalojado
+    entre la descarga y el bloqueo se vuelve a descargar una vez. Al salir se desaloja una
+    vez, si hubo descargas nuevas.
+    """
+    resultados = _descargar_todos(archivos)
+    arriendos = []
+    try:
+        for i, ((nombre, url), resultado) in enumerate(zip(archivos, resultados)):
+            if not resultado.ruta:
+                continue
+            fd = _arrendar(resultado.ruta)
+            if fd is None:
+                resultado = _descargar(nombre, url, time.monotonic() + _config('CERTIFICADOS_TIMEOUT', 10))
+                fd = _arrendar(resultado.ruta) if resultado.ruta else None
+                if fd is None and resultado.ruta:
+                    resultado = Descarga(url, None, resultado.origen, 'desalojado antes de usarlo')
+                resultados[i] = resultado
+            if fd is not None:
+                arriendos.append(fd)
+    except BaseException:
+        for fd in arriendos:
+            os.close(fd)
+        raise
+    rutas = [r.ruta for r in resultados if r.ruta]
+    with _lock_en_uso:
+        _en_uso.update(rutas)
+    try:
+        yield resultados
+    finally:
+        for fd in arriendos:
+            os.close(fd)
+        with _lock_en_uso:
+            for ruta in rutas:
+                _en_uso[ruta] -= 1
+                if not _en_uso[ruta]:
+                    del _en_uso[ruta]
+        if any(r.origen == 'red' and r.ruta for r in resultados):
+            _desalojar()
+
+
+def _descargar_todos(archivos):
+    if not archivos:
+        return []
+    limite = time.monotonic() + _config('CERTIFICADOS_TIMEOUT_TOTAL', 30)
+    pool = ThreadPoolExecutor(max_workers=_config('CERTIFICADOS_MAX_HILOS', 6))
+    try:
+        futuros = [pool.submit(_descargar, nombre, url, limite) for nombre, url in archivos]
+        wait(futuros, timeout=max(0, limite - time.monotonic()))
+        resultados = []
+        for (nombre, url), futuro in zip(archivos, futuros):
+            if futuro.done():
+                resultados.append(futuro.result())
+            else:
+                futuro.cancel()
+                resultados.append(Descarga(url, None, 'red', 'tiempo total agotado'))
+    finally:
+        # No esperamos a los hilos rezagados: cortan solos al pasar el límite.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    for r in resultados:
+        if r.error:
+            logger.warning("No se pudo descargar el certificado %s: %s", r.url, r.error)
+    return resultados
@@ -0,0 +1,116 @@
+"""
+Un solo armado por PDF idéntico: las peticiones simultáneas con la misma clave de caché
+esperan a la primera (lock por clave dentro del proceso, archivo bloqueado con flock entre
+workers) y luego leen de la caché el PDF que esta dejó. Esperan lo que puede durar ese
+armado (PDF_ESPERA_COALESCENCIA: descargas más render); PDF_ESPERA_ADMISION limita solo la
+espera de un turno para armar. Si el armado en curso se pasa de eso se responde 503.
+"""
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows (desarrollo): solo se coalesce dentro del proceso
+    fcntl = None
+
+_lock = threading.Lock()
+_en_vuelo = {}  # clave -> [Lock, peticiones que lo usan]
+_contadores = {'armados': 0, 'esperas': 0, 'reutilizados': 0, 'agotadas': 0}
+
+
+class Ocupado(Exception):
+    """El armado de la misma clave no terminó dentro de PDF_ESPERA_COALESCENCIA."""
+
+
+def contar(clave, n=1):
+    with _lock:
+        _contadores[clave] += n
+
+
+def estadisticas():
+    with _lock:
+        return dict(_contadores)
+
+
+def _bloquear_archivo(clave, limite):
+    """
+    flock sobre un archivo propio de la clave (hash completo: claves distintas no se esperan).
+    Quien lo suelta lo borra; si al conseguir el bloqueo el archivo ya no es el de la ruta,
+    otro lo borró en el medio y se vuelve a intentar con el nuevo.
+    """
+    os.makedirs(settings.PDF_COALESCER_DIR, exist_ok=True)
+    ruta = os.path.join(settings.PDF_COALESCER_DIR, hashlib.sha256(clave.encode('utf-8')).hexdigest() + '.lock')
+    esperando = False
+    while True:
+        fd = os.open(ruta, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            if not esperando:
+                contar('esperas')  # El armado lo está haciendo otro worker
+                esperando = True
+            if time.monotonic() >= limite:
+                return None, ruta
+            time.sleep(0.05)
+            continue
+        try:
+            vigente = os.stat(ruta).st_ino == os.fstat(fd).st_ino
+        except FileNotFoundError:
+            vigente = False
+        if vigente:
+            return fd, ruta
+        os.close(fd)
+
+
+def _soltar_archivo(fd, ruta):
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+@contextmanager
+def un_solo_armado(clave):
+    """
+    Bloque exclusivo para 'clave' entre hilos y workers. Quien entra debe volver a mirar
+    la caché antes de armar: si esperó a otro, el PDF ya estará ahí. Si el armado en curso
+    no termina dentro de PDF_ESPERA_COALESCENCIA se lanza Ocupado (la vista responde 503).
+    """
+    limite = time.monotonic() + settings.PDF_ESPERA_COALESCENCIA
+    with _lock:
+        entrada = _en_vuelo.setdefault(clave, [threading.Lock(), 0])
+        entrada[1] += 1
+    lock_local = entrada[0]
+    fd = None
+    tomado = False
+    try:
+        tomado = lock_local.acquire(blocking=False)
+        if not tomado:
+            contar('esperas')
+            tomado = lock_local.acquire(timeout=max(0, limite - time.monotonic()))
+            if not tomado:
+                contar('agotadas')
+                raise Ocupado()
+        if fcntl is not None:
+            fd, ruta = _bloquear_archivo(clave, limite)
+            if fd is None:
+                contar('agotadas')
+                raise Ocupado()
+        yield
+    finally:
+        if fd is not None:
+            _soltar_archivo(fd, ruta)
+        if tomado:
+            lock_local.release()
+        with _lock:
+            entrada[1] -= 1
+            if not entrada[1]:
+                del _en_vuelo[clave]
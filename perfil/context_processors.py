@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def configuracion(request):
+    """Opciones del sitio que necesitan las plantillas (p. ej. el modal del PDF en base.html)."""
+    return {'pdf_asincrono': settings.PDF_MODO_ASINCRONO}
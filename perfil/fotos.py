@@ -0,0 +1,146 @@
+"""
+Variantes de las fotos del garage: al subir una foto se guardan copias reducidas a los
+anchos de GARAGE_FOTO_ANCHOS en WebP y en JPEG (PNG si tiene transparencia) para los
+navegadores sin WebP. La página las pide con srcset/sizes, así que el navegador baja la
+más chica que le sirve en lugar del original del teléfono.
+"""
+import hashlib
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import VentaGarage
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO = 'garage/variantes'
+
+
+def _leer(archivo):
+    if archivo._committed:
+        archivo.open('rb')
+        try:
+            return archivo.read()
+        finally:
+            archivo.close()
+    # Recién subido: se lee sin cerrarlo, se guarda con el save() siguiente
+    archivo.file.seek(0)
+    datos = archivo.file.read()
+    archivo.file.seek(0)
+    return datos
+
+
+def _guardar(almacenamiento, nombre, imagen, formato, **opciones):
+    """
+    Sube la variante y devuelve el nombre con que quedó guardada: MediaCloudinaryStorage
+    lo cambia por el public_id (con sufijo aleatorio), así que el pedido no sirve de URL.
+    """
+    salida = io.BytesIO()
+    imagen.save(salida, formato, **opciones)
+    return almacenamiento.save(nombre, ContentFile(salida.getvalue()))
+
+
+def _huella(datos):
+    """Hash del original y de la configuración: si coincide, las variantes guardadas sirven tal cual."""
+    sha = hashlib.sha256(datos)
+    sha.update(f'{tuple(settings.GARAGE_FOTO_ANCHOS)}:{settings.GARAGE_FOTO_CALIDAD}'.encode())
+    return sha.hexdigest()[:16]
+
+
+def _variantes_existentes(instancia, huella):
+    """
+    Variantes ya generadas para la misma foto: las de la instancia o las de otro artículo.
+    Se comparan por la huella registrada en el modelo, sin preguntar al almacenamiento
+    (en Cloudinary cada exists() es una petición HTTP).
+    """
+    if (instancia.fotoproducto_variantes or {}).get('huella') == huella:
+        return instancia.fotoproducto_variantes
+    return (
+        VentaGarage.objects.filter(fotoproducto_variantes__huella=huella)
+        .exclude(pk=instancia.pk).values_list('fotoproducto_variantes', flat=True).first()
+    )
+
+
+def _anchos(ancho_original):
+    """Anchos configurados menores que el original, más el original si no llega al mayor (nunca se amplía)."""
+    anchos = [a for a in settings.GARAGE_FOTO_ANCHOS if a < ancho_original]
+    if ancho_original <= max(settings.GARAGE_FOTO_ANCHOS):
+        anchos.append(ancho_original)
+    return anchos
+
+
+def generar_variantes(instancia):
+    """
+    Llena instancia.fotoproducto_variantes con las medidas del original y de cada variante.
+    No guarda la instancia. Devuelve el mensaje de error si la foto no se pudo leer, o None.
+    """
+    archivo = instancia.fotoproducto
+    if not archivo:
+        instancia.fotoproducto_variantes = {}
+        return None
+
+    try:
+        datos = _leer(archivo)
+    except OSError as e:
+        logger.warning("No se pudo leer la foto %s: %s", archivo.name, e)
+        instancia.fotoproducto_variantes = {}
+        return str(e)
+
+    huella = _huella(datos)
+    existentes = _variantes_existentes(instancia, huella)
+    if existentes:
+        instancia.fotoproducto_variantes = dict(existentes)
+        return None
+
+    try:
+        with Image.open(io.BytesIO(datos)) as abierta:
+            original = ImageOps.exif_transpose(abierta)
+            original.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        logger.warning("No se pudieron generar las variantes de %s: %s", archivo.name, e)
+        instancia.fotoproducto_variantes = {}
+        return str(e)
+
+    transparente = 'A' in original.getbands() or 'transparency' in original.info
+    if transparente:
+        original = original.convert('RGBA')
+        formato, extension, opciones = 'PNG', 'png', {'optimize': True}
+    else:
+        original = original.convert('RGB')
+        formato, extension, opciones = 'JPEG', 'jpg', {'quality': settings.GARAGE_FOTO_CALIDAD, 'optimize': True, 'progressive': True}
+
+    almacenamiento = archivo.storage
+    variantes = []
+    for ancho in _anchos(original.width):
+        alto = max(1, round(original.height * ancho / original.width))
+        imagen = original.resize((ancho, alto), Image.LANCZOS) if ancho != original.width else original
+        base = os.path.join(DIRECTORIO, f'{huella}-{ancho}')
+        variantes.append({
+            'ancho': ancho,
+            'alto': alto,
+            'webp': _guardar(almacenamiento, f'{base}.webp', imagen, 'WEBP', quality=settings.GARAGE_FOTO_CALIDAD, method=6),
+            'respaldo': _guardar(almacenamiento, f'{base}.{extension}', imagen, formato, **opciones),
+        })
+    instancia.fotoproducto_variantes = {
+        'huella': huella,
+        'ancho': original.width,
+        'alto': original.height,
+        'variantes': variantes,
+    }
+    return None
+
+
+def nombres_variantes(datos):
+    """Archivos de las variantes guardadas en 'datos' (para borrarlos cuando se reemplaza la foto)."""
+    return {nombre for v in (datos or {}).get('variantes', []) for nombre in (v['webp'], v['respaldo'])}
+
+
+def borrar_variantes(almacenamiento, nombres):
+    """Borra las variantes que ya no usa ningún artículo (la misma foto en dos artículos comparte archivos)."""
+    for nombre in nombres:
+        if not VentaGarage.objects.filter(fotoproducto_variantes__icontains=nombre).exists():
+            almacenamiento.delete(nombre)
@@ -0,0 +1,113 @@
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from PIL import Image, ImageOps, UnidentifiedImageError
+import requests
+
+from .certificados import obtener_sesion
+
+logger = logging.getLogger(__name__)
+
+
+def _directorio_pdf():
+    os.makedirs(settings.PDF_IMAGENES_DIR, exist_ok=True)
+    return settings.PDF_IMAGENES_DIR
+
+
+def _desalojar(conservar):
+    """
+    Borra las imágenes usadas hace más tiempo (mtime) hasta quedar bajo PDF_IMAGENES_MAX_BYTES.
+    No toca 'conservar' ni las usadas en el último minuto, que un armado en curso puede estar leyendo.
+    """
+    entradas = []
+    total = 0
+    with os.scandir(_directorio_pdf()) as it:
+        for e in it:
+            if e.is_file() and e.name.endswith(('.jpg', '.png')):
+                st = e.stat()
+                entradas.append((st.st_mtime, st.st_size, e.path))
+                total += st.st_size
+    maximo = settings.PDF_IMAGENES_MAX_BYTES
+    if total <= maximo:
+        return
+    recientes = time.time() - 60
+    for mtime, tamano, ruta in sorted(entradas):
+        if total <= maximo * 0.9 or mtime > recientes:
+            break
+        if ruta == conservar:
+            continue
+        try:
+            os.remove(ruta)
+            total -= tamano
+        except OSError:
+            pass
+
+
+def _guardar_atomico(imagen, destino, formato, **opciones):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(destino), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            imagen.save(f, formato, **opciones)
+        os.replace(tmp, destino)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def _tiene_transparencia(imagen):
+    return 'A' in imagen.getbands() or 'transparency' in imagen.info
+
+
+def _leer_limitado(response, max_bytes):
+    """Cuerpo de la respuesta, cortando la descarga en cuanto pasa de max_bytes."""
+    declarado = response.headers.get('Content-Length')
+    if declarado and declarado.isdigit() and int(declarado) > max_bytes:
+        raise ValueError(f'excede {max_bytes} bytes')
+    datos = io.BytesIO()
+    for parte in response.iter_content(chunk_size=64 * 1024):
+        if datos.tell() + len(parte) > max_bytes:
+            raise ValueError(f'excede {max_bytes} bytes')
+        datos.write(parte)
+    datos.seek(0)
+    return datos
+
+
+def imagen_para_pdf(url):
+    """
+    Devuelve la ruta local de una copia reducida de la imagen remota 'url', lista para
+    xhtml2pdf (JPEG, o PNG si tiene transparencia), descargándola solo si no está en la
+    carpeta (la primera vez, o si se desalojó). Devuelve None si no se pudo obtener o no es
+    una imagen.
+    """
+    base = os.path.join(_directorio_pdf(), hashlib.sha1(url.encode('utf-8')).hexdigest())
+    for ext in ('.jpg', '.png'):
+        try:
+            os.utime(base + ext)  # Marca de uso para el desalojo
+            return base + ext
+        except FileNotFoundError:
+            pass
+
+    try:
+        with obtener_sesion().get(url, timeout=settings.CERTIFICADOS_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            datos = _leer_limitado(response, settings.PDF_IMAGEN_MAX_BYTES)
+        with Image.open(datos) as original:
+            imagen = ImageOps.exif_transpose(original)
+            lado = settings.PDF_IMAGEN_MAX_PX
+            imagen.thumbnail((lado, lado))
+            if _tiene_transparencia(imagen):
+                destino = base + '.png'
+                _guardar_atomico(imagen, destino, 'PNG', optimize=True)
+            else:
+                destino = base + '.jpg'
+                _guardar_atomico(imagen.convert('RGB'), destino, 'JPEG', quality=85, optimize=True)
+    except (requests.RequestException, Image.DecompressionBombError, UnidentifiedImageError, ValueError, OSError) as e:
+        logger.warning("No se pudo preparar la imagen %s para el PDF: %s", url, e)
+        return None
+    _desalojar(destino)
+    return destino
@@ -0,0 +1,126 @@
+"""
+Ingesta de certificados: se ejecuta al guardar desde el admin, una sola vez por archivo,
+para que el armado del PDF no tenga que validar nada en cada petición.
+"""
+import hashlib
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, ImageSequence, UnidentifiedImageError
+from pypdf import PdfReader, PdfWriter
+from pypdf.errors import PyPdfError
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_METADATOS = ('certificado_valido', 'certificado_paginas', 'certificado_bytes', 'certificado_sha256')
+
+
+class CertificadoInvalido(Exception):
+    pass
+
+
+def _imagen_a_pdf(datos):
+    """Convierte una imagen (o un TIFF de varias páginas) en un PDF de una página por cuadro."""
+    with Image.open(io.BytesIO(datos)) as imagen:
+        paginas = [ImageOps.exif_transpose(cuadro).convert('RGB') for cuadro in ImageSequence.Iterator(imagen)]
+    salida = io.BytesIO()
+    paginas[0].save(salida, 'PDF', resolution=150, save_all=True, append_images=paginas[1:])
+    return salida.getvalue()
+
+
+def _normalizar_pdf(datos):
+    """
+    Abre el PDF en modo tolerante (reconstruye la tabla xref si está rota), lo desencripta
+    si solo tiene clave de dueño y lo reescribe limpio. Devuelve (bytes, páginas).
+    """
+    try:
+        reader = PdfReader(io.BytesIO(datos), strict=False)
+        if reader.is_encrypted and not reader.decrypt(''):
+            raise CertificadoInvalido("el PDF está protegido con contraseña")
+        paginas = len(reader.pages)
+        if not paginas:
+            raise CertificadoInvalido("el PDF no tiene páginas")
+        writer = PdfWriter(clone_from=reader)
+        writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+        salida = io.BytesIO()
+        writer.write(salida)
+    except CertificadoInvalido:
+        raise
+    except (PyPdfError, ValueError, KeyError, TypeError, OSError) as e:
+        raise CertificadoInvalido(f"no se pudo leer el PDF: {e}") from e
+    except Exception as e:
+        # pypdf puede fallar con cualquier cosa ante un archivo malformado: nunca debe romper el save
+        logger.exception("Error inesperado al leer un PDF subido")
+        raise CertificadoInvalido("no se pudo leer el PDF") from e
+    return salida.getvalue(), paginas
+
+
+def normalizar_certificado(datos):
+    """
+    Devuelve (bytes_pdf, páginas, convertido) para el contenido subido: los PDF se
+    reparan y reescriben, las imágenes se convierten a PDF. Lanza CertificadoInvalido
+    si no es ninguna de las dos cosas.
+    """
+    convertido = False
+    if not datos.lstrip()[:5].startswith(b'%PDF'):
+        try:
+            datos = _imagen_a_pdf(datos)
+        except Image.DecompressionBombError as e:
+            raise CertificadoInvalido("la imagen es demasiado grande") from e
+        except (UnidentifiedImageError, OSError) as e:
+            raise CertificadoInvalido("el archivo no es un PDF ni una imagen") from e
+        except Exception as e:
+            logger.exception("Error inesperado al convertir una imagen subida")
+            raise CertificadoInvalido("no se pudo convertir la imagen") from e
+        convertido = True
+    pdf, paginas = _normalizar_pdf(datos)
+    return pdf, paginas, convertido
+
+
+def ingerir_certificado(instancia):
+    """
+    Procesa instancia.rutacertificado y llena los campos certificado_*. No guarda la
+    instancia: el archivo normalizado queda asignado y se sube con el save() siguiente.
+    Devuelve el mensaje de error si el archivo no es válido, o None.
+    """
+    archivo = instancia.rutacertificado
+    if not archivo:
+        instancia.certificado_valido = None
+        instancia.certificado_paginas = None
+        instancia.certificado_bytes = None
+        instancia.certificado_sha256 = ''
+        return None
+
+    if archivo._committed:
+        archivo.open('rb')
+        try:
+            datos = archivo.read()
+        finally:
+            archivo.close()
+    else:
+        # Recién subido: se lee sin cerrarlo, por si hay que guardarlo tal cual
+        archivo.file.seek(0)
+        datos = archivo.file.read()
+        archivo.file.seek(0)
+
+    try:
+        pdf, paginas, convertido = normalizar_certificado(datos)
+    except CertificadoInvalido as e:
+        logger.warning("Certificado inválido %s: %s", archivo.name, e)
+        instancia.certificado_valido = False
+        instancia.certificado_paginas = None
+        instancia.certificado_bytes = len(datos)
+        instancia.certificado_sha256 = hashlib.sha256(datos).hexdigest()
+        return str(e)
+
+    nombre = os.path.basename(archivo.name)
+    if convertido:
+        nombre = os.path.splitext(nombre)[0] + '.pdf'
+    instancia.rutacertificado = ContentFile(pdf, name=nombre)
+    instancia.certificado_valido = True
+    instancia.certificado_paginas = paginas
+    instancia.certificado_bytes = len(pdf)
+    instancia.certificado_sha256 = hashlib.sha256(pdf).hexdigest()
+    return None
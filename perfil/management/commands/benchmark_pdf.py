@@ -0,0 +1,146 @@
+import functools
+import json
+import math
+import resource
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from perfil import certificados
+from perfil.cache_perfil import cache_de
+from perfil.models import (
+    ExperienciaLaboral, CursosRealizados, Reconocimientos,
+    ProductosAcademicos, ProductosLaborales, VentaGarage
+)
+from perfil.reportes import MOTORES, SECCIONES, construir_cv
+from perfil.sintetico import crear_perfil_sintetico
+
+ETAPAS = ('consultas', 'plantilla', 'fragmentos_cache', 'pisa', 'reportlab', 'certificados', 'caratulas', 'union', 'optimizacion', 'escritura')
+
+
+class _ServidorSilencioso(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano: el valor en la posición ceil(p/100 * n) de la muestra ordenada."""
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, math.ceil(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def resumen(valores):
+    return {
+        'p50_ms': round(percentil(valores, 50) * 1000, 2),
+        'p95_ms': round(percentil(valores, 95) * 1000, 2),
+        'media_ms': round(statistics.mean(valores) * 1000, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = ("Mide el armado del PDF con un perfil sintético y certificados locales (sin red). "
+            "Escribe p50/p95 por etapa, RSS pico y tamaño en JSON para comparar corridas.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--experiencias', type=int, default=20)
+        parser.add_argument('--cursos', type=int, default=20)
+        parser.add_argument('--reconocimientos', type=int, default=10)
+        parser.add_argument('--academicos', type=int, default=10)
+        parser.add_argument('--laborales', type=int, default=10)
+        parser.add_argument('--garage', type=int, default=10)
+        parser.add_argument('--paginas-certificado', type=int, default=1)
+        parser.add_argument('--repeticiones', type=int, default=10)
+        parser.add_argument('--motor', choices=MOTORES, default='xhtml2pdf')
+        parser.add_argument('--cache-caliente', action='store_true',
+                            help="Conserva las cachés (certificados y fragmentos) entre repeticiones; por defecto cada corrida parte en frío.")
+        parser.add_argument('--salida', default=None, help="Archivo JSON de resultados (por defecto benchmark-<fecha>.json).")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as media, tempfile.TemporaryDirectory() as cache_dir:
+            # Servidor HTTP local que hace de Cloudinary para los certificados
+            manejador = functools.partial(_ServidorSilencioso, directory=media)
+            servidor = ThreadingHTTPServer(('127.0.0.1', 0), manejador)
+            threading.Thread(target=servidor.serve_forever, daemon=True).start()
+            almacenamiento = {
+                'default': {
+                    'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                    'OPTIONS': {'location': media, 'base_url': f'http://127.0.0.1:{servidor.server_port}/'},
+                },
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            }
+            # Caché en memoria propia: no se mezcla con la del sitio
+            caches = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-pdf'}}
+            try:
+                with override_settings(STORAGES=almacenamiento, CACHES=caches, PDF_IMAGENES_DIR=f'{cache_dir}/imagenes'):
+                    resultados = self._medir(options, media, cache_dir)
+            finally:
+                servidor.shutdown()
+
+        salida = options['salida'] or f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json"
+        with open(salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+        for nombre, datos in resultados['etapas'].items():
+            self.stdout.write(f"{nombre:<16} p50 {datos['p50_ms']:9.1f} ms   p95 {datos['p95_ms']:9.1f} ms")
+        total = resultados['total']
+        self.stdout.write(self.style.SUCCESS(
+            f"{'total':<16} p50 {total['p50_ms']:9.1f} ms   p95 {total['p95_ms']:9.1f} ms   "
+            f"RSS pico {resultados['rss_pico_kb'] / 1024:.1f} MiB   PDF {resultados['tamano_bytes'] / 1024:.1f} KiB"
+        ))
+        self.stdout.write(f"Resultados en {salida}")
+
+    def _medir(self, options, media, cache_dir):
+        cantidades = {
+            ExperienciaLaboral: options['experiencias'],
+            CursosRealizados: options['cursos'],
+            Reconocimientos: options['reconocimientos'],
+            ProductosAcademicos: options['academicos'],
+            ProductosLaborales: options['laborales'],
+            VentaGarage: options['garage'],
+        }
+        secciones = tuple(codigo for codigo, _ in SECCIONES)
+        por_etapa = {}
+        totales = []
+        tamano = 0
+
+        # Todo ocurre dentro de una transacción que se revierte: la base queda como estaba
+        with transaction.atomic():
+            perfil = crear_perfil_sintetico(cantidades, media, options['paginas_certificado'])
+            for n in range(options['repeticiones']):
+                cache_certificados = f'{cache_dir}/certificados' if options['cache_caliente'] else f'{cache_dir}/certificados-{n}'
+                if not options['cache_caliente']:
+                    cache_de(perfil).clear()  # Los fragmentos viven en la caché del perfil
+                with override_settings(CERTIFICADOS_CACHE_DIR=cache_certificados):
+                    etapas = {}
+                    inicio = time.perf_counter()
+                    resultado = construir_cv(perfil, secciones, options['motor'], etapas)
+                    totales.append(time.perf_counter() - inicio)
+                tamano = resultado.tamano
+                resultado.archivo.close()
+                for nombre, segundos in etapas.items():
+                    por_etapa.setdefault(nombre, []).append(segundos)
+            transaction.set_rollback(True)
+
+        return {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'parametros': {
+                'motor': options['motor'],
+                'repeticiones': options['repeticiones'],
+                'cache_caliente': options['cache_caliente'],
+                'paginas_certificado': options['paginas_certificado'],
+                'filas': {modelo.__name__: n for modelo, n in cantidades.items()},
+            },
+            'etapas': {nombre: resumen(por_etapa[nombre]) for nombre in ETAPAS if nombre in por_etapa},
+            'total': resumen(totales),
+            'rss_pico_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'tamano_bytes': tamano,
+            'cache_certificados': certificados.estadisticas(),
+        }
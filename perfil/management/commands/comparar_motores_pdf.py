@@ -0,0 +1,41 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from perfil.reportes import MOTORES, renderizar_base
+from perfil.sintetico import contexto_sintetico
+
+
+class Command(BaseCommand):
+    help = "Compara la latencia de los motores del PDF (xhtml2pdf vs ReportLab) con perfiles grandes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, nargs='+', default=[10, 100], help="Filas por sección a probar.")
+        parser.add_argument('--repeticiones', type=int, default=3)
+
+    def handle(self, *args, **options):
+        # Se compara el renderizado completo: sin fragmentos (xhtml2pdf mediría aciertos de
+        # caché) y con una caché en memoria propia, para no escribir en la del sitio
+        caches = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'comparar-motores'}}
+        with override_settings(PDF_FRAGMENTOS=False, CACHES=caches):
+            self._comparar(options)
+
+    def _comparar(self, options):
+        for n in options['filas']:
+            context = contexto_sintetico(n)
+            medianas = {}
+            for motor in MOTORES:
+                tiempos = []
+                for _ in range(options['repeticiones']):
+                    inicio = time.perf_counter()
+                    archivo = renderizar_base(context, motor)
+                    tiempos.append(time.perf_counter() - inicio)
+                    tamano = archivo.seek(0, 2)
+                    archivo.close()
+                medianas[motor] = statistics.median(tiempos)
+                self.stdout.write(f"{n:>5} filas/sección  {motor:<10} mediana {medianas[motor] * 1000:8.1f} ms  {tamano / 1024:8.1f} KiB")
+            self.stdout.write(self.style.SUCCESS(
+                f"{n:>5} filas/sección  reportlab es {medianas['xhtml2pdf'] / medianas['reportlab']:.1f}x más rápido"
+            ))
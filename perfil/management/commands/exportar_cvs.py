@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils.text import slugify
+
+from perfil.models import DatosPersonales
+from perfil.reportes import MOTORES, SECCIONES, construir_cv, secciones_solicitadas
+
+# Todas las casillas del modal marcadas: quedan las secciones que el Admin permite
+TODAS_LAS_SECCIONES = {codigo: 'on' for codigo, _ in SECCIONES}
+
+
+def nombre_archivo(idperfil, apellidos):
+    return f"CV_{idperfil}_{slugify(apellidos) or 'perfil'}.pdf"
+
+
+def _inicializar_proceso():
+    # Con 'spawn' (macOS/Windows) el hijo arranca sin Django configurado
+    if not django.apps.apps.ready:
+        django.setup()
+    connections.close_all()
+
+
+def _exportar(idperfil, directorio, motor):
+    """Arma el CV de un perfil en un proceso del pool y lo escribe de forma atómica."""
+    perfil = DatosPersonales.objects.get(pk=idperfil)
+    destino = os.path.join(directorio, nombre_archivo(perfil.pk, perfil.apellidos))
+    etapas = {}
+    inicio = time.perf_counter()
+    resultado = construir_cv(perfil, secciones_solicitadas(perfil, TODAS_LAS_SECCIONES), motor, etapas)
+    temporal = f'{destino}.{os.getpid()}.tmp'
+    try:
+        with open(temporal, 'wb') as f:
+            shutil.copyfileobj(resultado.archivo, f)
+        os.replace(temporal, destino)
+    finally:
+        resultado.archivo.close()
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    return {
+        'idperfil': perfil.pk,
+        'archivo': os.path.basename(destino),
+        'segundos': round(time.perf_counter() - inicio, 3),
+        'tamano_bytes': resultado.tamano,
+        'certificados_fallidos': len(resultado.fallidos),
+        'etapas_ms': {nombre: round(s * 1000, 1) for nombre, s in etapas.items()},
+    }
+
+
+class Command(BaseCommand):
+    help = ("Exporta a disco el CV en PDF de todos los perfiles (o de los indicados) con un pool "
+            "de procesos. Si se interrumpe, al volver a correrlo continúa con los que faltan.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--salida', default='exportacion-cvs', help="Directorio donde se escriben los PDF.")
+        parser.add_argument('--ids', type=int, nargs='+', help="Solo estos idperfil.")
+        parser.add_argument('--solo-activos', action='store_true', help="Solo perfiles con perfilactivo=1.")
+        parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--motor', choices=MOTORES, default=None, help="Por defecto PDF_MOTOR.")
+        parser.add_argument('--forzar', action='store_true', help="Vuelve a generar los PDF que ya existen.")
+        parser.add_argument('--zip', default=None, help="Además empaqueta los PDF en este archivo ZIP.")
+
+    def handle(self, *args, **options):
+        directorio = options['salida']
+        os.makedirs(directorio, exist_ok=True)
+        motor = options['motor'] or settings.PDF_MOTOR
+
+        perfiles = DatosPersonales.objects.order_by('pk')
+        if options['ids']:
+            perfiles = perfiles.filter(pk__in=options['ids'])
+        if options['solo_activos']:
+            perfiles = perfiles.filter(perfilactivo=1)
+        perfiles = list(perfiles.values_list('pk', 'apellidos'))
+        if not perfiles:
+            raise CommandError("No hay perfiles que exportar.")
+
+        # Reanudación: los PDF ya escritos se saltan (solo existen si se terminaron de escribir)
+        pendientes = [
+            pk for pk, apellidos in perfiles
+            if options['forzar'] or not os.path.exists(os.path.join(directorio, nombre_archivo(pk, apellidos)))
+        ]
+        self.stdout.write(f"{len(perfiles)} perfil(es), {len(perfiles) - len(pendientes)} ya exportado(s), "
+                          f"{len(pendientes)} pendiente(s) con {options['procesos']} proceso(s).")
+
+        manifiesto = os.path.join(directorio, 'manifiesto.jsonl')
+        tiempos, errores = [], 0
+        inicio = time.perf_counter()
+        if pendientes:
+            # Las conexiones abiertas no deben heredarse en los procesos hijos
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['procesos'], initializer=_inicializar_proceso) as pool, \
+                    open(manifiesto, 'a', encoding='utf-8') as registro:
+                futuros = {pool.submit(_exportar, pk, directorio, motor): pk for pk in pendientes}
+                for n, futuro in enumerate(as_completed(futuros), start=1):
+                    pk = futuros[futuro]
+                    try:
+                        datos = futuro.result()
+                    except Exception as e:  # Un perfil con problemas no detiene el lote
+                        errores += 1
+                        self.stdout.write(self.style.ERROR(f"[{n}/{len(pendientes)}] perfil {pk}: {e}"))
+                        continue
+                    datos['fecha'] = datetime.now().isoformat(timespec='seconds')
+                    registro.write(json.dumps(datos, ensure_ascii=False) + '\n')
+                    registro.flush()
+                    tiempos.append(datos['segundos'])
+                    self.stdout.write(
+                        f"[{n}/{len(pendientes)}] perfil {pk}: {datos['segundos']:.2f}s  "
+                        f"{datos['tamano_bytes'] / 1024:.1f} KiB  {datos['archivo']}"
+                    )
+
+        if options['zip']:
+            self._empaquetar(directorio, perfiles, options['zip'])
+
+        if tiempos:
+            self.stdout.write(
+                f"Tiempo por perfil: media {sum(tiempos) / len(tiempos):.2f}s, máximo {max(tiempos):.2f}s; "
+                f"total {time.perf_counter() - inicio:.1f}s. Detalle en {manifiesto}"
+            )
+        estilo = self.style.ERROR if errores else self.style.SUCCESS
+        self.stdout.write(estilo(f"{len(tiempos)} exportado(s), {errores} con error."))
+
+    def _empaquetar(self, directorio, perfiles, destino):
+        # Los PDF ya van comprimidos: se guardan sin volver a comprimir
+        temporal = destino + '.tmp'
+        with zipfile.ZipFile(temporal, 'w', compression=zipfile.ZIP_STORED) as zf:
+            for pk, apellidos in perfiles:
+                nombre = nombre_archivo(pk, apellidos)
+                ruta = os.path.join(directorio, nombre)
+                if os.path.exists(ruta):
+                    zf.write(ruta, nombre)
+        os.replace(temporal, destino)
+        self.stdout.write(f"ZIP escrito en {destino}")
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from perfil.activo import perfil_activo
+from perfil.reportes import MOTORES
+from perfil import sitio_estatico
+
+
+class Command(BaseCommand):
+    help = ("Genera la copia estática del sitio público (páginas y PDF de las combinaciones "
+            "frecuentes del modal) en SITIO_ESTATICO_DIR para que la sirva WhiteNoise.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solo-html', action='store_true', help="No genera los PDF (conserva los publicados).")
+        parser.add_argument('--solo-pdf', action='store_true', help="No vuelve a generar las páginas (conserva las publicadas).")
+        parser.add_argument('--motor', choices=MOTORES, default=settings.PDF_MOTOR)
+
+    def handle(self, *args, **options):
+        if not settings.SITIO_ESTATICO:
+            self.stdout.write(self.style.WARNING(
+                "SITIO_ESTATICO no está activo (o está el modo asíncrono): se genera la copia, "
+                "pero WhiteNoise no la servirá."
+            ))
+        perfil = perfil_activo()
+        if perfil is None:
+            raise CommandError("No hay perfiles creados.")
+
+        nombres = [] if options['solo_pdf'] else None
+        resultado = sitio_estatico.exportar(nombres, pdfs=not options['solo_html'], motor=options['motor'])
+        if resultado is None:
+            raise CommandError("El perfil cambió durante la exportación; vuelve a ejecutar el comando.")
+        escritas, escritos = resultado
+
+        if not options['solo_pdf']:
+            dinamicas = [nombre for nombre in sitio_estatico.PAGINAS if nombre not in escritas]
+            self.stdout.write(self.style.SUCCESS(f"{len(escritas)} páginas exportadas: {', '.join(escritas)}"))
+            if dinamicas:
+                self.stdout.write(f"Quedan dinámicas (más de una página o no disponibles): {', '.join(dinamicas)}")
+
+        if not options['solo_html']:
+            total = len(sitio_estatico.combinaciones_pdf(perfil))
+            self.stdout.write(self.style.SUCCESS(
+                f"{len(escritos)} PDF nuevos de {total} combinaciones (versión {perfil.version_contenido})."
+            ))
+            if len(escritos) < total:
+                self.stdout.write("Los que faltan ya existían o tienen certificados fallidos; se arman al pedirlos.")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from perfil.fotos import borrar_variantes, generar_variantes, nombres_variantes
+from perfil.models import VentaGarage
+
+
+class Command(BaseCommand):
+    help = ("Genera las variantes reducidas (WebP y JPEG) de las fotos del garage subidas antes "
+            "de que existieran o, con --todas, de todas las fotos.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todas', action='store_true', help="Regenera también las que ya tienen variantes.")
+
+    def handle(self, *args, **options):
+        filas = VentaGarage.objects.exclude(fotoproducto='').exclude(fotoproducto__isnull=True)
+        if not options['todas']:
+            filas = filas.filter(fotoproducto_variantes={})
+        for fila in filas.iterator():
+            anteriores = nombres_variantes(fila.fotoproducto_variantes)
+            error = generar_variantes(fila)
+            fila.save(update_fields=['fotoproducto_variantes'])
+            borrar_variantes(fila.fotoproducto.storage, anteriores - nombres_variantes(fila.fotoproducto_variantes))
+            if error:
+                self.stdout.write(self.style.WARNING(f"{fila.pk}: {error}"))
+            else:
+                anchos = ', '.join(str(v['ancho']) for v in fila.fotoproducto_variantes['variantes'])
+                self.stdout.write(f"{fila.pk}: {fila.fotoproducto.name} -> {anchos} px")
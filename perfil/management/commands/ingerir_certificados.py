@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from perfil.ingesta import CAMPOS_METADATOS, ingerir_certificado
+from perfil.models import ExperienciaLaboral, CursosRealizados, Reconocimientos
+
+
+class Command(BaseCommand):
+    help = ("Pasa por la ingesta los certificados subidos antes de que existiera "
+            "(los que no tienen metadatos) o, con --todos, todos los certificados.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todos', action='store_true', help="Reprocesa también los ya ingeridos.")
+
+    def handle(self, *args, **options):
+        for modelo in (ExperienciaLaboral, CursosRealizados, Reconocimientos):
+            filas = modelo.objects.exclude(rutacertificado='').exclude(rutacertificado__isnull=True)
+            if not options['todos']:
+                filas = filas.filter(certificado_valido__isnull=True)
+            for fila in filas.iterator():
+                archivo = fila.rutacertificado
+                nombre_anterior, almacenamiento = archivo.name, archivo.storage
+                try:
+                    error = ingerir_certificado(fila)
+                except OSError as e:
+                    self.stdout.write(self.style.ERROR(f"{modelo.__name__} {fila.pk}: no se pudo leer {nombre_anterior} ({e})"))
+                    continue
+                fila.save(update_fields=('rutacertificado',) + CAMPOS_METADATOS)
+                # El archivo normalizado se sube con otro nombre: el original ya no se usa
+                if fila.rutacertificado.name != nombre_anterior:
+                    almacenamiento.delete(nombre_anterior)
+                if error:
+                    self.stdout.write(self.style.WARNING(f"{modelo.__name__} {fila.pk}: {error}"))
+                else:
+                    self.stdout.write(f"{modelo.__name__} {fila.pk}: {fila.certificado_paginas} página(s), {fila.certificado_bytes} bytes")
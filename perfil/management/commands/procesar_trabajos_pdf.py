@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from perfil import trabajos
+
+
+class Command(BaseCommand):
+    help = "Worker local que genera los PDF encolados desde el modal (modo asíncrono)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true', help="Procesa lo pendiente y termina.")
+        parser.add_argument('--intervalo', type=float, default=1.0, help="Segundos de espera cuando la cola está vacía.")
+        parser.add_argument('--rescatar-minutos', type=int, default=15, help="Reencola trabajos 'procesando' más viejos que esto.")
+        parser.add_argument('--retener-horas', type=int, default=24, help="Borra trabajos terminados más viejos que esto.")
+
+    def handle(self, *args, **options):
+        rescatados = trabajos.rescatar_abandonados(options['rescatar_minutos'])
+        if rescatados:
+            self.stdout.write(f"{rescatados} trabajo(s) abandonado(s) vuelven a la cola.")
+        ultima_limpieza = 0
+        while True:
+            if time.monotonic() - ultima_limpieza > 600:
+                trabajos.limpiar_antiguos(options['retener_horas'])
+                ultima_limpieza = time.monotonic()
+
+            trabajo = trabajos.reclamar_siguiente()
+            if trabajo is None:
+                if options['una_vez']:
+                    return
+                time.sleep(options['intervalo'])
+                continue
+
+            inicio = time.monotonic()
+            trabajos.procesar(trabajo)
+            estilo = self.style.SUCCESS if trabajo.estado == 'listo' else self.style.ERROR
+            self.stdout.write(estilo(f"{trabajo.token} {trabajo.estado} en {time.monotonic() - inicio:.2f}s"))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from perfil.busqueda import reconstruir
+
+
+class Command(BaseCommand):
+    help = ("Vuelve a llenar el índice de búsqueda desde las secciones. Hace falta tras cargas "
+            "masivas que no disparan señales (bulk_create, update, loaddata).")
+
+    def handle(self, *args, **options):
+        total = reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"{total} filas indexadas."))
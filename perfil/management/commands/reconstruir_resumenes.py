@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from perfil.resumen import reconstruir
+
+
+class Command(BaseCommand):
+    help = ("Recalcula los totales de cada perfil (ResumenPerfil) desde las secciones. Hace falta tras "
+            "cargas masivas que no disparan señales (bulk_create, update, loaddata).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--perfil', type=int, help="Solo el perfil con este id.")
+
+    def handle(self, *args, **options):
+        total = reconstruir(idperfil=options['perfil'])
+        self.stdout.write(self.style.SUCCESS(f"{total} resúmenes recalculados."))
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+
+from perfil.models import (
+    ExperienciaLaboral, CursosRealizados, Reconocimientos,
+    ProductosAcademicos, ProductosLaborales, VentaGarage
+)
+from perfil.paginacion import ORDEN_SECCIONES, codificar_cursor, consulta_pagina, visibles
+from perfil.sintetico import crear_perfil_sintetico
+
+MODELOS = (ExperienciaLaboral, CursosRealizados, Reconocimientos, ProductosAcademicos, ProductosLaborales, VentaGarage)
+
+# Señales de que el plan recorre la tabla entera u ordena aparte en vez de usar el índice
+SENALES_MALAS = ('Seq Scan', 'Sort', 'USE TEMP B-TREE')
+
+
+class Command(BaseCommand):
+    help = ("Llena las tablas de secciones con datos sintéticos (dentro de una transacción que se "
+            "revierte) y comprueba con EXPLAIN que las consultas de las secciones usan sus índices.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--perfiles', type=int, default=50)
+        parser.add_argument('--filas', type=int, default=400, help="Filas por sección y perfil.")
+
+    def handle(self, *args, **options):
+        fallos = []
+        with transaction.atomic():
+            perfiles = [
+                crear_perfil_sintetico({modelo: options['filas'] for modelo in MODELOS})
+                for _ in range(options['perfiles'])
+            ]
+            for modelo in MODELOS:
+                # Una de cada cuatro filas oculta, como en un perfil real
+                pk = modelo._meta.pk.name
+                modelo.objects.annotate(resto=F(pk) % 4).filter(resto=0).update(activarparaqueseveaenfront=False)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            perfil = perfiles[len(perfiles) // 2]
+            tamano = settings.SECCIONES_POR_PAGINA
+            for modelo in MODELOS:
+                indice = modelo._meta.indexes[0].name
+                orden = ORDEN_SECCIONES[modelo]
+                # Las consultas de las vistas: la primera página y una del medio (con cursor)
+                medio = visibles(modelo, perfil).order_by(*orden)[options['filas'] // 3]
+                cursor = codificar_cursor(getattr(medio, campo.lstrip('-')) for campo in orden)
+                for pagina, cursor in (('primera página', None), ('con cursor', cursor)):
+                    plan = consulta_pagina(visibles(modelo, perfil), orden, cursor)[:tamano + 1].explain()
+                    correcto = indice in plan and not any(senal in plan for senal in SENALES_MALAS)
+                    estilo = self.style.SUCCESS if correcto else self.style.ERROR
+                    self.stdout.write(estilo(f"{modelo.__name__} ({pagina}): {'usa ' + indice if correcto else 'NO usa ' + indice}"))
+                    self.stdout.write(f"    {plan.replace(chr(10), chr(10) + '    ')}")
+                    if not correcto:
+                        fallos.append(f'{modelo.__name__} ({pagina})')
+            transaction.set_rollback(True)
+
+        if fallos:
+            raise CommandError(f"Consultas sin índice: {', '.join(fallos)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Las {len(MODELOS)} secciones usan su índice con {options['perfiles'] * options['filas']} filas por tabla."
+        ))
@@ -0,0 +1,63 @@
+"""
+WhiteNoise con la copia estática del sitio (sitio_estatico.py). En vez de WHITENOISE_AUTOREFRESH,
+que recorre el disco en cada petición y no marca nada como inmutable, el índice de la copia
+se rehace solo cuando cambia la generación publicada: por petición cuesta un stat del puntero.
+El índice va aparte del de STATIC_ROOT, así que funciona igual con o sin autorefresh (DEBUG).
+También se rehace al cambiar el día, para dejar de servir las páginas de otra fecha (PAGINAS_DEL_DIA).
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.utils import timezone
+from whitenoise.base import scantree
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import sitio_estatico
+
+
+class SitioEstaticoMiddleware(WhiteNoiseMiddleware):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._sitio = {}  # URL -> StaticFile de la generación publicada
+        self._marca = None
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        if settings.SITIO_ESTATICO:
+            self._actualizar_indice()
+            static_file = self._sitio.get(request.path_info)
+            if static_file is not None:
+                return self.serve(static_file, request)
+        return super().__call__(request)
+
+    def _actualizar_indice(self):
+        marca = (sitio_estatico.marca(), timezone.localdate())
+        if marca == self._marca:
+            return
+        with self._lock:
+            if marca == self._marca:
+                return
+            generacion = sitio_estatico.generacion_actual()
+            sitio = self._indexar(generacion) if generacion and os.path.isdir(generacion) else {}
+            for url in sitio_estatico.urls_vencidas():
+                sitio.pop(url, None)
+            self._sitio = sitio
+            self._marca = marca
+
+    def _indexar(self, generacion):
+        """Cada página se atiende en su URL con barra final ('/experiencia/' -> experiencia/index.html)."""
+        raiz = os.path.join(generacion, '')
+        stat_cache = dict(scantree(raiz))
+        archivos = {}
+        for ruta in stat_cache:
+            url = '/' + ruta[len(raiz):].replace(os.sep, '/')
+            if url.endswith('/index.html'):
+                url = url[:-len('index.html')]
+            archivos[url] = self.get_static_file(ruta, url, stat_cache=stat_cache)
+        return archivos
+
+    def immutable_file_test(self, path, url):
+        # Los PDF exportados llevan la versión del contenido en la ruta
+        return url.startswith('/cv/') or super().immutable_file_test(path, url)
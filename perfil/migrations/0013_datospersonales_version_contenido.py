@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perfil', '0012_datospersonales_ver_cursos_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datospersonales',
+            name='version_contenido',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Versión del Contenido'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 15:58
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perfil', '0013_datospersonales_version_contenido'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoPDF',
+            fields=[
+                ('idtrabajo', models.AutoField(primary_key=True, serialize=False)),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='Token')),
+                ('secciones', models.CharField(blank=True, max_length=30, verbose_name='Secciones')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('listo', 'Listo'), ('error', 'Error')], default='pendiente', max_length=10, verbose_name='Estado')),
+                ('rutaarchivo', models.CharField(blank=True, max_length=255, verbose_name='Archivo generado')),
+                ('error', models.CharField(blank=True, max_length=250, verbose_name='Error')),
+                ('fechacreacion', models.DateTimeField(auto_now_add=True, verbose_name='Creado')),
+                ('fechainicio', models.DateTimeField(blank=True, null=True, verbose_name='Inicio')),
+                ('fechafin', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('idperfil', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='perfil.datospersonales', verbose_name='Perfil')),
+            ],
+            options={
+                'verbose_name': 'Trabajo PDF',
+                'verbose_name_plural': '8. Trabajos PDF',
+                'ordering': ['fechacreacion'],
+                'indexes': [models.Index(fields=['estado', 'fechacreacion'], name='trabajopdf_estado_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 6.0 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perfil', '0014_trabajopdf'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cursosrealizados',
+            name='certificado_bytes',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Tamaño del certificado (bytes)'),
+        ),
+        migrations.AddField(
+            model_name='cursosrealizados',
+            name='certificado_paginas',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Páginas del certificado'),
+        ),
+        migrations.AddField(
+            model_name='cursosrealizados',
+            name='certificado_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Hash del certificado'),
+        ),
+        migrations.AddField(
+            model_name='cursosrealizados',
+            name='certificado_valido',
+            field=models.BooleanField(editable=False, null=True, verbose_name='Certificado válido'),
+        ),
+        migrations.AddField(
+            model_name='experiencialaboral',
+            name='certificado_bytes',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Tamaño del certificado (bytes)'),
+        ),
+        migrations.AddField(
+            model_name='experiencialaboral',
+            name='certificado_paginas',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Páginas del certificado'),
+        ),
+        migrations.AddField(
+            model_name='experiencialaboral',
+            name='certificado_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Hash del certificado'),
+        ),
+        migrations.AddField(
+            model_name='experiencialaboral',
+            name='certificado_valido',
+            field=models.BooleanField(editable=False, null=True, verbose_name='Certificado válido'),
+        ),
+        migrations.AddField(
+            model_name='reconocimientos',
+            name='certificado_bytes',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Tamaño del certificado (bytes)'),
+        ),
+        migrations.AddField(
+            model_name='reconocimientos',
+            name='certificado_paginas',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Páginas del certificado'),
+        ),
+        migrations.AddField(
+            model_name='reconocimientos',
+            name='certificado_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Hash del certificado'),
+        ),
+        migrations.AddField(
+            model_name='reconocimientos',
+            name='certificado_valido',
+            field=models.BooleanField(editable=False, null=True, verbose_name='Certificado válido'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-18 16:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perfil', '0015_certificado_metadatos'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cursosrealizados',
+            index=models.Index(condition=models.Q(('activarparaqueseveaenfront', True)), fields=['idperfil', '-fechainicio', '-idcursorealizado'], name='cursos_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='experiencialaboral',
+            index=models.Index(condition=models.Q(('activarparaqueseveaenfront', True)), fields=['idperfil', '-fechainiciogestion', '-idexperiencialaboral'], name='experiencia_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productosacademicos',
+            index=models.Index(condition=models.Q(('activarparaqueseveaenfront', True)), fields=['idperfil', 'idproductoacademico'], name='prodacademicos_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productoslaborales',
+            index=models.Index(condition=models.Q(('activarparaqueseveaenfront', True)), fields=['idperfil', '-fechaproducto', '-idproductoslaborales'], name='prodlaborales_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reconocimientos',
+            index=models.Index(condition=models.Q(('activarparaqueseveaenfront', True)), fields=['idperfil', '-fechareconocimiento', '-idreconocimiento'], name='reconocimientos_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ventagarage',
+            index=models.Index(condition=models.Q(('activarparaqueseveaenfront', True)), fields=['idperfil', '-fechapublicacion', '-idventagarage'], name='garage_visible_idx'),
+        ),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 6.0 on 2026-10-18 16:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# El índice de texto depende del motor: tsvector + GIN en PostgreSQL, FTS5 en SQLite
+POSTGRESQL = [
+    """ALTER TABLE perfil_indicebusqueda ADD COLUMN vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('spanish', coalesce(titulo, '')), 'A') ||
+        setweight(to_tsvector('spanish', coalesce(texto, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX indicebusqueda_vector_idx ON perfil_indicebusqueda USING GIN (vector)",
+]
+SQLITE = [
+    """CREATE VIRTUAL TABLE perfil_indicebusqueda_fts USING fts5(
+        titulo, texto, content='perfil_indicebusqueda', content_rowid='idindice',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER perfil_indicebusqueda_ai AFTER INSERT ON perfil_indicebusqueda BEGIN
+        INSERT INTO perfil_indicebusqueda_fts(rowid, titulo, texto) VALUES (new.idindice, new.titulo, new.texto);
+    END""",
+    """CREATE TRIGGER perfil_indicebusqueda_ad AFTER DELETE ON perfil_indicebusqueda BEGIN
+        INSERT INTO perfil_indicebusqueda_fts(perfil_indicebusqueda_fts, rowid, titulo, texto)
+        VALUES ('delete', old.idindice, old.titulo, old.texto);
+    END""",
+    """CREATE TRIGGER perfil_indicebusqueda_au AFTER UPDATE ON perfil_indicebusqueda BEGIN
+        INSERT INTO perfil_indicebusqueda_fts(perfil_indicebusqueda_fts, rowid, titulo, texto)
+        VALUES ('delete', old.idindice, old.titulo, old.texto);
+        INSERT INTO perfil_indicebusqueda_fts(rowid, titulo, texto) VALUES (new.idindice, new.titulo, new.texto);
+    END""",
+]
+SQLITE_REVERSO = [
+    "DROP TRIGGER IF EXISTS perfil_indicebusqueda_ai",
+    "DROP TRIGGER IF EXISTS perfil_indicebusqueda_ad",
+    "DROP TRIGGER IF EXISTS perfil_indicebusqueda_au",
+    "DROP TABLE IF EXISTS perfil_indicebusqueda_fts",
+]
+
+
+def crear_indice_texto(apps, schema_editor):
+    sentencias = {'postgresql': POSTGRESQL, 'sqlite': SQLITE}.get(schema_editor.connection.vendor, [])
+    for sql in sentencias:
+        schema_editor.execute(sql)
+
+
+def borrar_indice_texto(apps, schema_editor):
+    # En PostgreSQL la columna y su índice se van con la tabla
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_REVERSO:
+            schema_editor.execute(sql)
+
+
+# Copia de perfil.busqueda.FUENTES al momento de esta migración: importar el módulo vivo
+# arrastraría reportes (xhtml2pdf, pypdf) y los cambios futuros a sus campos
+FUENTES = {
+    'ExperienciaLaboral': ('exp', ('cargodesempenado', 'nombrempresa'), ('descripcionfunciones', 'lugarempresa')),
+    'CursosRealizados': ('cur', ('nombrecurso',), ('descripcioncurso', 'entidadpatrocinadora')),
+    'Reconocimientos': ('rec', ('tiporeconocimiento',), ('descripcionreconocimiento', 'entidadpatrocinadora')),
+    'ProductosAcademicos': ('aca', ('nombrerecurso',), ('descripcion', 'clasificador')),
+    'ProductosLaborales': ('lab', ('nombreproducto',), ('descripcion',)),
+    'VentaGarage': ('gar', ('nombreproducto',), ('descripcion', 'estadoproducto')),
+}
+
+
+def _unir(fila, campos):
+    return ' '.join(str(getattr(fila, campo) or '') for campo in campos).strip()
+
+
+def llenar_indice(apps, schema_editor):
+    IndiceBusqueda = apps.get_model('perfil', 'IndiceBusqueda')
+    for nombre, (codigo, titulo, texto) in FUENTES.items():
+        filas = apps.get_model('perfil', nombre).objects.filter(activarparaqueseveaenfront=True)
+        IndiceBusqueda.objects.bulk_create(
+            (IndiceBusqueda(
+                idperfil_id=fila.idperfil_id, seccion=codigo, idobjeto=fila.pk,
+                titulo=_unir(fila, titulo)[:255], texto=_unir(fila, texto),
+            ) for fila in filas.iterator()),
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perfil', '0016_indices_secciones_visibles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceBusqueda',
+            fields=[
+                ('idindice', models.AutoField(primary_key=True, serialize=False)),
+                ('seccion', models.CharField(max_length=3, verbose_name='Sección')),
+                ('idobjeto', models.PositiveIntegerField(verbose_name='Id de la fila')),
+                ('titulo', models.CharField(max_length=255, verbose_name='Título')),
+                ('texto', models.TextField(verbose_name='Texto')),
+                ('idperfil', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='perfil.datospersonales', verbose_name='Perfil')),
+            ],
+            options={
+                'verbose_name': 'Índice de búsqueda',
+                'verbose_name_plural': 'Índice de búsqueda',
+                'constraints': [models.UniqueConstraint(fields=('seccion', 'idobjeto'), name='indicebusqueda_fila_unica')],
+            },
+        ),
+        migrations.RunPython(crear_indice_texto, borrar_indice_texto),
+        migrations.RunPython(llenar_indice, migrations.RunPython.noop),
+    ]
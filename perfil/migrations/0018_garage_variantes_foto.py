@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perfil', '0017_indice_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ventagarage',
+            name='fotoproducto_variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Variantes de la foto'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-18 16:22
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+# Copia de perfil.models.slug_disponible al momento de esta migración (sin importar el módulo vivo)
+def slug_disponible(queryset, texto):
+    base = slugify(texto)[:70] or 'perfil'
+    usados = set(queryset.filter(slug__startswith=base).values_list('slug', flat=True))
+    slug, n = base, 2
+    while slug in usados:
+        slug, n = f'{base}-{n}', n + 1
+    return slug
+
+
+def llenar_slugs(apps, schema_editor):
+    DatosPersonales = apps.get_model('perfil', 'DatosPersonales')
+    for perfil in DatosPersonales.objects.order_by('idperfil'):
+        perfil.slug = slug_disponible(DatosPersonales.objects.exclude(pk=perfil.pk), f"{perfil.nombres} {perfil.apellidos}")
+        perfil.save(update_fields=['slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perfil', '0018_garage_variantes_foto'),
+    ]
+
+    operations = [
+        # Primero sin unique: los perfiles existentes se llenan antes de crear el índice
+        migrations.AddField(
+            model_name='datospersonales',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=80, db_index=False, verbose_name='Dirección (slug)'),
+        ),
+        migrations.RunPython(llenar_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='datospersonales',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=80, unique=True, verbose_name='Dirección (slug)'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 6.0 on 2026-10-18 16:27
+
+from collections import Counter
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copia de los aportes de perfil.resumen al momento de esta migración (sin importar el módulo vivo)
+TIPOS_RECONOCIMIENTO = {
+    'Académico': 'reconocimientos_academicos',
+    'Público': 'reconocimientos_publicos',
+    'Privado': 'reconocimientos_privados',
+}
+
+
+def _experiencia(fila):
+    if fila.fechafingestion:
+        dias = max(0, (fila.fechafingestion - fila.fechainiciogestion).days)
+        return {'experiencias': 1, 'dias_experiencia_cerrada': dias}
+    return {'experiencias': 1, 'experiencias_abiertas': 1, 'inicio_abiertas': fila.fechainiciogestion.toordinal()}
+
+
+def _reconocimiento(fila):
+    campo = TIPOS_RECONOCIMIENTO.get(fila.tiporeconocimiento)
+    return {campo: 1} if campo else {}
+
+
+APORTES = {
+    'ExperienciaLaboral': _experiencia,
+    'CursosRealizados': lambda fila: {'cursos': 1, 'horas_cursos': fila.totalhoras or 0},
+    'Reconocimientos': _reconocimiento,
+    'ProductosAcademicos': lambda fila: {'productos_academicos': 1},
+    'ProductosLaborales': lambda fila: {'productos_laborales': 1},
+    'VentaGarage': lambda fila: {'articulos_garage': 1, 'valor_garage': Decimal(fila.valordelbien or 0)},
+}
+
+
+def llenar_resumenes(apps, schema_editor):
+    DatosPersonales = apps.get_model('perfil', 'DatosPersonales')
+    ResumenPerfil = apps.get_model('perfil', 'ResumenPerfil')
+    sumas = {pk: Counter() for pk in DatosPersonales.objects.values_list('pk', flat=True)}
+    for nombre, calcular in APORTES.items():
+        for fila in apps.get_model('perfil', nombre).objects.filter(activarparaqueseveaenfront=True).iterator():
+            sumas[fila.idperfil_id].update(calcular(fila))
+    campos = [campo.name for campo in ResumenPerfil._meta.concrete_fields if not campo.primary_key]
+    ResumenPerfil.objects.bulk_create(
+        (ResumenPerfil(idperfil_id=pk, **{campo: total.get(campo, 0) for campo in campos}) for pk, total in sumas.items()),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perfil', '0019_datospersonales_slug'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenPerfil',
+            fields=[
+                ('idperfil', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumen', serialize=False, to='perfil.datospersonales', verbose_name='Perfil')),
+                ('experiencias', models.IntegerField(default=0, verbose_name='Experiencias')),
+                ('dias_experiencia_cerrada', models.IntegerField(default=0, verbose_name='Días de experiencia terminada')),
+                ('experiencias_abiertas', models.IntegerField(default=0, verbose_name='Experiencias en curso')),
+                ('inicio_abiertas', models.BigIntegerField(default=0, verbose_name='Suma de inicios en curso (ordinal)')),
+                ('cursos', models.IntegerField(default=0, verbose_name='Cursos')),
+                ('horas_cursos', models.IntegerField(default=0, verbose_name='Horas de cursos')),
+                ('reconocimientos_academicos', models.IntegerField(default=0, verbose_name='Reconocimientos académicos')),
+                ('reconocimientos_publicos', models.IntegerField(default=0, verbose_name='Reconocimientos públicos')),
+                ('reconocimientos_privados', models.IntegerField(default=0, verbose_name='Reconocimientos privados')),
+                ('productos_academicos', models.IntegerField(default=0, verbose_name='Productos académicos')),
+                ('productos_laborales', models.IntegerField(default=0, verbose_name='Productos laborales')),
+                ('articulos_garage', models.IntegerField(default=0, verbose_name='Artículos del garage')),
+                ('valor_garage', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Valor del garage ($)')),
+            ],
+            options={
+                'verbose_name': 'Resumen del perfil',
+                'verbose_name_plural': 'Resúmenes de perfiles',
+            },
+        ),
+        migrations.RunPython(llenar_resumenes, migrations.RunPython.noop),
+    ]
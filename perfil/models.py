@@ -1,12 +1,18 @@
+import uuid
 from django.db import models
+from django.db.models import Q
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.core.exceptions import ValidationError
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.text import slugify
 
 class DatosPersonales(models.Model):
     SEXO_CHOICES = [('H', 'Hombre'), ('M', 'Mujer')]
 
     idperfil = models.AutoField(primary_key=True)
+    # Dirección pública del perfil: /p/<slug>/ (se genera con nombres y apellidos si se deja vacía)
+    slug = models.SlugField(max_length=80, unique=True, blank=True, verbose_name="Dirección (slug)")
     descripcionperfil = models.CharField(max_length=200, null=True, blank=True, verbose_name="Descripción del Perfil")
     perfilactivo = models.IntegerField(
         default=1,
@@ -39,6 +45,9 @@ class DatosPersonales(models.Model):
     ver_productos_laborales = models.BooleanField(default=True, verbose_name="¿Mostrar Prod. Laborales en la Web?")
     ver_garage = models.BooleanField(default=True, verbose_name="¿Mostrar Garage en la Web?")
 
+    # Marca (microsegundos) que cambia al guardar el perfil o cualquiera de sus secciones; ver signals.py
+    version_contenido = models.BigIntegerField(default=0, editable=False, verbose_name="Versión del Contenido")
+
     class Meta:
         verbose_name = "Dato Personal"
         verbose_name_plural = "1. Datos Personales"
@@ -47,9 +56,27 @@ class DatosPersonales(models.Model):
         if self.fechanacimiento and self.fechanacimiento > timezone.now().date():
             raise ValidationError({'fechanacimiento': "La fecha de nacimiento no puede ser una fecha futura."})
 
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = slug_disponible(DatosPersonales.objects.exclude(pk=self.pk), f"{self.nombres} {self.apellidos}")
+        super().save(*args, **kwargs)
+
+    def get_absolute_url(self):
+        return reverse('home', kwargs={'slug': self.slug})
+
     def __str__(self):
         return f"{self.nombres} {self.apellidos}"
 
+
+def slug_disponible(queryset, texto):
+    """slugify(texto), con -2, -3... si otro perfil de 'queryset' ya lo usa."""
+    base = slugify(texto)[:70] or 'perfil'
+    usados = set(queryset.filter(slug__startswith=base).values_list('slug', flat=True))
+    slug, n = base, 2
+    while slug in usados:
+        slug, n = f'{base}-{n}', n + 1
+    return slug
+
 class ExperienciaLaboral(models.Model):
     idexperiencialaboral = models.AutoField(primary_key=True)
     idperfil = models.ForeignKey(DatosPersonales, on_delete=models.CASCADE, db_column='idperfilconqueestaactivo', verbose_name="Perfil")
@@ -66,11 +93,21 @@ class ExperienciaLaboral(models.Model):
     activarparaqueseveaenfront = models.BooleanField(default=True, verbose_name="Mostrar en la Web")
     rutacertificado = models.FileField(upload_to='certificados/experiencia/', null=True, blank=True, verbose_name="Subir Certificado Laboral")
     url_certificado_externo = models.URLField(max_length=500, null=True, blank=True, verbose_name="Link del Certificado")
+    # Metadatos que llena la ingesta al subir el archivo (ver ingesta.py); None = sin procesar
+    certificado_valido = models.BooleanField(null=True, editable=False, verbose_name="Certificado válido")
+    certificado_paginas = models.PositiveIntegerField(null=True, editable=False, verbose_name="Páginas del certificado")
+    certificado_bytes = models.PositiveIntegerField(null=True, editable=False, verbose_name="Tamaño del certificado (bytes)")
+    certificado_sha256 = models.CharField(max_length=64, blank=True, editable=False, verbose_name="Hash del certificado")
 
     class Meta:
         verbose_name = "Experiencia Laboral"
         verbose_name_plural = "2. Experiencia Laboral"
         ordering = ['-fechainiciogestion']
+        # Cubre las consultas de las secciones: filas visibles de un perfil en el orden de la Meta
+        # (índice parcial en PostgreSQL/SQLite; en MySQL Django no lo crea)
+        indexes = [
+            models.Index(fields=['idperfil', '-fechainiciogestion', '-idexperiencialaboral'], condition=Q(activarparaqueseveaenfront=True), name='experiencia_visible_idx'),
+        ]
 
     def clean(self):
         hoy = timezone.now().date()
@@ -97,11 +134,19 @@ class CursosRealizados(models.Model):
     activarparaqueseveaenfront = models.BooleanField(default=True, verbose_name="Activo en Web")
     rutacertificado = models.FileField(upload_to='certificados/', null=True, blank=True, verbose_name="Subir Certificado")
     url_certificado_externo = models.URLField(max_length=500, null=True, blank=True, verbose_name="Link del Certificado")
+    # Metadatos que llena la ingesta al subir el archivo (ver ingesta.py); None = sin procesar
+    certificado_valido = models.BooleanField(null=True, editable=False, verbose_name="Certificado válido")
+    certificado_paginas = models.PositiveIntegerField(null=True, editable=False, verbose_name="Páginas del certificado")
+    certificado_bytes = models.PositiveIntegerField(null=True, editable=False, verbose_name="Tamaño del certificado (bytes)")
+    certificado_sha256 = models.CharField(max_length=64, blank=True, editable=False, verbose_name="Hash del certificado")
 
     class Meta:
         verbose_name = "Curso"
         verbose_name_plural = "3. Cursos Realizados"
         ordering = ['-fechainicio']
+        indexes = [
+            models.Index(fields=['idperfil', '-fechainicio', '-idcursorealizado'], condition=Q(activarparaqueseveaenfront=True), name='cursos_visible_idx'),
+        ]
 
     def clean(self):
         hoy = timezone.now().date()
@@ -123,6 +168,9 @@ class ProductosAcademicos(models.Model):
     class Meta:
         verbose_name = "Producto Académico"
         verbose_name_plural = "4. Productos Académicos"
+        indexes = [
+            models.Index(fields=['idperfil', 'idproductoacademico'], condition=Q(activarparaqueseveaenfront=True), name='prodacademicos_visible_idx'),
+        ]
 
 class ProductosLaborales(models.Model):
     idproductoslaborales = models.AutoField(primary_key=True)
@@ -136,6 +184,9 @@ class ProductosLaborales(models.Model):
         verbose_name = "Producto Laboral"
         verbose_name_plural = "5. Productos Laborales"
         ordering = ['-fechaproducto']
+        indexes = [
+            models.Index(fields=['idperfil', '-fechaproducto', '-idproductoslaborales'], condition=Q(activarparaqueseveaenfront=True), name='prodlaborales_visible_idx'),
+        ]
 
     def clean(self):
         if self.fechaproducto > timezone.now().date():
@@ -154,11 +205,19 @@ class Reconocimientos(models.Model):
     activarparaqueseveaenfront = models.BooleanField(default=True, verbose_name="Mostrar en Web")
     rutacertificado = models.FileField(upload_to='reconocimientos/', null=True, blank=True, verbose_name="Archivo del Reconocimiento")
     url_certificado_externo = models.URLField(max_length=500, null=True, blank=True, verbose_name="Link del Certificado")
+    # Metadatos que llena la ingesta al subir el archivo (ver ingesta.py); None = sin procesar
+    certificado_valido = models.BooleanField(null=True, editable=False, verbose_name="Certificado válido")
+    certificado_paginas = models.PositiveIntegerField(null=True, editable=False, verbose_name="Páginas del certificado")
+    certificado_bytes = models.PositiveIntegerField(null=True, editable=False, verbose_name="Tamaño del certificado (bytes)")
+    certificado_sha256 = models.CharField(max_length=64, blank=True, editable=False, verbose_name="Hash del certificado")
 
     class Meta:
         verbose_name = "Reconocimiento"
         verbose_name_plural = "6. Reconocimientos"
         ordering = ['-fechareconocimiento']
+        indexes = [
+            models.Index(fields=['idperfil', '-fechareconocimiento', '-idreconocimiento'], condition=Q(activarparaqueseveaenfront=True), name='reconocimientos_visible_idx'),
+        ]
 
     def clean(self):
         if self.fechareconocimiento > timezone.now().date():
@@ -175,12 +234,111 @@ class VentaGarage(models.Model):
     fechapublicacion = models.DateField(verbose_name="Fecha de Publicación", default=timezone.now)
     activarparaqueseveaenfront = models.BooleanField(default=True, verbose_name="Mostrar en Web")
     fotoproducto = models.ImageField(upload_to='garage/', null=True, blank=True, verbose_name="Foto del Producto")
+    # Medidas del original y variantes reducidas en WebP/JPEG (ver fotos.py)
+    fotoproducto_variantes = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Variantes de la foto")
 
     class Meta:
         verbose_name = "Artículo de Garage"
         verbose_name_plural = "7. Venta de Garage"
         ordering = ['-fechapublicacion']
+        indexes = [
+            models.Index(fields=['idperfil', '-fechapublicacion', '-idventagarage'], condition=Q(activarparaqueseveaenfront=True), name='garage_visible_idx'),
+        ]
 
     def clean(self):
         if self.fechapublicacion and self.fechapublicacion > timezone.now().date():
-            raise ValidationError({'fechapublicacion': "La fecha de publicación no puede ser una fecha futura."})
\ No newline at end of file
+            raise ValidationError({'fechapublicacion': "La fecha de publicación no puede ser una fecha futura."})
+
+    @property
+    def foto_responsive(self):
+        """srcset de WebP y de respaldo, src y medidas para la etiqueta <picture>; None si no hay variantes."""
+        variantes = (self.fotoproducto_variantes or {}).get('variantes')
+        if not self.fotoproducto or not variantes:
+            return None
+        url = self.fotoproducto.storage.url
+        mayor = variantes[-1]
+        return {
+            'webp': ', '.join(f"{url(v['webp'])} {v['ancho']}w" for v in variantes),
+            'respaldo': ', '.join(f"{url(v['respaldo'])} {v['ancho']}w" for v in variantes),
+            'src': url(variantes[min(1, len(variantes) - 1)]['respaldo']),
+            'ancho': mayor['ancho'],
+            'alto': mayor['alto'],
+        }
+
+class TrabajoPDF(models.Model):
+    """Generación del PDF en segundo plano (cola en la base de datos, ver trabajos.py)."""
+    ESTADO_CHOICES = [('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('listo', 'Listo'), ('error', 'Error')]
+    idtrabajo = models.AutoField(primary_key=True)
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False, verbose_name="Token")
+    idperfil = models.ForeignKey(DatosPersonales, on_delete=models.CASCADE, verbose_name="Perfil")
+    secciones = models.CharField(max_length=30, blank=True, verbose_name="Secciones")
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='pendiente', verbose_name="Estado")
+    rutaarchivo = models.CharField(max_length=255, blank=True, verbose_name="Archivo generado")
+    error = models.CharField(max_length=250, blank=True, verbose_name="Error")
+    fechacreacion = models.DateTimeField(auto_now_add=True, verbose_name="Creado")
+    fechainicio = models.DateTimeField(null=True, blank=True, verbose_name="Inicio")
+    fechafin = models.DateTimeField(null=True, blank=True, verbose_name="Fin")
+
+    class Meta:
+        verbose_name = "Trabajo PDF"
+        verbose_name_plural = "8. Trabajos PDF"
+        ordering = ['fechacreacion']
+        indexes = [models.Index(fields=['estado', 'fechacreacion'], name='trabajopdf_estado_idx')]
+
+    def __str__(self):
+        return f"{self.idperfil} [{self.secciones or 'base'}] - {self.estado}"
+
+class IndiceBusqueda(models.Model):
+    """Texto de cada fila visible de las secciones para la búsqueda (se mantiene con señales, ver busqueda.py)."""
+    idindice = models.AutoField(primary_key=True)
+    idperfil = models.ForeignKey(DatosPersonales, on_delete=models.CASCADE, verbose_name="Perfil")
+    seccion = models.CharField(max_length=3, verbose_name="Sección")
+    idobjeto = models.PositiveIntegerField(verbose_name="Id de la fila")
+    titulo = models.CharField(max_length=255, verbose_name="Título")
+    texto = models.TextField(verbose_name="Texto")
+
+    class Meta:
+        verbose_name = "Índice de búsqueda"
+        verbose_name_plural = "Índice de búsqueda"
+        constraints = [models.UniqueConstraint(fields=['seccion', 'idobjeto'], name='indicebusqueda_fila_unica')]
+
+    def __str__(self):
+        return f"{self.seccion}:{self.idobjeto} {self.titulo}"
+
+class ResumenPerfil(models.Model):
+    """Totales de las filas visibles del perfil, mantenidos con sumas y restas por las señales (ver resumen.py)."""
+    idperfil = models.OneToOneField(DatosPersonales, on_delete=models.CASCADE, primary_key=True, related_name='resumen', verbose_name="Perfil")
+    experiencias = models.IntegerField(default=0, verbose_name="Experiencias")
+    # Días de las experiencias terminadas; las abiertas se guardan como cantidad y suma de
+    # fechainiciogestion.toordinal(), y se completan con la fecha de hoy al leer
+    dias_experiencia_cerrada = models.IntegerField(default=0, verbose_name="Días de experiencia terminada")
+    experiencias_abiertas = models.IntegerField(default=0, verbose_name="Experiencias en curso")
+    inicio_abiertas = models.BigIntegerField(default=0, verbose_name="Suma de inicios en curso (ordinal)")
+    cursos = models.IntegerField(default=0, verbose_name="Cursos")
+    horas_cursos = models.IntegerField(default=0, verbose_name="Horas de cursos")
+    reconocimientos_academicos = models.IntegerField(default=0, verbose_name="Reconocimientos académicos")
+    reconocimientos_publicos = models.IntegerField(default=0, verbose_name="Reconocimientos públicos")
+    reconocimientos_privados = models.IntegerField(default=0, verbose_name="Reconocimientos privados")
+    productos_academicos = models.IntegerField(default=0, verbose_name="Productos académicos")
+    productos_laborales = models.IntegerField(default=0, verbose_name="Productos laborales")
+    articulos_garage = models.IntegerField(default=0, verbose_name="Artículos del garage")
+    valor_garage = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Valor del garage ($)")
+
+    class Meta:
+        verbose_name = "Resumen del perfil"
+        verbose_name_plural = "Resúmenes de perfiles"
+
+    def dias_experiencia(self, hoy=None):
+        hoy = hoy or timezone.localdate()
+        return self.dias_experiencia_cerrada + self.experiencias_abiertas * hoy.toordinal() - self.inicio_abiertas
+
+    @property
+    def anios_experiencia(self):
+        return round(self.dias_experiencia() / 365.25, 1)
+
+    @property
+    def reconocimientos(self):
+        return self.reconocimientos_academicos + self.reconocimientos_publicos + self.reconocimientos_privados
+
+    def __str__(self):
+        return f"Resumen de {self.idperfil}"
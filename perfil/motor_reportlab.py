@@ -0,0 +1,164 @@
+"""
+Motor alternativo del PDF: arma la misma hoja de vida que 'reportes/pdf_personales.html'
+directamente con flowables de ReportLab (platypus), sin pasar por HTML/CSS ni xhtml2pdf.
+"""
+from django.template.defaultfilters import date as formato_fecha
+from django.utils.html import escape
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_JUSTIFY
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from reportlab.platypus.flowables import HRFlowable
+
+AZUL = colors.HexColor('#004085')
+GRIS = colors.HexColor('#333333')
+GRIS_CLARO = colors.HexColor('#666666')
+
+ESTILOS = {
+    'nombre': ParagraphStyle('nombre', fontName='Helvetica-Bold', fontSize=26, leading=30, textColor=AZUL),
+    'correo': ParagraphStyle('correo', fontName='Helvetica', fontSize=10, leading=12, textColor=GRIS, spaceBefore=5),
+    'seccion': ParagraphStyle('seccion', fontName='Helvetica-Bold', fontSize=12, leading=14, textColor=AZUL, spaceBefore=25),
+    'titulo': ParagraphStyle('titulo', fontName='Helvetica-Bold', fontSize=11, leading=13, textColor=GRIS, spaceBefore=15),
+    'empresa': ParagraphStyle('empresa', fontName='Helvetica-Bold', fontSize=10, leading=12, textColor=AZUL, spaceBefore=2),
+    'fecha': ParagraphStyle('fecha', fontName='Helvetica-Oblique', fontSize=9, leading=11, textColor=GRIS_CLARO, spaceBefore=2),
+    'texto': ParagraphStyle('texto', fontName='Helvetica', fontSize=10, leading=14, textColor=GRIS, spaceBefore=8, alignment=TA_JUSTIFY),
+    'etiqueta': ParagraphStyle('etiqueta', fontName='Helvetica-Bold', fontSize=9, leading=11, textColor=GRIS),
+    'valor': ParagraphStyle('valor', fontName='Helvetica', fontSize=10, leading=12, textColor=GRIS),
+}
+
+
+def _p(texto, estilo):
+    return Paragraph(escape('' if texto is None else texto), ESTILOS[estilo])
+
+
+def _titulo_seccion(texto):
+    return [_p(texto.upper(), 'seccion'), HRFlowable(width='100%', thickness=1, color=AZUL, spaceBefore=3, spaceAfter=0)]
+
+
+def _entrada(titulo, empresa=None, fecha=None, texto=None):
+    bloque = [_p(titulo, 'titulo')]
+    if empresa:
+        bloque.append(_p(empresa, 'empresa'))
+    if fecha:
+        bloque.append(_p(fecha, 'fecha'))
+    if texto:
+        bloque.append(_p(texto, 'texto'))
+    bloque.append(Spacer(1, 10))
+    return bloque
+
+
+def _encabezado(perfil, ruta_foto):
+    datos = [[_p(f'{perfil.nombres} {perfil.apellidos}'.upper(), 'nombre')], [_p(perfil.correo, 'correo')]]
+    izquierda = Table(datos, colWidths=[13.5 * cm], style=[('LEFTPADDING', (0, 0), (-1, -1), 0)])
+    foto = ''
+    if ruta_foto:
+        foto = Image(ruta_foto, width=75, height=75, kind='proportional')
+        foto.hAlign = 'RIGHT'
+    tabla = Table([[izquierda, foto]], colWidths=['75%', '25%'])
+    tabla.setStyle(TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+        ('LINEBELOW', (0, 0), (-1, 0), 2, AZUL),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+        ('LEFTPADDING', (0, 0), (0, 0), 0),
+    ]))
+    return [tabla, Spacer(1, 20)]
+
+
+def _total(context, codigo):
+    """Línea del resumen bajo el título de la sección (ver resumen.totales)."""
+    total = context.get('resumen', {}).get(codigo)
+    return [_p(f'{total[0]}: {total[1]}', 'texto')] if total else []
+
+
+def _tabla_datos(filas):
+    tabla = Table([[_p(e, 'etiqueta'), _p(v, 'valor')] for e, v in filas], colWidths=['35%', '65%'])
+    tabla.setStyle(TableStyle([
+        ('LEFTPADDING', (0, 0), (-1, -1), 0),
+        ('TOPPADDING', (0, 0), (-1, -1), 4),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]))
+    return [Spacer(1, 10), tabla]
+
+
+def _informacion_personal(perfil):
+    sexo = {'H': 'Hombre', 'M': 'Mujer'}.get(perfil.sexo, perfil.sexo)
+    filas = [
+        ('Cédula:', perfil.numerocedula),
+        ('Nacionalidad:', perfil.nacionalidad),
+        ('Fecha de Nacimiento:', formato_fecha(perfil.fechanacimiento, 'd/m/Y')),
+        ('Lugar de Nacimiento:', perfil.lugarnacimiento),
+        ('Sexo:', sexo),
+        ('Estado Civil:', perfil.estadocivil),
+        ('Teléfono Convencional:', perfil.telefonoconvencional or 'N/A'),
+        ('Teléfono Fijo / Celular:', perfil.telefonofijo or 'N/A'),
+        ('Dirección Domiciliaria:', perfil.direcciondomiciliaria),
+        ('Dirección de Trabajo:', perfil.direcciontrabajo or 'N/A'),
+        ('Sitio Web:', perfil.sitioweb or 'No registrado'),
+        ('Licencia de Conducir:', perfil.licenciaconducir or 'No posee'),
+    ]
+    return _tabla_datos(filas)
+
+
+def renderizar_cv_reportlab(context, destino, ruta_foto=None):
+    """Escribe en 'destino' la hoja de vida para el mismo contexto que usa la plantilla HTML."""
+    perfil = context['perfil']
+    historia = _encabezado(perfil, ruta_foto)
+    historia += _titulo_seccion('Perfil') + [_p(perfil.descripcionperfil, 'texto')]
+    historia += _titulo_seccion('Información Personal') + _informacion_personal(perfil)
+
+    if context['items']:
+        historia += _titulo_seccion('Experiencia Laboral') + _total(context, 'exp')
+        for exp in context['items']:
+            hasta = formato_fecha(exp.fechafingestion, 'M, Y') if exp.fechafingestion else 'Actualidad'
+            historia += _entrada(
+                exp.cargodesempenado,
+                f'{exp.nombrempresa} — {exp.lugarempresa}',
+                f"Desde: {formato_fecha(exp.fechainiciogestion, 'M, Y')} — Hasta: {hasta}",
+                exp.descripcionfunciones,
+            )
+
+    if context['reconocimientos']:
+        historia += _titulo_seccion('Reconocimientos') + _total(context, 'rec')
+        for rec in context['reconocimientos']:
+            historia += _entrada(
+                rec.tiporeconocimiento, rec.entidadpatrocinadora,
+                f"Fecha: {formato_fecha(rec.fechareconocimiento, 'd M, Y')}", rec.descripcionreconocimiento,
+            )
+
+    if context['cursos']:
+        historia += _titulo_seccion('Cursos Realizados') + _total(context, 'cur')
+        for curso in context['cursos']:
+            historia += _entrada(
+                curso.nombrecurso, curso.entidadpatrocinadora,
+                f"Desde: {formato_fecha(curso.fechainicio, 'd M, Y')} — Hasta: {formato_fecha(curso.fechafin, 'd M, Y')}",
+                f'{curso.descripcioncurso} ({curso.totalhoras} horas)',
+            )
+
+    if context['productos']:
+        historia += _titulo_seccion('Productos Académicos') + _total(context, 'aca')
+        for prod in context['productos']:
+            historia += _entrada(prod.nombrerecurso, prod.clasificador, None, prod.descripcion)
+
+    if context['productos_laborales']:
+        historia += _titulo_seccion('Productos Laborales') + _total(context, 'lab')
+        for pl in context['productos_laborales']:
+            historia += _entrada(pl.nombreproducto, None, f"Fecha: {formato_fecha(pl.fechaproducto, 'd M, Y')}", pl.descripcion)
+
+    if context['garage']:
+        historia += _titulo_seccion('Venta de Garage') + _total(context, 'gar')
+        for art in context['garage']:
+            historia += _entrada(
+                art.nombreproducto, f'Estado: {art.estadoproducto} — Valor: ${art.valordelbien}',
+                f"Publicado: {formato_fecha(art.fechapublicacion, 'd M, Y')}", art.descripcion,
+            )
+
+    doc = SimpleDocTemplate(
+        destino, pagesize=letter,
+        leftMargin=1.5 * cm, rightMargin=1.5 * cm, topMargin=1.5 * cm, bottomMargin=1.5 * cm,
+        title=f'CV {perfil.nombres} {perfil.apellidos}',
+    )
+    doc.build(historia)
@@ -0,0 +1,53 @@
+import logging
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+def _reducir_imagenes(page, dpi, calidad):
+    """
+    Baja a 'dpi' las imágenes que tienen más resolución de la que la página puede mostrar.
+    Se decide con /Width y /Height del XObject para no decodificar las que ya están bien.
+    """
+    recursos = page.get('/Resources')
+    xobjects = recursos.get_object().get('/XObject') if recursos else None
+    if not xobjects:
+        return 0
+    max_ancho = int(float(page.mediabox.width) / 72 * dpi)
+    max_alto = int(float(page.mediabox.height) / 72 * dpi)
+
+    reducidas = 0
+    for nombre, ref in xobjects.get_object().items():
+        obj = ref.get_object()
+        if obj.get('/Subtype') != '/Image' or '/SMask' in obj or '/Mask' in obj:
+            continue
+        if obj.get('/Width', 0) <= max_ancho * 1.1 and obj.get('/Height', 0) <= max_alto * 1.1:
+            continue
+        try:
+            imagen_pdf = page.images[nombre]
+            imagen = imagen_pdf.image
+            if imagen.mode not in ('RGB', 'L'):
+                imagen = imagen.convert('RGB')
+            imagen.thumbnail((max_ancho, max_alto), Image.LANCZOS)
+            imagen_pdf.replace(imagen, quality=calidad)
+            reducidas += 1
+        except Exception as e:
+            logger.debug("No se pudo reducir la imagen %s: %s", nombre, e)
+    return reducidas
+
+
+def optimizar_pdf(writer, dpi=150, calidad=80):
+    """
+    Pasada de optimización sobre el PdfWriter ya armado, antes de escribirlo:
+    comprime los content streams, baja la resolución de imágenes escaneadas y une los
+    objetos idénticos (fuentes, logos) repetidos entre los certificados anexados.
+    Devuelve el número de imágenes reducidas.
+    """
+    reducidas = 0
+    for page in writer.pages:
+        if dpi:
+            reducidas += _reducir_imagenes(page, dpi, calidad)
+        page.compress_content_streams(level=9)
+    writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+    return reducidas
@@ -0,0 +1,92 @@
+"""
+Paginación por cursor (keyset) para las secciones: la página siguiente se pide con los
+valores de orden de la última fila mostrada, así que cada página cuesta lo mismo sin
+importar cuántas filas haya antes (no hay OFFSET).
+"""
+import base64
+import json
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from .models import (
+    ExperienciaLaboral, CursosRealizados, Reconocimientos,
+    ProductosAcademicos, ProductosLaborales, VentaGarage
+)
+
+# 'siguiente' es el cursor de la página que sigue, o None si esta es la última
+Pagina = namedtuple('Pagina', ['items', 'siguiente'])
+
+# Orden de cada sección: el de su Meta más la pk para desempatar (coincide con sus índices parciales)
+ORDEN_SECCIONES = {
+    ExperienciaLaboral: ('-fechainiciogestion', '-idexperiencialaboral'),
+    CursosRealizados: ('-fechainicio', '-idcursorealizado'),
+    Reconocimientos: ('-fechareconocimiento', '-idreconocimiento'),
+    ProductosAcademicos: ('idproductoacademico',),
+    ProductosLaborales: ('-fechaproducto', '-idproductoslaborales'),
+    VentaGarage: ('-fechapublicacion', '-idventagarage'),
+}
+
+
+def codificar_cursor(valores):
+    texto = json.dumps([str(v) for v in valores], separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(modelo, orden, cursor):
+    """Valores del cursor convertidos a los tipos de los campos de 'orden'; None si no es válido."""
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        valores = json.loads(texto)
+        if not isinstance(valores, list) or len(valores) != len(orden):
+            return None
+        return [modelo._meta.get_field(campo.lstrip('-')).to_python(v) for campo, v in zip(orden, valores)]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def _despues_de(orden, valores):
+    """
+    Filas que van después de 'valores' en el orden dado: (a > x) o (a = x y b > y) ...
+    Se antepone a >= x, que es lo que permite al motor saltar en el índice al cursor.
+    """
+    condicion = Q()
+    iguales = {}
+    for campo, valor in zip(orden, valores):
+        nombre = campo.lstrip('-')
+        operador = 'lt' if campo.startswith('-') else 'gt'
+        condicion |= Q(**iguales, **{f'{nombre}__{operador}': valor})
+        iguales[nombre] = valor
+    primero = orden[0]
+    return Q(**{f"{primero.lstrip('-')}__{'lte' if primero.startswith('-') else 'gte'}": valores[0]}) & condicion
+
+
+def consulta_pagina(queryset, orden, cursor):
+    """'queryset' ordenado por 'orden' desde la fila que sigue a 'cursor' (o desde el inicio)."""
+    queryset = queryset.order_by(*orden)
+    valores = decodificar_cursor(queryset.model, orden, cursor) if cursor else None
+    if valores is not None:
+        queryset = queryset.filter(_despues_de(orden, valores))
+    return queryset
+
+
+def paginar(queryset, orden, cursor, tamano):
+    """
+    Una página de 'queryset' ordenado por 'orden' (el último campo debe ser único, p. ej.
+    la pk) a partir de 'cursor'. Un cursor inválido devuelve la primera página.
+    """
+    filas = list(consulta_pagina(queryset, orden, cursor)[:tamano + 1])
+    if len(filas) <= tamano:
+        return Pagina(filas, None)
+    ultima = filas[tamano - 1]
+    return Pagina(filas[:tamano], codificar_cursor(getattr(ultima, campo.lstrip('-')) for campo in orden))
+
+
+def visibles(modelo, perfil):
+    """Filas de una sección que el perfil muestra en la web (filtradas en SQL, no en la plantilla)."""
+    return modelo.objects.filter(idperfil=perfil, activarparaqueseveaenfront=True)
+
+
+def pagina_seccion(modelo, perfil, cursor, tamano):
+    return paginar(visibles(modelo, perfil), ORDEN_SECCIONES[modelo], cursor, tamano)
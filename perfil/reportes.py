@@ -0,0 +1,422 @@
+import os
+import io
+import hashlib
+import logging
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict, namedtuple
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.template.loader import get_template
+from django.utils import timezone
+from xhtml2pdf import pisa
+from pypdf import PdfWriter
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import letter
+
+from .cache_perfil import cache_de
+from .models import (
+    ExperienciaLaboral, CursosRealizados, Reconocimientos,
+    ProductosAcademicos, ProductosLaborales, VentaGarage
+)
+from .certificados import descargar_certificados
+from .imagenes import imagen_para_pdf
+from .motor_reportlab import renderizar_cv_reportlab
+from .optimizacion import optimizar_pdf
+from .resumen import resumen_de, totales
+
+logger = logging.getLogger(__name__)
+
+# Interruptores del modal y el campo del Admin que debe permitirlos (en el orden del modal)
+SECCIONES = (
+    ('exp', 'ver_experiencia'),
+    ('cur', 'ver_cursos'),
+    ('rec', 'ver_reconocimientos'),
+    ('aca', 'ver_productos_academicos'),
+    ('lab', 'ver_productos_laborales'),
+    ('gar', 'ver_garage'),
+)
+
+# Fragmentos de la hoja de vida en el orden del documento: (código, plantilla, clave del contexto).
+# Con PDF_FRAGMENTOS cada uno se renderiza como un PDF aparte y se guarda en caché bajo la
+# huella de sus filas, así que un cambio en el garage solo vuelve a renderizar el garage.
+FRAGMENTOS = (
+    ('encabezado', 'reportes/secciones/encabezado.html', 'perfil'),
+    ('exp', 'reportes/secciones/experiencia.html', 'items'),
+    ('rec', 'reportes/secciones/reconocimientos.html', 'reconocimientos'),
+    ('cur', 'reportes/secciones/cursos.html', 'cursos'),
+    ('aca', 'reportes/secciones/academicos.html', 'productos'),
+    ('lab', 'reportes/secciones/laborales.html', 'productos_laborales'),
+    ('gar', 'reportes/secciones/garage.html', 'garage'),
+)
+# Campos del perfil que pinta encabezado.html: la huella del encabezado solo mira estos, no
+# version_contenido (cambia con cualquier sección) ni el slug
+CAMPOS_ENCABEZADO = (
+    'nombres', 'apellidos', 'correo', 'foto_perfil', 'descripcionperfil', 'numerocedula',
+    'nacionalidad', 'fechanacimiento', 'lugarnacimiento', 'sexo', 'estadocivil',
+    'telefonoconvencional', 'telefonofijo', 'direcciondomiciliaria', 'direcciontrabajo',
+    'sitioweb', 'licenciaconducir',
+)
+# Subir si cambian las plantillas de reportes/secciones/ (invalida los fragmentos guardados)
+VERSION_FRAGMENTOS = 3
+
+# Motores disponibles para la hoja de vida base (los certificados se unen igual con pypdf)
+MOTORES = ('xhtml2pdf', 'reportlab')
+
+# Resultado del armado: 'archivo' es el PDF final (archivo temporal en la posición 0),
+# 'bytes_ahorrados' lo que pesan las entradas menos el PDF final optimizado, y
+# 'memoria_pico' los bytes máximos reservados por Python durante el armado (solo si PDF_MEDIR_MEMORIA).
+ResultadoCV = namedtuple('ResultadoCV', ['archivo', 'tamano', 'descargas', 'fallidos', 'bytes_ahorrados', 'memoria_pico'])
+
+
+class ErrorGeneracionPDF(Exception):
+    pass
+
+
+def secciones_solicitadas(perfil, parametros):
+    """Secciones que el usuario marcó en el modal Y que el Admin permite mostrar."""
+    return tuple(
+        codigo for codigo, campo in SECCIONES
+        if parametros.get(codigo) == 'on' and getattr(perfil, campo)
+    )
+
+
+def motor_solicitado(parametros):
+    """Motor pedido con ?motor=..., o el de PDF_MOTOR si no se indica uno válido."""
+    motor = parametros.get('motor')
+    return motor if motor in MOTORES else settings.PDF_MOTOR
+
+
+def clave_cv(perfil, secciones, motor):
+    """
+    Clave de caché del PDF terminado: (perfil, versión del contenido, interruptores, motor) y,
+    si lleva la experiencia, el día (sus años en curso cambian con la fecha).
+    """
+    clave = f"cv:{perfil.pk}:{perfil.version_contenido}:{'-'.join(secciones) or 'base'}:{motor}"
+    return f"{clave}:{timezone.localdate().isoformat()}" if 'exp' in secciones else clave
+
+
+def guardar_en_cache(perfil, clave, resultado):
+    """
+    Guarda el PDF terminado en la caché del perfil si no es demasiado grande. Uno con certificados fallidos se
+    guarda solo PDF_CACHE_TIMEOUT_INCOMPLETO segundos: lo reutilizan las peticiones
+    simultáneas y pasado ese tiempo se vuelven a buscar los certificados.
+    """
+    if resultado.tamano > settings.PDF_CACHE_MAX_BYTES:
+        return False
+    timeout = settings.PDF_CACHE_TIMEOUT_INCOMPLETO if resultado.fallidos else settings.PDF_CACHE_TIMEOUT
+    cache_de(perfil).set(clave, resultado.archivo.read(), timeout)
+    resultado.archivo.seek(0)
+    return True
+
+
+# URI -> ruta ya resuelta, las PDF_RUTAS_MEMORIZADAS más recientes. Los finders no cambian mientras
+# vive el proceso, así que cada URI local se resuelve una sola vez. Las imágenes remotas no se
+# memorizan: su copia en PDF_IMAGENES_DIR se puede desalojar y imagen_para_pdf la vuelve a preparar.
+_rutas_resueltas = OrderedDict()
+_lock_rutas = threading.Lock()
+
+
+def _recordar_ruta(uri, path):
+    with _lock_rutas:
+        _rutas_resueltas[uri] = path
+        _rutas_resueltas.move_to_end(uri)
+        while len(_rutas_resueltas) > settings.PDF_RUTAS_MEMORIZADAS:
+            _rutas_resueltas.popitem(last=False)
+    return path
+
+
+def link_callback(uri, rel):
+    with _lock_rutas:
+        path = _rutas_resueltas.get(uri)
+        if path is not None:
+            _rutas_resueltas.move_to_end(uri)
+            return path
+    if uri.startswith('http'):
+        # Foto remota (Cloudinary): se usa la copia local reducida al tamaño del PDF
+        return imagen_para_pdf(uri) or uri
+    result = finders.find(uri)
+    if result:
+        if not isinstance(result, (list, tuple)):
+            result = [result]
+        result = list(os.path.realpath(path) for path in result)
+        path = result[0]
+    else:
+        s_url = settings.STATIC_URL
+        s_root = settings.STATIC_ROOT
+        m_url = settings.MEDIA_URL
+        m_root = settings.MEDIA_ROOT
+        if uri.startswith(m_url):
+            path = os.path.join(m_root, uri.replace(m_url, ""))
+        elif uri.startswith(s_url):
+            path = os.path.join(s_root, uri.replace(s_url, ""))
+        else:
+            return uri
+    return _recordar_ruta(uri, path)
+
+
+def crear_caratula(texto):
+    packet = io.BytesIO()
+    can = canvas.Canvas(packet, pagesize=letter)
+    can.setFont("Helvetica-Bold", 32)
+    can.drawCentredString(300, 500, texto.upper())
+    can.save()
+    packet.seek(0)
+    return packet
+
+
+@contextmanager
+def medir(etapas, nombre):
+    """Acumula en etapas[nombre] los segundos del bloque (no hace nada si etapas es None)."""
+    if etapas is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        etapas[nombre] = etapas.get(nombre, 0.0) + time.perf_counter() - inicio
+
+
+# Bytes de certificados que los armados en curso de este proceso tienen cargados en su PdfWriter
+_memoria_lock = threading.Lock()
+_bytes_certificados_proceso = 0
+
+
+@contextmanager
+def reserva_certificados():
+    """
+    Cupo de certificados de un armado contra PDF_MAX_BYTES_CERTIFICADOS_PROCESO. Da una
+    función tomar(n) que reserva n bytes, o devuelve False si no entran. El cupo se libera al
+    salir del bloque, cuando el PdfWriter ya se escribió y soltó lo que tenía cargado.
+    """
+    global _bytes_certificados_proceso
+    reservados = 0
+
+    def tomar(n):
+        global _bytes_certificados_proceso
+        nonlocal reservados
+        with _memoria_lock:
+            if _bytes_certificados_proceso + n > settings.PDF_MAX_BYTES_CERTIFICADOS_PROCESO:
+                return False
+            _bytes_certificados_proceso += n
+            reservados += n
+            return True
+
+    try:
+        yield tomar
+    finally:
+        with _memoria_lock:
+            _bytes_certificados_proceso -= reservados
+
+
+def archivo_temporal():
+    """Archivo en memoria que pasa a disco al superar PDF_SPOOL_MAX_MEMORIA."""
+    return tempfile.SpooledTemporaryFile(max_size=settings.PDF_SPOOL_MAX_MEMORIA)
+
+
+def construir_cv(perfil, secciones, motor='xhtml2pdf', etapas=None):
+    """
+    Arma el PDF completo (hoja de vida + carátulas + certificados) para las secciones dadas.
+    Si se pasa un dict en 'etapas' se llena con los segundos de cada etapa (ver benchmark_pdf).
+    """
+    medir = getattr(settings, 'PDF_MEDIR_MEMORIA', False) and not tracemalloc.is_tracing()
+    if medir:
+        tracemalloc.start()
+    try:
+        resultado = _construir_cv(perfil, secciones, motor, etapas)
+        if medir:
+            resultado = resultado._replace(memoria_pico=tracemalloc.get_traced_memory()[1])
+        return resultado
+    finally:
+        if medir:
+            tracemalloc.stop()
+
+
+def contexto_cv(perfil, secciones):
+    """Consultas de la hoja de vida: solo las secciones ya filtradas por secciones_solicitadas()."""
+    experiencias = ExperienciaLaboral.objects.filter(idperfil=perfil, activarparaqueseveaenfront=True) if 'exp' in secciones else []
+    productos_academicos = ProductosAcademicos.objects.filter(idperfil=perfil, activarparaqueseveaenfront=True) if 'aca' in secciones else []
+    productos_laborales = ProductosLaborales.objects.filter(idperfil=perfil, activarparaqueseveaenfront=True) if 'lab' in secciones else []
+    cursos_objs = CursosRealizados.objects.filter(idperfil=perfil, activarparaqueseveaenfront=True) if 'cur' in secciones else []
+    reconocimientos_objs = Reconocimientos.objects.filter(idperfil=perfil, activarparaqueseveaenfront=True) if 'rec' in secciones else []
+    articulos_garage = VentaGarage.objects.filter(idperfil=perfil, activarparaqueseveaenfront=True) if 'gar' in secciones else []
+    return {
+        'perfil': perfil,
+        'items': experiencias,
+        'productos': productos_academicos,
+        'productos_laborales': productos_laborales,
+        'cursos': cursos_objs,
+        'reconocimientos': reconocimientos_objs,
+        'garage': articulos_garage,
+        # Línea de totales de cada sección pedida (ResumenPerfil, una consulta por clave primaria)
+        'resumen': totales(resumen_de(perfil), secciones),
+    }
+
+
+def huella_fragmento(codigo, filas, extra='', campos=None):
+    """Hash de los valores de las filas (o del perfil) que pinta el fragmento, más 'extra'."""
+    sha = hashlib.sha256(f'{VERSION_FRAGMENTOS}:{codigo}:{extra}'.encode('utf-8'))
+    for fila in filas:
+        for campo in fila._meta.concrete_fields:
+            if campos is not None and campo.name not in campos:
+                continue
+            sha.update(b'\x1f')
+            # str(): JSONField devuelve el dict tal cual
+            sha.update(str(campo.value_to_string(fila)).encode('utf-8'))
+        sha.update(b'\x1e')
+    return sha.hexdigest()
+
+
+def _pisa_a_bytes(plantilla, context):
+    html = get_template('reportes/fragmento.html').render(dict(context, plantilla=plantilla))
+    destino = io.BytesIO()
+    pisa_status = pisa.CreatePDF(html, dest=destino, link_callback=link_callback)
+    if pisa_status.err:
+        raise ErrorGeneracionPDF(f'xhtml2pdf no pudo generar el fragmento {plantilla}')
+    return destino.getvalue()
+
+
+def renderizar_por_fragmentos(context, etapas=None):
+    """
+    Hoja de vida armada con un PDF por sección. Los fragmentos que no están en caché se
+    renderizan uno tras otro (pisa es Python puro y usa el estado global de ReportLab, así
+    que los hilos no ganan nada y no son seguros) y luego se unen en el orden de FRAGMENTOS.
+    """
+    pendientes = []
+    for codigo, plantilla, clave in FRAGMENTOS:
+        valor = context[clave]
+        if not valor:
+            continue  # Igual que {% if items %} en la plantilla completa
+        if clave == 'perfil':
+            huella = huella_fragmento(codigo, [valor], campos=CAMPOS_ENCABEZADO)
+        else:
+            # La línea de totales va con su sección (los años de experiencia dependen de la fecha)
+            huella = huella_fragmento(codigo, valor, repr(context['resumen'].get(codigo)))
+        pendientes.append((codigo, plantilla, f'fragmento:{codigo}:{huella}'))
+
+    cache = cache_de(context['perfil'])
+    with medir(etapas, 'fragmentos_cache'):
+        en_cache = cache.get_many([clave for _, _, clave in pendientes])
+    faltantes = [(plantilla, clave) for _, plantilla, clave in pendientes if clave not in en_cache]
+
+    if faltantes:
+        with medir(etapas, 'pisa'):
+            nuevos = {clave: _pisa_a_bytes(plantilla, context) for plantilla, clave in faltantes}
+        cache.set_many(nuevos, settings.PDF_CACHE_TIMEOUT)
+        en_cache.update(nuevos)
+
+    with medir(etapas, 'union'):
+        writer = PdfWriter()
+        for _, _, clave in pendientes:
+            writer.append(io.BytesIO(en_cache[clave]))
+        buffer_cv_base = archivo_temporal()
+        writer.write(buffer_cv_base)
+        writer.close()
+    buffer_cv_base.seek(0)
+    return buffer_cv_base
+
+
+def renderizar_base(context, motor='xhtml2pdf', etapas=None):
+    """Genera la hoja de vida (sin certificados) en un archivo temporal posicionado en 0."""
+    buffer_cv_base = archivo_temporal()
+    if motor == 'reportlab':
+        perfil = context['perfil']
+        ruta_foto = link_callback(perfil.foto_perfil.url, None) if perfil.foto_perfil else None
+        if ruta_foto and ruta_foto.startswith('http'):
+            ruta_foto = None
+        with medir(etapas, 'reportlab'):
+            renderizar_cv_reportlab(context, buffer_cv_base, ruta_foto)
+    elif settings.PDF_FRAGMENTOS:
+        buffer_cv_base.close()
+        return renderizar_por_fragmentos(context, etapas)
+    else:
+        with medir(etapas, 'plantilla'):
+            template = get_template('reportes/pdf_personales.html')
+            html = template.render(context)
+        with medir(etapas, 'pisa'):
+            pisa_status = pisa.CreatePDF(html, dest=buffer_cv_base, link_callback=link_callback)
+        if pisa_status.err:
+            raise ErrorGeneracionPDF('xhtml2pdf no pudo generar la hoja de vida')
+    buffer_cv_base.seek(0)
+    return buffer_cv_base
+
+
+def _construir_cv(perfil, secciones, motor, etapas):
+    # 1. Consultas y 2. Hoja de vida base con el motor elegido
+    with medir(etapas, 'consultas'):
+        context = contexto_cv(perfil, secciones)
+        for clave in ('items', 'productos', 'productos_laborales', 'cursos', 'reconocimientos', 'garage'):
+            context[clave] = list(context[clave])
+    cursos_objs = context['cursos']
+    reconocimientos_objs = context['reconocimientos']
+    buffer_cv_base = renderizar_base(context, motor, etapas)
+
+    with medir(etapas, 'union'):
+        writer = PdfWriter()
+        writer.append(buffer_cv_base)
+    bytes_entrada = buffer_cv_base.seek(0, 2)
+
+    # 3. Certificados
+    # Se descargan todos juntos en paralelo y se unen en el orden del queryset.
+    # Los que la ingesta marcó como inválidos ni se descargan
+    cursos_con_pdf = [c for c in cursos_objs if c.rutacertificado and c.certificado_valido is not False]
+    reco_con_pdf = [r for r in reconocimientos_objs if r.rutacertificado and r.certificado_valido is not False]
+    with ExitStack() as abiertos:
+        tomar = abiertos.enter_context(reserva_certificados())
+        # Los blobs de esta petición no se desalojan hasta cerrar el bloque (el desalojo va al salir)
+        with medir(etapas, 'certificados'):
+            descargas = abiertos.enter_context(descargar_certificados([
+                (o.rutacertificado.name, o.rutacertificado.url) for o in cursos_con_pdf + reco_con_pdf
+            ]))
+        descargas_cursos = descargas[:len(cursos_con_pdf)]
+        descargas_reco = descargas[len(cursos_con_pdf):]
+
+        # Los certificados se leen desde la caché en disco (sin copiarlos a memoria), pero
+        # PdfWriter los carga al unirlos y no escribe nada hasta el final. Por eso se corta al
+        # llegar a PDF_MAX_BYTES_CERTIFICADOS por petición y a PDF_MAX_BYTES_CERTIFICADOS_PROCESO
+        # entre todos los armados del worker: la memoria queda acotada por worker, no por petición.
+        fallidos = [d for d in descargas if d.error]
+        presupuesto = settings.PDF_MAX_BYTES_CERTIFICADOS
+        for titulo, grupo in (("Certificados de Cursos", descargas_cursos), ("Reconocimientos", descargas_reco)):
+            if not grupo:
+                continue
+            with medir(etapas, 'caratulas'):
+                caratula = crear_caratula(titulo)
+                writer.append(caratula)
+            bytes_entrada += caratula.getbuffer().nbytes
+            for descarga in grupo:
+                if descarga.ruta is None:
+                    continue
+                try:
+                    tamano = os.path.getsize(descarga.ruta)
+                    if tamano > presupuesto:
+                        logger.warning("Certificado omitido %s: supera el total de %s bytes por PDF", descarga.url, settings.PDF_MAX_BYTES_CERTIFICADOS)
+                        fallidos.append(descarga)
+                        continue
+                    if not tomar(tamano):
+                        logger.warning("Certificado omitido %s: el worker ya tiene %s bytes de certificados en armado", descarga.url, settings.PDF_MAX_BYTES_CERTIFICADOS_PROCESO)
+                        fallidos.append(descarga)
+                        continue
+                    with medir(etapas, 'union'):
+                        writer.append(abiertos.enter_context(open(descarga.ruta, 'rb')))
+                    presupuesto -= tamano
+                    bytes_entrada += tamano
+                except Exception as e:
+                    logger.warning("Certificado inválido %s: %s", descarga.url, e)
+                    fallidos.append(descarga)
+
+        if settings.PDF_OPTIMIZAR:
+            with medir(etapas, 'optimizacion'):
+                optimizar_pdf(writer, settings.PDF_IMAGENES_DPI, settings.PDF_IMAGENES_CALIDAD)
+        with medir(etapas, 'escritura'):
+            salida = archivo_temporal()
+            writer.write(salida)
+            writer.close()
+    buffer_cv_base.close()
+    tamano = salida.tell()
+    salida.seek(0)
+    return ResultadoCV(salida, tamano, descargas, fallidos, bytes_entrada - tamano, None)
@@ -0,0 +1,166 @@
+"""
+Totales del perfil (años de experiencia, horas de cursos, reconocimientos por tipo, valor
+del garage) guardados en ResumenPerfil. Las señales suman o restan solo lo que aporta la
+fila guardada o borrada, así que la portada los lee con una búsqueda por clave primaria
+en vez de recorrer y agregar cada sección. Si se desajustan (bulk_create, update, loaddata
+no disparan señales) se rehacen con el comando reconstruir_resumenes.
+"""
+from collections import Counter
+from decimal import Decimal
+
+from django.apps import apps
+from django.db.models import F
+
+# Campos de cada sección que cambian su aporte (un save con update_fields sin ninguno no toca el resumen)
+CAMPOS = {
+    'ExperienciaLaboral': {'idperfil', 'activarparaqueseveaenfront', 'fechainiciogestion', 'fechafingestion'},
+    'CursosRealizados': {'idperfil', 'activarparaqueseveaenfront', 'totalhoras'},
+    'Reconocimientos': {'idperfil', 'activarparaqueseveaenfront', 'tiporeconocimiento'},
+    'ProductosAcademicos': {'idperfil', 'activarparaqueseveaenfront'},
+    'ProductosLaborales': {'idperfil', 'activarparaqueseveaenfront'},
+    'VentaGarage': {'idperfil', 'activarparaqueseveaenfront', 'valordelbien'},
+}
+TIPOS_RECONOCIMIENTO = {
+    'Académico': 'reconocimientos_academicos',
+    'Público': 'reconocimientos_publicos',
+    'Privado': 'reconocimientos_privados',
+}
+
+
+def _experiencia(fila):
+    if fila.fechafingestion:
+        dias = max(0, (fila.fechafingestion - fila.fechainiciogestion).days)
+        return {'experiencias': 1, 'dias_experiencia_cerrada': dias}
+    # En curso: los días dependen de la fecha en que se lea (ver ResumenPerfil.dias_experiencia)
+    return {'experiencias': 1, 'experiencias_abiertas': 1, 'inicio_abiertas': fila.fechainiciogestion.toordinal()}
+
+
+def _reconocimiento(fila):
+    campo = TIPOS_RECONOCIMIENTO.get(fila.tiporeconocimiento)
+    return {campo: 1} if campo else {}
+
+
+APORTES = {
+    'ExperienciaLaboral': _experiencia,
+    'CursosRealizados': lambda fila: {'cursos': 1, 'horas_cursos': fila.totalhoras or 0},
+    'Reconocimientos': _reconocimiento,
+    'ProductosAcademicos': lambda fila: {'productos_academicos': 1},
+    'ProductosLaborales': lambda fila: {'productos_laborales': 1},
+    'VentaGarage': lambda fila: {'articulos_garage': 1, 'valor_garage': Decimal(fila.valordelbien or 0)},
+}
+
+
+def aporte(fila):
+    """Lo que suma la fila al resumen de su perfil (nada si está oculta)."""
+    if not fila.activarparaqueseveaenfront:
+        return {}
+    return APORTES[type(fila).__name__](fila)
+
+
+def _aplicar(idperfil, cambios, crear=True):
+    """
+    Suma 'cambios' con un UPDATE ... SET campo = campo + n (sin carreras entre workers).
+    Si el perfil todavía no tiene resumen se calcula entero, lo que ya incluye el cambio;
+    al borrar no se crea (puede ser el borrado en cascada del propio perfil).
+    """
+    cambios = {campo: valor for campo, valor in cambios.items() if valor}
+    if not cambios:
+        return
+    ResumenPerfil = apps.get_model('perfil', 'ResumenPerfil')
+    actualizados = ResumenPerfil.objects.filter(pk=idperfil).update(
+        **{campo: F(campo) + valor for campo, valor in cambios.items()}
+    )
+    if not actualizados and crear:
+        reconstruir(idperfil=idperfil)
+
+
+def antes_de_guardar(instancia, update_fields=None):
+    """Recuerda el aporte de la fila tal como está en la base, para restarlo después del save."""
+    instancia._resumen_anterior = None
+    if instancia._state.adding or instancia.pk is None:
+        return
+    if update_fields is not None and not CAMPOS[type(instancia).__name__] & set(update_fields):
+        instancia._resumen_anterior = False
+        return
+    anterior = type(instancia)._default_manager.filter(pk=instancia.pk).first()
+    if anterior is not None:
+        instancia._resumen_anterior = (anterior.idperfil_id, aporte(anterior))
+
+
+def guardada(instancia):
+    anterior = getattr(instancia, '_resumen_anterior', None)
+    if anterior is False:
+        return
+    nuevo = Counter(aporte(instancia))
+    if anterior:
+        idperfil_anterior, aporte_anterior = anterior
+        if idperfil_anterior == instancia.idperfil_id:
+            nuevo.subtract(aporte_anterior)
+        else:
+            _aplicar(idperfil_anterior, {campo: -valor for campo, valor in aporte_anterior.items()}, crear=False)
+    _aplicar(instancia.idperfil_id, nuevo)
+
+
+def borrada(instancia):
+    _aplicar(instancia.idperfil_id, {campo: -valor for campo, valor in aporte(instancia).items()}, crear=False)
+
+
+def reconstruir(idperfil=None):
+    """
+    Recalcula los resúmenes desde las secciones (todos, o solo el de 'idperfil').
+    Devuelve cuántos se guardaron. La migración 0020 lleva su propia copia de los aportes.
+    """
+    DatosPersonales = apps.get_model('perfil', 'DatosPersonales')
+    ResumenPerfil = apps.get_model('perfil', 'ResumenPerfil')
+    perfiles = DatosPersonales.objects.all()
+    if idperfil is not None:
+        perfiles = perfiles.filter(pk=idperfil)
+    sumas = {pk: Counter() for pk in perfiles.values_list('pk', flat=True)}
+
+    for nombre, calcular in APORTES.items():
+        campos = ['pk'] + sorted(CAMPOS[nombre])
+        filas = apps.get_model('perfil', nombre).objects.filter(
+            activarparaqueseveaenfront=True, idperfil__in=list(sumas),
+        ).only(*campos)
+        for fila in filas.iterator():
+            sumas[fila.idperfil_id].update(calcular(fila))
+
+    for pk, total in sumas.items():
+        ResumenPerfil.objects.update_or_create(
+            idperfil_id=pk,
+            defaults={campo.name: total.get(campo.name, 0) for campo in ResumenPerfil._meta.concrete_fields if not campo.primary_key},
+        )
+    return len(sumas)
+
+
+def resumen_de(perfil):
+    """Resumen del perfil (una búsqueda por clave primaria); lo crea si todavía no existe."""
+    ResumenPerfil = apps.get_model('perfil', 'ResumenPerfil')
+    resumen = ResumenPerfil.objects.filter(pk=perfil.pk).first()
+    if resumen is None:
+        reconstruir(idperfil=perfil.pk)
+        resumen = ResumenPerfil.objects.filter(pk=perfil.pk).first()
+    return resumen
+
+
+def totales(resumen, secciones):
+    """Línea (etiqueta, valor) de cada sección pedida que tiene filas, por código de sección."""
+    if resumen is None:
+        return {}
+    lineas = {}
+    if 'exp' in secciones and resumen.experiencias:
+        lineas['exp'] = ('Años de experiencia', f'{resumen.anios_experiencia:g}')
+    if 'rec' in secciones and resumen.reconocimientos:
+        lineas['rec'] = ('Reconocimientos', (
+            f'{resumen.reconocimientos} ({resumen.reconocimientos_academicos} académicos, '
+            f'{resumen.reconocimientos_publicos} públicos, {resumen.reconocimientos_privados} privados)'
+        ))
+    if 'cur' in secciones and resumen.cursos:
+        lineas['cur'] = ('Cursos realizados', f'{resumen.cursos} ({resumen.horas_cursos} horas)')
+    if 'aca' in secciones and resumen.productos_academicos:
+        lineas['aca'] = ('Productos académicos', str(resumen.productos_academicos))
+    if 'lab' in secciones and resumen.productos_laborales:
+        lineas['lab'] = ('Productos laborales', str(resumen.productos_laborales))
+    if 'gar' in secciones and resumen.articulos_garage:
+        lineas['gar'] = ('Artículos en venta', f'{resumen.articulos_garage} (valor total ${resumen.valor_garage})')
+    return lineas
@@ -0,0 +1,75 @@
+import time
+
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from .models import (
+    DatosPersonales, ExperienciaLaboral, CursosRealizados,
+    Reconocimientos, ProductosAcademicos, ProductosLaborales,
+    VentaGarage
+)
+from . import activo, busqueda, resumen, sitio_estatico
+
+MODELOS_SECCION = (
+    ExperienciaLaboral, CursosRealizados, Reconocimientos,
+    ProductosAcademicos, ProductosLaborales, VentaGarage,
+)
+
+
+def marcar_contenido_modificado(idperfil):
+    """
+    Sube la versión del contenido del perfil. Todas las claves de caché que la incluyen
+    (p. ej. el PDF terminado) dejan de coincidir y se regeneran en la próxima petición.
+    Se usa la hora en microsegundos (y nunca menos que la anterior + 1) para que una
+    versión no se repita aunque se guarde una instancia vieja del perfil.
+    """
+    ahora = time.time_ns() // 1000
+    DatosPersonales.objects.filter(pk=idperfil).update(
+        version_contenido=Greatest(F('version_contenido') + 1, Value(ahora))
+    )
+    # La instancia memorizada del perfil lleva la versión anterior
+    activo.invalidar(idperfil)
+
+
+def _perfil_guardado(sender, instance, **kwargs):
+    marcar_contenido_modificado(instance.pk)
+    activo.invalidar_perfiles()  # Puede cambiar el perfil activo o el slug
+    sitio_estatico.contenido_modificado(instance.pk)
+
+
+def _perfil_borrado(sender, instance, **kwargs):
+    activo.invalidar(instance.pk)
+    activo.invalidar_perfiles()
+    sitio_estatico.contenido_modificado(instance.pk)
+
+
+def _seccion_modificada(sender, instance, **kwargs):
+    marcar_contenido_modificado(instance.idperfil_id)
+    sitio_estatico.contenido_modificado(instance.idperfil_id, sender)
+
+
+def _seccion_por_guardar(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        resumen.antes_de_guardar(instance, update_fields)
+
+
+def _seccion_guardada(sender, instance, raw=False, **kwargs):
+    busqueda.indexar(instance)
+    if not raw:
+        resumen.guardada(instance)
+
+
+def _seccion_borrada(sender, instance, **kwargs):
+    busqueda.desindexar(instance)
+    resumen.borrada(instance)
+
+
+post_save.connect(_perfil_guardado, sender=DatosPersonales, dispatch_uid='perfil_version_contenido')
+post_delete.connect(_perfil_borrado, sender=DatosPersonales, dispatch_uid='perfil_activo_borrado')
+for modelo in MODELOS_SECCION:
+    post_save.connect(_seccion_modificada, sender=modelo, dispatch_uid=f'{modelo.__name__}_version_contenido')
+    post_delete.connect(_seccion_modificada, sender=modelo, dispatch_uid=f'{modelo.__name__}_version_contenido')
+    pre_save.connect(_seccion_por_guardar, sender=modelo, dispatch_uid=f'{modelo.__name__}_resumen')
+    post_save.connect(_seccion_guardada, sender=modelo, dispatch_uid=f'{modelo.__name__}_busqueda')
+    post_delete.connect(_seccion_borrada, sender=modelo, dispatch_uid=f'{modelo.__name__}_busqueda')
@@ -0,0 +1,104 @@
+"""Perfiles de prueba para los comandos de medición (benchmark_pdf, comparar_motores_pdf)."""
+import datetime
+import io
+import os
+import uuid
+from decimal import Decimal
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from .models import (
+    DatosPersonales, ExperienciaLaboral, CursosRealizados, Reconocimientos,
+    ProductosAcademicos, ProductosLaborales, VentaGarage
+)
+
+FECHA = datetime.date(2020, 1, 1)
+TEXTO = ('Descripción de prueba con suficiente texto para ocupar varias líneas en el documento. ' * 3)[:250]
+
+
+def certificado_falso(titulo, paginas=1):
+    """PDF pequeño generado con ReportLab que hace de certificado."""
+    packet = io.BytesIO()
+    can = canvas.Canvas(packet, pagesize=letter)
+    for n in range(paginas):
+        can.setFont("Helvetica-Bold", 24)
+        can.drawCentredString(300, 500, f'{titulo} - página {n + 1}')
+        can.showPage()
+    can.save()
+    return packet.getvalue()
+
+
+def _datos(tipo, i):
+    if tipo is ExperienciaLaboral:
+        return dict(cargodesempenado=f'Cargo {i}', nombrempresa='Empresa', lugarempresa='Manta',
+                    emailempresa='empresa@example.com', nombrecontactoempresarial='Contacto',
+                    telefonocontactoempresarial='0999999999', fechainiciogestion=FECHA,
+                    fechafingestion=FECHA, descripcionfunciones=TEXTO)
+    if tipo is CursosRealizados:
+        return dict(nombrecurso=f'Curso {i}', fechainicio=FECHA, fechafin=FECHA, totalhoras=40,
+                    descripcioncurso=TEXTO, entidadpatrocinadora='Entidad', nombrecontactoauspicia='Contacto',
+                    telefonocontactoauspicia='0999999999', emailempresapatrocinadora='entidad@example.com')
+    if tipo is Reconocimientos:
+        return dict(tiporeconocimiento='Académico', fechareconocimiento=FECHA, descripcionreconocimiento=TEXTO,
+                    entidadpatrocinadora='Entidad', nombrecontactoauspicia='Contacto',
+                    telefonocontactoauspicia='0999999999')
+    if tipo is ProductosAcademicos:
+        return dict(nombrerecurso=f'Recurso {i}', clasificador='Artículo', descripcion=TEXTO)
+    if tipo is ProductosLaborales:
+        return dict(nombreproducto=f'Producto {i}', fechaproducto=FECHA, descripcion=TEXTO)
+    return dict(nombreproducto=f'Artículo {i}', estadoproducto='Bueno', descripcion=TEXTO,
+                valordelbien=Decimal('10.00'), fechapublicacion=FECHA)
+
+
+def perfil_sin_guardar():
+    return DatosPersonales(
+        idperfil=0, nombres='Perfil', apellidos='Sintético', numerocedula='0000000000', sexo='H',
+        correo='sintetico@example.com', descripcionperfil='Perfil generado para mediciones.',
+        fechanacimiento=datetime.date(1990, 1, 1), nacionalidad='Ecuatoriana',
+    )
+
+
+def contexto_sintetico(n):
+    """Contexto de plantilla con 'n' filas por sección (objetos sin guardar, no toca la base)."""
+    perfil = perfil_sin_guardar()
+    return {
+        'perfil': perfil,
+        'items': [ExperienciaLaboral(**_datos(ExperienciaLaboral, i)) for i in range(n)],
+        'reconocimientos': [Reconocimientos(**_datos(Reconocimientos, i)) for i in range(n)],
+        'cursos': [CursosRealizados(**_datos(CursosRealizados, i)) for i in range(n)],
+        'productos': [ProductosAcademicos(**_datos(ProductosAcademicos, i)) for i in range(n)],
+        'productos_laborales': [ProductosLaborales(**_datos(ProductosLaborales, i)) for i in range(n)],
+        'garage': [VentaGarage(**_datos(VentaGarage, i)) for i in range(n)],
+    }
+
+
+def crear_perfil_sintetico(cantidades, directorio_certificados=None, paginas_certificado=1):
+    """
+    Guarda un perfil con cantidades[Modelo] filas por sección (bulk_create, sin señales).
+    Si se da 'directorio_certificados', escribe ahí un PDF falso por cada curso y
+    reconocimiento y lo enlaza en rutacertificado (nombre relativo al directorio).
+    """
+    sufijo = uuid.uuid4().hex[:9]
+    perfil = perfil_sin_guardar()
+    perfil.idperfil = None
+    perfil.numerocedula = sufijo[:10]
+    perfil.correo = f'sintetico-{sufijo}@example.com'
+    perfil.slug = f'sintetico-{sufijo}'
+    perfil.perfilactivo = 0
+    perfil.save()
+
+    for modelo, n in cantidades.items():
+        filas = []
+        for i in range(n):
+            fila = modelo(idperfil=perfil, **_datos(modelo, i))
+            if directorio_certificados and modelo in (CursosRealizados, Reconocimientos):
+                nombre = f'certificados/{sufijo}-{modelo.__name__.lower()}-{i}.pdf'
+                ruta = os.path.join(directorio_certificados, nombre)
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                with open(ruta, 'wb') as f:
+                    f.write(certificado_falso(f'{modelo._meta.verbose_name} {i}', paginas_certificado))
+                fila.rutacertificado.name = nombre
+            filas.append(fila)
+        modelo.objects.bulk_create(filas, batch_size=1000)
+    return perfil
@@ -0,0 +1,390 @@
+"""
+Copia estática del sitio público del perfil activo, que WhiteNoise sirve sin pasar por la
+base ni las plantillas (ver middleware.SitioEstaticoMiddleware). Cada exportación es una
+generación nueva e inmutable en SITIO_ESTATICO_DIR:
+
+    actual                  "<generación> <idperfil> <fecha>" de la publicada
+    g-<ns>/index.html, g-<ns>/experiencia/index.html, ...
+    g-<ns>/cv/<version_contenido>/<secciones>-<motor>.pdf
+    g-<ns>/cv/<version_contenido>/<fecha>/<secciones>-<motor>.pdf   (los que llevan la experiencia)
+
+Lo que no cambia se enlaza (hard link) desde la generación anterior. Al confirmarse un
+cambio del perfil activo se publica enseguida una generación sin las páginas afectadas
+(mientras tanto responde Django) y un hilo las vuelve a renderizar, junto con los PDF de la
+versión nueva. Se guardan la generación publicada y la anterior, que puede estar sirviendo
+todavía un worker que no vio el cambio.
+
+Los años de experiencia en curso cambian con la fecha: la portada (PAGINAS_DEL_DIA) solo se
+sirve el día en que se renderizó y los PDF con experiencia llevan la fecha en la ruta. Pasado
+ese día responde Django hasta la próxima exportación.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections, transaction
+from django.http import HttpRequest
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from .activo import perfil_activo
+from .models import (
+    DatosPersonales, ExperienciaLaboral, CursosRealizados, Reconocimientos,
+    ProductosAcademicos, ProductosLaborales, VentaGarage
+)
+from .paginacion import visibles
+from .reportes import SECCIONES, construir_cv
+
+try:
+    import fcntl
+except ImportError:  # Windows (desarrollo): solo se coordina dentro del proceso
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Nombre de la URL -> modelo de la sección (None: solo depende del perfil)
+PAGINAS = {
+    'home': None,
+    'experiencia': ExperienciaLaboral,
+    'cursos': CursosRealizados,
+    'reconocimientos': Reconocimientos,
+    'productos_academicos': ProductosAcademicos,
+    'productos_laborales': ProductosLaborales,
+    'garage': VentaGarage,
+}
+# Muestran los años de experiencia en curso (resumen.py): valen solo el día en que se renderizaron
+PAGINAS_DEL_DIA = ('home',)
+PUNTERO = 'actual'
+
+_lock = threading.Lock()
+
+
+@contextmanager
+def _bloqueo():
+    """Exclusión entre hilos y workers para armar y publicar generaciones (solo pasos rápidos)."""
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(settings.SITIO_ESTATICO_DIR, exist_ok=True)
+        fd = os.open(os.path.join(settings.SITIO_ESTATICO_DIR, '.bloqueo'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+def _escribir(destino, contenido):
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=os.path.dirname(destino), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(contenido)
+        os.replace(temporal, destino)
+    except BaseException:
+        os.remove(temporal)
+        raise
+
+
+def _enlazar(origen, destino):
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    try:
+        os.link(origen, destino)
+    except OSError:
+        shutil.copy2(origen, destino)
+
+
+def _host():
+    hosts = [h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*']
+    return hosts[-1] if hosts else 'localhost'
+
+
+def _hoy():
+    return timezone.localdate().isoformat()
+
+
+def _leer_puntero():
+    """(carpeta, idperfil, fecha) de la generación publicada, o (None, None, None)."""
+    try:
+        with open(os.path.join(settings.SITIO_ESTATICO_DIR, PUNTERO), encoding='utf-8') as f:
+            nombre, idperfil, fecha = f.read().split()
+    except (FileNotFoundError, ValueError):
+        return None, None, None
+    return os.path.join(settings.SITIO_ESTATICO_DIR, nombre), int(idperfil), fecha
+
+
+def generacion_actual():
+    """Carpeta de la generación publicada, o None."""
+    return _leer_puntero()[0]
+
+
+def urls_vencidas():
+    """URLs de la generación publicada que ya no valen hoy (las de PAGINAS_DEL_DIA de otro día)."""
+    generacion, _, fecha = _leer_puntero()
+    if generacion is None or fecha == _hoy():
+        return set()
+    return {reverse(nombre) for nombre in PAGINAS_DEL_DIA}
+
+
+def marca():
+    """Identifica la publicación vigente con un stat (el puntero se reemplaza al publicar); None si no hay."""
+    try:
+        datos = os.stat(os.path.join(settings.SITIO_ESTATICO_DIR, PUNTERO))
+    except FileNotFoundError:
+        return None
+    return (datos.st_ino, datos.st_mtime_ns)
+
+
+def _ruta_relativa_pagina(nombre):
+    return os.path.join(reverse(nombre).strip('/'), 'index.html')
+
+
+def _codigo_combinacion(secciones, motor):
+    return f"{'-'.join(secciones) or 'base'}-{motor}"
+
+
+def _ruta_relativa_pdf(perfil, secciones, motor):
+    directorio = os.path.join('cv', str(perfil.version_contenido))
+    if 'exp' in secciones:
+        directorio = os.path.join(directorio, _hoy())
+    return os.path.join(directorio, _codigo_combinacion(secciones, motor) + '.pdf')
+
+
+def url_pdf(perfil, secciones, motor):
+    """URL de la copia estática del PDF si está publicada para la versión actual del perfil (y el día), o None."""
+    generacion, idperfil, _ = _leer_puntero()
+    if generacion is None or idperfil != perfil.pk:
+        return None
+    relativa = _ruta_relativa_pdf(perfil, secciones, motor)
+    if not os.path.exists(os.path.join(generacion, relativa)):
+        return None
+    return '/' + relativa.replace(os.sep, '/')
+
+
+def combinaciones_pdf(perfil):
+    """Las combinaciones de SITIO_ESTATICO_PDF limitadas a lo que el Admin permite, sin repetir."""
+    permitidas = [codigo for codigo, campo in SECCIONES if getattr(perfil, campo)]
+    combinaciones = []
+    for combinacion in settings.SITIO_ESTATICO_PDF:
+        pedidas = permitidas if combinacion == 'todas' else combinacion
+        secciones = tuple(codigo for codigo in permitidas if codigo in pedidas)
+        if secciones not in combinaciones:
+            combinaciones.append(secciones)
+    return combinaciones
+
+
+def _peticion(ruta):
+    """GET anónimo a 'ruta', como el de un visitante del sitio."""
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = ruta
+    request.META = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': ruta, 'QUERY_STRING': '',
+        'HTTP_HOST': _host(), 'SERVER_NAME': _host(), 'SERVER_PORT': '80',
+    }
+    request.user = AnonymousUser()
+    return request
+
+
+def renderizar_paginas(perfil, nombres):
+    """
+    HTML de cada página con las vistas del sitio (sin pasar por el middleware). None para
+    las que quedan dinámicas: secciones con más de una página (WhiteNoise ignora el ?cursor=
+    de "Ver más") o que no responden 200.
+    """
+    paginas = {}
+    for nombre in nombres:
+        modelo = PAGINAS[nombre]
+        if modelo is not None and visibles(modelo, perfil).count() > settings.SECCIONES_POR_PAGINA:
+            paginas[nombre] = None
+            continue
+        ruta = reverse(nombre)
+        request = _peticion(ruta)
+        coincidencia = resolve(ruta)
+        response = coincidencia.func(request, *coincidencia.args, **coincidencia.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        paginas[nombre] = response.content if response.status_code == 200 else None
+    return paginas
+
+
+def construir_pdfs(perfil, motor, existentes):
+    """
+    Arma en archivos temporales (en SITIO_ESTATICO_DIR, para moverlos sin copiar) los PDF de
+    las combinaciones que no estén en 'existentes'. Devuelve {ruta relativa: temporal}.
+    """
+    os.makedirs(settings.SITIO_ESTATICO_DIR, exist_ok=True)
+    nuevos = {}
+    for secciones in combinaciones_pdf(perfil):
+        relativa = _ruta_relativa_pdf(perfil, secciones, motor)
+        if relativa in existentes:
+            continue
+        resultado = construir_cv(perfil, secciones, motor)
+        try:
+            # Uno con certificados fallidos no se fija: la vista lo reintenta
+            if resultado.fallidos:
+                continue
+            fd, temporal = tempfile.mkstemp(dir=settings.SITIO_ESTATICO_DIR, suffix='.pdf.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                shutil.copyfileobj(resultado.archivo, f)
+            nuevos[relativa] = temporal
+        finally:
+            resultado.archivo.close()
+    return nuevos
+
+
+def _pdfs_publicados(generacion, perfil):
+    """Rutas relativas de los PDF de la versión actual del perfil (y de hoy, los con fecha) en 'generacion'."""
+    if generacion is None:
+        return set()
+    publicados = set()
+    version = os.path.join('cv', str(perfil.version_contenido))
+    for relativa in (version, os.path.join(version, _hoy())):
+        directorio = os.path.join(generacion, relativa)
+        if os.path.isdir(directorio):
+            publicados.update(os.path.join(relativa, n) for n in os.listdir(directorio) if n.endswith('.pdf'))
+    return publicados
+
+
+def _publicar(perfil, paginas, omitir=(), pdfs=None):
+    """
+    Arma una generación con 'paginas' ({nombre: html o None}) y 'pdfs' ({relativa: temporal}),
+    enlaza de la publicada el resto (salvo las de 'omitir' y los PDF de otras versiones) y la
+    publica. No publica si el perfil cambió desde que se renderizó: ya viene otra regeneración.
+    """
+    pdfs = pdfs or {}
+    with _bloqueo():
+        try:
+            vigente = DatosPersonales.objects.filter(pk=perfil.pk).values_list('version_contenido', flat=True).first()
+            if vigente != perfil.version_contenido:
+                return False
+            anterior, idperfil_anterior, fecha_anterior = _leer_puntero()
+            if idperfil_anterior != perfil.pk:
+                anterior = None  # Cambió el perfil activo: nada de la generación anterior sirve
+            hoy = _hoy()
+            if fecha_anterior != hoy:
+                omitir = set(omitir) | set(PAGINAS_DEL_DIA)
+            nueva = os.path.join(settings.SITIO_ESTATICO_DIR, f'g-{time.time_ns()}')
+            for nombre in PAGINAS:
+                destino = os.path.join(nueva, _ruta_relativa_pagina(nombre))
+                if nombre in paginas:
+                    if paginas[nombre] is not None:
+                        _escribir(destino, paginas[nombre])
+                elif nombre not in omitir and anterior and os.path.exists(os.path.join(anterior, _ruta_relativa_pagina(nombre))):
+                    _enlazar(os.path.join(anterior, _ruta_relativa_pagina(nombre)), destino)
+            for relativa in _pdfs_publicados(anterior, perfil) - set(pdfs):
+                _enlazar(os.path.join(anterior, relativa), os.path.join(nueva, relativa))
+            for relativa, temporal in pdfs.items():
+                os.makedirs(os.path.dirname(os.path.join(nueva, relativa)), exist_ok=True)
+                os.replace(temporal, os.path.join(nueva, relativa))
+            os.makedirs(nueva, exist_ok=True)
+
+            _escribir(os.path.join(settings.SITIO_ESTATICO_DIR, PUNTERO),
+                      f'{os.path.basename(nueva)} {perfil.pk} {hoy}'.encode('utf-8'))
+            conservar = {os.path.basename(nueva), os.path.basename(anterior or '')}
+            for nombre in os.listdir(settings.SITIO_ESTATICO_DIR):
+                if nombre.startswith('g-') and nombre not in conservar:
+                    shutil.rmtree(os.path.join(settings.SITIO_ESTATICO_DIR, nombre), ignore_errors=True)
+            return True
+        finally:
+            for temporal in pdfs.values():
+                if os.path.exists(temporal):
+                    os.remove(temporal)
+
+
+def exportar(nombres=None, pdfs=True, motor=None):
+    """
+    Renderiza las páginas 'nombres' (todas por defecto) y, con 'pdfs', los PDF que falten de
+    la versión actual, y publica la generación. Devuelve (páginas escritas, PDF nuevos) o
+    None si no hay perfil o cambió mientras tanto.
+    """
+    perfil = perfil_activo()
+    if perfil is None:
+        return None
+    nombres = list(PAGINAS) if nombres is None else nombres
+    paginas = renderizar_paginas(perfil, nombres)
+    nuevos = {}
+    if pdfs:
+        generacion, idperfil, _ = _leer_puntero()
+        existentes = _pdfs_publicados(generacion, perfil) if idperfil == perfil.pk else set()
+        nuevos = construir_pdfs(perfil, motor or settings.PDF_MOTOR, existentes)
+    escritos = list(nuevos)
+    if not _publicar(perfil, paginas, pdfs=nuevos):
+        return None
+    return [nombre for nombre, html in paginas.items() if html is not None], escritos
+
+
+# Páginas por regenerar y si hay un hilo trabajando en ellas (uno por proceso)
+_pendientes = set()
+_regenerando = False
+_lock_pendientes = threading.Lock()
+
+
+def _regenerar():
+    global _pendientes, _regenerando
+    try:
+        while True:
+            with _lock_pendientes:
+                nombres, _pendientes = _pendientes, set()
+                if not nombres:
+                    _regenerando = False
+                    return
+            try:
+                exportar([n for n in PAGINAS if n in nombres])
+            except Exception:
+                logger.exception("No se pudo regenerar el sitio estático")
+    finally:
+        connections.close_all()  # Las conexiones de este hilo
+
+
+def _despublicar():
+    with _bloqueo():
+        try:
+            os.remove(os.path.join(settings.SITIO_ESTATICO_DIR, PUNTERO))
+        except FileNotFoundError:
+            pass
+
+
+def _confirmado(idperfil, nombres):
+    global _regenerando
+    perfil = perfil_activo()
+    _, exportado, _ = _leer_puntero()
+    if exportado is None:
+        return  # Todavía no se exportó: lo hace el comando
+    if perfil is None:
+        _despublicar()  # Se borró el único perfil
+        return
+    if idperfil not in (perfil.pk, exportado):
+        return  # Cambio de un perfil que no es el de la copia estática
+    if perfil.pk != exportado:
+        nombres = list(PAGINAS)
+    with _lock_pendientes:
+        nuevas = set(nombres) - _pendientes
+        if not nuevas:
+            return  # Ya se quitaron y están en cola (p. ej. el borrado en cascada de muchas filas)
+        _pendientes.update(nuevas)
+        arrancar, _regenerando = not _regenerando, True
+    # Fuera de inmediato lo desactualizado (responde Django); se vuelve a renderizar en un hilo
+    _publicar(perfil, {}, omitir=nuevas)
+    if arrancar:
+        threading.Thread(target=_regenerar, daemon=True).start()
+
+
+def contenido_modificado(idperfil, modelo=None):
+    """
+    Llamado por las señales: cuando se confirma la transacción, y si el cambio es del perfil
+    de la copia estática, quita las páginas que dependen de 'modelo' (o todas si cambió el
+    perfil) y las vuelve a generar en segundo plano junto con los PDF.
+    """
+    if not settings.SITIO_ESTATICO:
+        return
+    nombres = [n for n, m in PAGINAS.items() if modelo is None or m is modelo]
+    transaction.on_commit(lambda: _confirmado(idperfil, nombres))
@@ -0,0 +1,13 @@
+from django import template
+from django.urls import reverse
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def url_perfil(context, nombre):
+    """Como {% url %}, pero dentro de /p/<slug>/ devuelve la ruta del mismo perfil."""
+    request = context.get('request')
+    coincidencia = getattr(request, 'resolver_match', None)
+    slug = coincidencia.kwargs.get('slug') if coincidencia else None
+    return reverse(nombre, kwargs={'slug': slug} if slug else None)
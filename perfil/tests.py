@@ -1,3 +1,633 @@
-from django.test import TestCase
+import datetime
+import importlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from . import activo, admision, busqueda, certificados, coalescencia, models, reportes, sitio_estatico, trabajos
+from .cache_perfil import cache_de
+from .fotos import generar_variantes
+from .imagenes import imagen_para_pdf
+from .ingesta import ingerir_certificado
+from .management.commands.benchmark_pdf import percentil
+from .models import CursosRealizados, DatosPersonales, ExperienciaLaboral, ResumenPerfil, VentaGarage
+from .paginacion import pagina_seccion
+from .resumen import resumen_de
+
+CACHE_PRUEBAS = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'pruebas'}}
+
+
+def crear_perfil(nombres, apellidos, **extra):
+    return DatosPersonales.objects.create(
+        nombres=nombres, apellidos=apellidos, numerocedula=nombres[:10], sexo='H',
+        correo=f'{nombres.lower()}@ejemplo.com', **extra,
+    )
+
+
+def crear_curso(perfil, nombre, fechainicio=datetime.date(2020, 1, 1), horas=10):
+    return CursosRealizados.objects.create(
+        idperfil=perfil, nombrecurso=nombre, fechainicio=fechainicio, fechafin=fechainicio,
+        totalhoras=horas, descripcioncurso='d', entidadpatrocinadora='e',
+        nombrecontactoauspicia='n', telefonocontactoauspicia='1', emailempresapatrocinadora='a@b.c',
+    )
+
+
+def crear_experiencia(perfil, cargo):
+    return ExperienciaLaboral.objects.create(
+        idperfil=perfil, cargodesempenado=cargo, nombrempresa='x', lugarempresa='y', emailempresa='a@b.c',
+        nombrecontactoempresarial='n', telefonocontactoempresarial='1',
+        fechainiciogestion=datetime.date(2019, 1, 1), descripcionfunciones='f',
+    )
+
+
+@override_settings(CACHES=CACHE_PRUEBAS, SITIO_ESTATICO=False, PDF_MODO_ASINCRONO=False)
+class PruebaPerfil(TestCase):
+    """Caché en memoria y carpetas de trabajo temporales: las pruebas no tocan cache/ del proyecto."""
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        carpetas = override_settings(
+            CERTIFICADOS_CACHE_DIR=f'{directorio}/certificados', PDF_IMAGENES_DIR=f'{directorio}/imagenes',
+            PDF_ARTEFACTOS_DIR=f'{directorio}/artefactos', PDF_ADMISION_DIR=f'{directorio}/admision',
+            PDF_COALESCER_DIR=f'{directorio}/coalescer',
+        )
+        carpetas.enable()
+        self.addCleanup(carpetas.disable)
+        cache.clear()
+        self.perfil = crear_perfil('Ana', 'Pérez', perfilactivo=1)
+        cache_de(self.perfil).clear()
+
+    def guardar(self, funcion, *args, **kwargs):
+        """Guarda con los on_commit ejecutados (versión del contenido y perfil memorizado)."""
+        with self.captureOnCommitCallbacks(execute=True):
+            resultado = funcion(*args, **kwargs)
+        self.perfil.refresh_from_db()
+        return resultado
+
+
+class PercentilTests(SimpleTestCase):
+    """Rango más cercano: el menor valor que deja al menos el p% de la muestra a su izquierda."""
+
+    def test_mediana(self):
+        self.assertEqual(percentil(range(1, 11), 50), 5)
+        self.assertEqual(percentil([1, 2], 50), 1)
+        self.assertEqual(percentil([7], 50), 7)
+
+    def test_p95(self):
+        self.assertEqual(percentil(range(1, 21), 95), 19)
+        self.assertEqual(percentil(range(1, 101), 95), 95)
+        self.assertEqual(percentil(range(1, 11), 95), 10)
+
+    def test_no_depende_del_orden(self):
+        self.assertEqual(percentil([5, 1, 4, 2, 3], 50), 3)
+
+
+@override_settings(PDF_FRAGMENTOS=True)
+class FragmentosPDFTests(PruebaPerfil):
+
+    def renderizados(self, secciones=('exp', 'cur')):
+        """Plantillas que pisa tuvo que renderizar para armar el PDF."""
+        with mock.patch.object(reportes, '_pisa_a_bytes', wraps=reportes._pisa_a_bytes) as pisa:
+            reportes.construir_cv(self.perfil, secciones).archivo.close()
+        return sorted(llamada.args[0] for llamada in pisa.call_args_list)
+
+    def setUp(self):
+        super().setUp()
+        self.experiencia = self.guardar(crear_experiencia, self.perfil, 'Analista')
+        self.curso = self.guardar(crear_curso, self.perfil, 'Django')
+
+    def test_segundo_armado_sale_de_la_cache(self):
+        self.assertEqual(len(self.renderizados()), 3)  # Encabezado, experiencia y cursos
+        self.assertEqual(self.renderizados(), [])
+
+    def test_cambiar_una_seccion_solo_renderiza_esa(self):
+        self.renderizados()
+        self.curso.nombrecurso = 'Django avanzado'
+        self.guardar(self.curso.save)
+        self.assertEqual(self.renderizados(), ['reportes/secciones/cursos.html'])
+
+    def test_cambiar_el_perfil_solo_renderiza_el_encabezado(self):
+        self.renderizados()
+        self.perfil.descripcionperfil = 'Otra descripción'
+        self.guardar(self.perfil.save)
+        self.assertEqual(self.renderizados(), ['reportes/secciones/encabezado.html'])
+
+
+class AdmisionPDFTests(PruebaPerfil):
+
+    @override_settings(PDF_ESPERA_ADMISION=0.2, PDF_RETRY_AFTER=7)
+    def test_503_sin_turno_libre(self):
+        # Con el único turno del perfil ocupado, la descarga no espera más que PDF_ESPERA_ADMISION
+        with admision.admitir(self.perfil):
+            respuesta = self.client.get('/reporte-personal/')
+        self.assertEqual(respuesta.status_code, 503)
+        self.assertEqual(respuesta['Retry-After'], '7')
+        self.assertEqual(self.client.get('/reporte-personal/').status_code, 200)
+
+
+class PaginacionTests(PruebaPerfil):
+
+    def recorrer(self, tamano):
+        paginas, cursor = [], None
+        while True:
+            pagina = pagina_seccion(CursosRealizados, self.perfil, cursor, tamano)
+            paginas.append([c.nombrecurso for c in pagina.items])
+            if pagina.siguiente is None:
+                return paginas
+            cursor = pagina.siguiente
+
+    def test_empates_de_fecha_sin_repetir_ni_saltar(self):
+        # Misma fecha: el orden lo decide la pk, de mayor a menor
+        for n in range(5):
+            crear_curso(self.perfil, f'c{n}')
+        self.assertEqual(self.recorrer(2), [['c4', 'c3'], ['c2', 'c1'], ['c0']])
+
+    def test_ultima_pagina_llena_no_tiene_siguiente(self):
+        for n in range(4):
+            crear_curso(self.perfil, f'c{n}', fechainicio=datetime.date(2020, 1, n + 1))
+        self.assertEqual(self.recorrer(2), [['c3', 'c2'], ['c1', 'c0']])
+        self.assertEqual(self.recorrer(4), [['c3', 'c2', 'c1', 'c0']])
+
+    def test_cursor_invalido_da_la_primera_pagina(self):
+        for n in range(3):
+            crear_curso(self.perfil, f'c{n}')
+        pagina = pagina_seccion(CursosRealizados, self.perfil, 'no-es-un-cursor', 2)
+        self.assertEqual([c.nombrecurso for c in pagina.items], ['c2', 'c1'])
+
+    def test_sin_filas(self):
+        self.assertEqual(self.recorrer(2), [[]])
+
+    @override_settings(SECCIONES_POR_PAGINA=2)
+    def test_la_pagina_enlaza_a_la_siguiente(self):
+        for n in range(3):
+            crear_curso(self.perfil, f'c{n}')
+        primera = self.client.get('/cursos/')
+        self.assertContains(primera, 'c2')
+        self.assertNotContains(primera, 'c0')
+        cursor = pagina_seccion(CursosRealizados, self.perfil, None, 2).siguiente
+        segunda = self.client.get('/cursos/', {'cursor': cursor})
+        self.assertContains(segunda, 'c0')
+        self.assertNotContains(segunda, 'c2')
+
+
+class PaginaCondicionalTests(PruebaPerfil):
+
+    def test_304_con_el_etag_vigente(self):
+        respuesta = self.client.get('/experiencia/')
+        self.assertEqual(respuesta.status_code, 200)
+        etag = respuesta['ETag']
+        self.assertEqual(self.client.get('/experiencia/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_el_etag_cambia_al_guardar_una_seccion(self):
+        etag = self.client.get('/experiencia/')['ETag']
+        self.guardar(crear_experiencia, self.perfil, 'Desarrolladora')
+        respuesta = self.client.get('/experiencia/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, 'Desarrolladora')
+        self.assertNotEqual(respuesta['ETag'], etag)
+
+    def test_el_etag_depende_de_la_consulta(self):
+        etag = self.client.get('/cursos/')['ETag']
+        self.assertEqual(self.client.get('/cursos/', {'cursor': 'x'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class PerfilPorSlugTests(PruebaPerfil):
+
+    def setUp(self):
+        super().setUp()
+        self.otro = crear_perfil('Luis', 'Mora', perfilactivo=0)
+        cache_de(self.otro).clear()
+        crear_curso(self.perfil, 'Curso de Ana')
+        crear_curso(self.otro, 'Curso de Luis')
+
+    def test_cada_ruta_muestra_su_perfil(self):
+        raiz = self.client.get('/cursos/')
+        self.assertContains(raiz, 'Curso de Ana')
+        self.assertNotContains(raiz, 'Curso de Luis')
+        otro = self.client.get(f'/p/{self.otro.slug}/cursos/')
+        self.assertContains(otro, 'Curso de Luis')
+        self.assertNotContains(otro, 'Curso de Ana')
+
+    def test_etag_y_cache_separados(self):
+        etag = self.client.get('/cursos/')['ETag']
+        respuesta = self.client.get(f'/p/{self.otro.slug}/cursos/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, 'Curso de Luis')
+
+    def test_el_api_no_mezcla_perfiles(self):
+        respuesta = self.client.get(f'/p/{self.otro.slug}/api/cursos/', {'fields': 'nombrecurso'})
+        datos = json.loads(b''.join(respuesta.streaming_content))
+        self.assertEqual([c['nombrecurso'] for c in datos['items']], ['Curso de Luis'])
+
+    def test_slug_inexistente_es_404(self):
+        self.assertEqual(self.client.get('/p/no-existe/cursos/').status_code, 404)
+        self.assertEqual(self.client.get('/p/no-existe/').status_code, 404)
+
+
+class CoalescenciaTests(SimpleTestCase):
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        carpeta = override_settings(PDF_COALESCER_DIR=directorio)
+        carpeta.enable()
+        self.addCleanup(carpeta.disable)
+
+    def simultaneas(self, cuantas, duracion):
+        """Resultado de cada petición idéntica: 'armado', 'esperado' u 'ocupado'."""
+        resultados = []
+        armando = threading.Event()
+
+        def peticion(primera):
+            try:
+                with coalescencia.un_solo_armado('cv:1:1:base:xhtml2pdf'):
+                    if primera:
+                        armando.set()
+                        time.sleep(duracion)
+                    resultados.append('armado' if primera else 'esperado')
+            except coalescencia.Ocupado:
+                resultados.append('ocupado')
+
+        hilos = [threading.Thread(target=peticion, args=(n == 0,)) for n in range(cuantas)]
+        hilos[0].start()
+        armando.wait()
+        for hilo in hilos[1:]:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        return sorted(resultados)
+
+    @override_settings(PDF_ESPERA_ADMISION=0.05, PDF_ESPERA_COALESCENCIA=5)
+    def test_las_identicas_esperan_al_armado_mas_alla_de_la_admision(self):
+        self.assertEqual(self.simultaneas(3, 0.5), ['armado', 'esperado', 'esperado'])
+
+    @override_settings(PDF_ESPERA_COALESCENCIA=0.1)
+    def test_ocupado_si_el_armado_pasa_de_su_limite(self):
+        self.assertEqual(self.simultaneas(2, 0.5), ['armado', 'ocupado'])
+
+
+class CachePaginaTests(PruebaPerfil):
+
+    def test_hit_tras_el_primer_render(self):
+        self.assertEqual(self.client.get('/')['X-Cache-Pagina'], 'MISS')
+        self.assertEqual(self.client.get('/')['X-Cache-Pagina'], 'HIT')
+
+    def test_un_error_no_se_guarda(self):
+        self.client.raise_request_exception = False
+        with mock.patch('perfil.views.resumen_de', side_effect=RuntimeError('falla de la base')):
+            respuesta = self.client.get('/')
+        self.assertEqual(respuesta.status_code, 500)
+        self.assertNotIn('ETag', respuesta)
+        self.assertNotIn(b'falla de la base', respuesta.content)
+        respuesta = self.client.get('/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['X-Cache-Pagina'], 'MISS')
+
+
+class IngestaCertificadoTests(PruebaPerfil):
+
+    def ingerir(self, nombre, datos):
+        curso = CursosRealizados(idperfil=self.perfil, rutacertificado=SimpleUploadedFile(nombre, datos))
+        return curso, ingerir_certificado(curso)
+
+    def png(self, lado):
+        salida = io.BytesIO()
+        Image.new('RGB', (lado, lado), 'white').save(salida, 'PNG')
+        return salida.getvalue()
+
+    def test_imagen_se_convierte_a_pdf(self):
+        curso, error = self.ingerir('c.png', self.png(50))
+        self.assertIsNone(error)
+        self.assertTrue(curso.certificado_valido)
+        self.assertEqual(curso.certificado_paginas, 1)
+        self.assertEqual(curso.rutacertificado.name, 'c.pdf')
+
+    def test_imagen_gigante_queda_invalida(self):
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 100):
+            curso, error = self.ingerir('c.png', self.png(50))
+        self.assertEqual(error, 'la imagen es demasiado grande')
+        self.assertIs(curso.certificado_valido, False)
+
+    def test_error_inesperado_de_pypdf_queda_invalido(self):
+        with mock.patch('perfil.ingesta.PdfReader', side_effect=RecursionError('xref circular')), \
+                self.assertLogs('perfil.ingesta', 'ERROR'):
+            curso, error = self.ingerir('c.pdf', b'%PDF-1.4 roto')
+        self.assertEqual(error, 'no se pudo leer el PDF')
+        self.assertIs(curso.certificado_valido, False)
+
+    def test_ni_pdf_ni_imagen(self):
+        curso, error = self.ingerir('c.txt', b'hola')
+        self.assertIsInstance(error, str)
+        self.assertIs(curso.certificado_valido, False)
+
+
+class VariantesFotoTests(PruebaPerfil):
+
+    def test_foto_gigante_se_muestra_sin_variantes(self):
+        salida = io.BytesIO()
+        Image.new('RGB', (50, 50), 'white').save(salida, 'JPEG')
+        articulo = VentaGarage(idperfil=self.perfil, fotoproducto=SimpleUploadedFile('f.jpg', salida.getvalue()))
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 100):
+            error = generar_variantes(articulo)
+        self.assertIsNotNone(error)
+        self.assertEqual(articulo.fotoproducto_variantes, {})
+
+
+class ResumenTests(PruebaPerfil):
+
+    def test_los_totales_siguen_a_las_filas(self):
+        experiencia = self.guardar(crear_experiencia, self.perfil, 'Analista')
+        curso = self.guardar(crear_curso, self.perfil, 'Django', horas=40)
+        self.guardar(crear_curso, self.perfil, 'Python', horas=20)
+        curso.activarparaqueseveaenfront = False
+        self.guardar(curso.save)
+        self.guardar(experiencia.delete)
+        resumen = ResumenPerfil.objects.get(pk=self.perfil.pk)
+        self.assertEqual((resumen.experiencias, resumen.cursos, resumen.horas_cursos), (0, 1, 20))
+        resumen.delete()
+        resumen_de(self.perfil)
+        reconstruido = ResumenPerfil.objects.get(pk=self.perfil.pk)
+        self.assertEqual((reconstruido.experiencias, reconstruido.cursos, reconstruido.horas_cursos), (0, 1, 20))
+
+    def test_etag_y_cache_cambian_con_el_dia(self):
+        self.guardar(crear_experiencia, self.perfil, 'Analista')
+        hoy = datetime.date(2024, 1, 1)
+        with mock.patch('django.utils.timezone.localdate', return_value=hoy):
+            respuesta = self.client.get('/')
+            self.assertContains(respuesta, '<p class="fs-5">5</p>', html=True)
+            etag = respuesta['ETag']
+        with mock.patch('django.utils.timezone.localdate', return_value=hoy + datetime.timedelta(days=365)):
+            respuesta = self.client.get('/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['X-Cache-Pagina'], 'MISS')
+        self.assertContains(respuesta, '<p class="fs-5">6</p>', html=True)
+
+    def test_la_clave_del_pdf_cambia_con_el_dia_solo_con_experiencia(self):
+        def claves(fecha):
+            with mock.patch('django.utils.timezone.localdate', return_value=fecha):
+                return reportes.clave_cv(self.perfil, ['exp'], 'xhtml2pdf'), reportes.clave_cv(self.perfil, ['cur'], 'xhtml2pdf')
+        con_exp, sin_exp = claves(datetime.date(2024, 1, 1))
+        con_exp_manana, sin_exp_manana = claves(datetime.date(2024, 1, 2))
+        self.assertNotEqual(con_exp, con_exp_manana)
+        self.assertEqual(sin_exp, sin_exp_manana)
+
+    def test_el_sitio_estatico_no_sirve_la_portada_de_otro_dia(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        with open(f'{directorio}/actual', 'w', encoding='utf-8') as f:
+            f.write(f'g-1 {self.perfil.pk} 2024-01-01')
+        with override_settings(SITIO_ESTATICO_DIR=directorio):
+            with mock.patch('django.utils.timezone.localdate', return_value=datetime.date(2024, 1, 1)):
+                self.assertEqual(sitio_estatico.urls_vencidas(), set())
+            with mock.patch('django.utils.timezone.localdate', return_value=datetime.date(2024, 1, 2)):
+                self.assertEqual(sitio_estatico.urls_vencidas(), {'/'})
+
+
+class PerfilMemorizadoTests(PruebaPerfil):
+
+    def setUp(self):
+        super().setUp()
+        self.otro = self.guardar(crear_perfil, 'Luis', 'Mora', perfilactivo=0)
+
+    def test_guardar_un_perfil_no_descarta_los_demas(self):
+        self.assertEqual(activo.perfil_por_slug(self.otro.slug).pk, self.otro.pk)
+        self.guardar(crear_curso, self.perfil, 'Curso de Ana')
+        self.perfil.telefonoconvencional = '1'
+        self.guardar(self.perfil.save)
+        with self.assertNumQueries(0):
+            self.assertEqual(activo.perfil_por_slug(self.otro.slug).pk, self.otro.pk)
+
+    def test_una_seccion_actualiza_solo_su_perfil(self):
+        version = activo.perfil_activo().version_contenido
+        self.guardar(crear_curso, self.perfil, 'Curso de Ana')
+        self.assertGreater(activo.perfil_activo().version_contenido, version)
+
+    def test_cambio_de_perfil_activo_y_de_slug(self):
+        self.assertEqual(activo.perfil_activo().pk, self.perfil.pk)
+        anterior = self.otro.slug
+        self.assertIsNotNone(activo.perfil_por_slug(anterior))
+        DatosPersonales.objects.filter(pk=self.perfil.pk).update(perfilactivo=0)
+        self.otro.perfilactivo, self.otro.slug = 1, 'luis'
+        self.guardar(self.otro.save)
+        self.assertEqual(activo.perfil_activo().pk, self.otro.pk)
+        self.assertIsNone(activo.perfil_por_slug(anterior))
+        self.assertEqual(activo.perfil_por_slug('luis').pk, self.otro.pk)
+
+
+class MigracionSlugTests(TestCase):
+
+    def test_0019_usa_su_propia_copia_de_slug_disponible(self):
+        migracion = importlib.import_module('perfil.migrations.0019_datospersonales_slug')
+        self.assertIsNot(migracion.slug_disponible, models.slug_disponible)
+        crear_perfil('Ana', 'Pérez')
+        self.assertEqual(migracion.slug_disponible(DatosPersonales.objects.all(), 'Ana Pérez'), 'ana-perez-2')
+
+
+class CacheCertificadosTests(SimpleTestCase):
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        carpeta = override_settings(CERTIFICADOS_CACHE_DIR=directorio, CERTIFICADOS_CACHE_MAX_BYTES=1)
+        carpeta.enable()
+        self.addCleanup(carpeta.disable)
+
+    def blob(self, contenido):
+        ruta = certificados._ruta_blob(contenido.hex())
+        with open(ruta, 'wb') as f:
+            f.write(contenido)
+        return ruta
+
+    def test_otro_proceso_no_desaloja_un_blob_en_uso(self):
+        ruta = self.blob(b'%PDF-1')
+        descarga = certificados.Descarga('u', ruta, 'red', None)
+        with mock.patch.object(certificados, '_descargar_todos', return_value=[descarga]):
+            with certificados.descargar_certificados([('c.pdf', 'u')]):
+                # Otro worker no ve el _en_uso de este proceso: solo el bloqueo del archivo
+                with mock.patch.object(certificados, '_en_uso', Counter()):
+                    certificados._desalojar()
+                self.assertTrue(os.path.exists(ruta))
+        self.assertFalse(os.path.exists(ruta))
+
+    def test_un_blob_desalojado_antes_de_usarlo_se_vuelve_a_descargar(self):
+        ruta = self.blob(b'%PDF-2')
+        desalojada = certificados.Descarga('u', ruta + '.borrado', 'cache', None)
+        nueva = certificados.Descarga('u', ruta, 'red', None)
+        with mock.patch.object(certificados, '_descargar_todos', return_value=[desalojada]), \
+                mock.patch.object(certificados, '_descargar', return_value=nueva) as descargar:
+            with certificados.descargar_certificados([('c.pdf', 'u')]) as resultados:
+                self.assertEqual(resultados, [nueva])
+        descargar.assert_called_once()
+
+
+class SitioEstaticoTests(PruebaPerfil):
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        sitio = override_settings(SITIO_ESTATICO=True, SITIO_ESTATICO_DIR=directorio)
+        sitio.enable()
+        self.addCleanup(sitio.disable)
+        self.guardar(crear_curso, self.perfil, 'Curso exportado')
+        self.otro = self.guardar(crear_perfil, 'Luis', 'Mora', perfilactivo=0)
+        self.escritas, _ = sitio_estatico.exportar(pdfs=False)
+
+    def puntero(self):
+        with open(f'{settings.SITIO_ESTATICO_DIR}/{sitio_estatico.PUNTERO}', encoding='utf-8') as f:
+            return f.read()
+
+    def test_exporta_las_paginas_y_las_sirve_sin_django(self):
+        self.assertIn('cursos', self.escritas)
+        self.assertTrue(self.puntero().endswith(f' {self.perfil.pk} {timezone.localdate().isoformat()}'))
+        with mock.patch('perfil.views.pagina_seccion') as seccion:
+            respuesta = self.client.get('/cursos/')
+            self.assertIn(b'Curso exportado', b''.join(respuesta.streaming_content))
+        seccion.assert_not_called()
+
+    def test_un_cambio_quita_la_pagina_y_la_regenera(self):
+        with mock.patch('perfil.sitio_estatico.threading.Thread') as hilo:
+            self.guardar(crear_curso, self.perfil, 'Curso nuevo')
+        hilo.return_value.start.assert_called_once()
+        generacion = sitio_estatico.generacion_actual()
+        self.assertFalse(os.path.exists(f'{generacion}/cursos/index.html'))
+        self.assertTrue(os.path.exists(f'{generacion}/experiencia/index.html'))
+        with mock.patch('perfil.sitio_estatico.connections'):  # El hilo cierra las suyas; aquí es la de la prueba
+            sitio_estatico._regenerar()
+        self.assertContains(self.client.get('/cursos/'), 'Curso nuevo')
+
+    def test_ignora_otros_perfiles_y_los_cambios_revertidos(self):
+        puntero = self.puntero()
+        self.guardar(crear_curso, self.otro, 'Curso de Luis')
+        with self.captureOnCommitCallbacks(execute=True) as pendientes:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                crear_curso(self.perfil, 'Curso revertido')
+                raise RuntimeError
+        self.assertEqual(pendientes, [])
+        self.assertEqual(self.puntero(), puntero)
+
+
+@override_settings(PDF_IMAGEN_MAX_PX=32, PDF_IMAGEN_MAX_BYTES=1024 * 1024)
+class ImagenesPDFTests(SimpleTestCase):
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        carpeta = override_settings(PDF_IMAGENES_DIR=directorio)
+        carpeta.enable()
+        self.addCleanup(carpeta.disable)
+        buffer = io.BytesIO()
+        Image.new('RGB', (200, 200), 'red').save(buffer, 'JPEG')
+        respuesta = mock.MagicMock(headers={})
+        respuesta.iter_content.return_value = [buffer.getvalue()]
+        sesion = mock.patch('perfil.imagenes.obtener_sesion')
+        self.sesion = sesion.start().return_value
+        self.addCleanup(sesion.stop)
+        self.sesion.get.return_value.__enter__.return_value = respuesta
+
+    def test_desaloja_las_usadas_hace_mas_tiempo(self):
+        vieja = imagen_para_pdf('https://ejemplo.com/vieja.jpg')
+        os.utime(vieja, (0, 0))
+        usada = imagen_para_pdf('https://ejemplo.com/usada.jpg')
+        os.utime(usada, (0, 0))
+        imagen_para_pdf('https://ejemplo.com/usada.jpg')  # Un acierto la marca como reciente
+        with override_settings(PDF_IMAGENES_MAX_BYTES=os.path.getsize(usada) * 2):
+            nueva = imagen_para_pdf('https://ejemplo.com/nueva.jpg')
+        self.assertFalse(os.path.exists(vieja))
+        self.assertTrue(os.path.exists(usada))
+        self.assertTrue(os.path.exists(nueva))
+
+    def test_una_imagen_desalojada_se_vuelve_a_preparar(self):
+        url = 'https://ejemplo.com/foto.jpg'
+        ruta = reportes.link_callback(url, None)
+        os.remove(ruta)
+        self.assertEqual(reportes.link_callback(url, None), ruta)
+        self.assertTrue(os.path.exists(ruta))
+        self.assertEqual(self.sesion.get.call_count, 2)
+
+    def test_una_bomba_de_descompresion_no_rompe_el_pdf(self):
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 100), self.assertLogs('perfil.imagenes', 'WARNING'):
+            self.assertIsNone(imagen_para_pdf('https://ejemplo.com/bomba.jpg'))
+
+
+class TrabajosPDFTests(PruebaPerfil):
+
+    def test_encolar_reutiliza_el_identico_pendiente(self):
+        primero = trabajos.encolar(self.perfil, ('exp', 'cur'))
+        self.assertEqual(trabajos.encolar(self.perfil, ('exp', 'cur')), primero)
+        self.assertNotEqual(trabajos.encolar(self.perfil, ('cur',)), primero)
+
+    def test_un_perfil_no_ocupa_todos_los_workers(self):
+        otro = crear_perfil('Luis', 'Mora')
+        trabajos.encolar(self.perfil, ('exp',))
+        trabajos.encolar(self.perfil, ('cur',))
+        del_otro = trabajos.encolar(otro, ())
+        self.assertEqual(trabajos.reclamar_siguiente().idperfil_id, self.perfil.pk)
+        self.assertEqual(trabajos.reclamar_siguiente(), del_otro)
+        self.assertIsNone(trabajos.reclamar_siguiente())
+
+    def test_listo_se_descarga(self):
+        trabajo = trabajos.procesar(trabajos.encolar(self.perfil, ()))
+        estado = self.client.get(f'/reporte-personal/trabajos/{trabajo.token}/').json()
+        self.assertEqual(estado['estado'], 'listo')
+        respuesta = self.client.get(estado['url_descarga'])
+        self.assertTrue(b''.join(respuesta.streaming_content).startswith(b'%PDF'))
+        respuesta.close()
+
+    def test_el_error_no_se_muestra_al_visitante(self):
+        trabajo = trabajos.encolar(self.perfil, ())
+        with mock.patch('perfil.trabajos.construir_cv', side_effect=RuntimeError('/ruta/secreta')), \
+                self.assertLogs('perfil.trabajos', 'ERROR'):
+            trabajos.procesar(trabajo)
+        self.assertIn('/ruta/secreta', trabajo.error)
+        respuesta = self.client.get(f'/reporte-personal/trabajos/{trabajo.token}/')
+        self.assertEqual(respuesta.json()['estado'], 'error')
+        self.assertNotContains(respuesta, 'secreta')
+
+
+class BusquedaTests(PruebaPerfil):
+
+    def setUp(self):
+        super().setUp()
+        self.curso = self.guardar(crear_curso, self.perfil, 'Programación en Django')
+        self.experiencia = crear_experiencia(self.perfil, 'Analista')
+        self.experiencia.descripcionfunciones = 'Mantenimiento de sitios en Django <b>y</b> Python'
+        self.experiencia.save()
+
+    def resultados(self, consulta, perfil=None):
+        return [(r.seccion, r.idobjeto) for r in busqueda.buscar(perfil or self.perfil, consulta)]
+
+    def test_prefijos_y_el_titulo_pesa_mas(self):
+        self.assertEqual(self.resultados('djan'), [
+            ('cur', self.curso.pk), ('exp', self.experiencia.pk),
+        ])
+        self.assertEqual(self.resultados('django python'), [('exp', self.experiencia.pk)])
+
+    def test_filas_ocultas_secciones_apagadas_y_otros_perfiles(self):
+        self.curso.activarparaqueseveaenfront = False
+        self.curso.save()
+        self.assertEqual(self.resultados('django'), [('exp', self.experiencia.pk)])
+        self.perfil.ver_experiencia = False
+        self.assertEqual(self.resultados('django'), [])
+        self.assertEqual(self.resultados('django', crear_perfil('Luis', 'Mora')), [])
+
+    def test_la_sintaxis_del_motor_no_pasa_y_el_fragmento_va_escapado(self):
+        self.assertEqual(self.resultados('"django" -python*)'), [('exp', self.experiencia.pk)])
+        respuesta = self.client.get('/buscar/', {'q': 'python'})
+        self.assertContains(respuesta, '<mark>Python</mark>')
+        self.assertContains(respuesta, '&lt;b&gt;y&lt;/b&gt;')
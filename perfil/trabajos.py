@@ -0,0 +1,95 @@
+import logging
+import os
+import shutil
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .cache_perfil import cache_de
+from .models import DatosPersonales, TrabajoPDF
+from .reportes import clave_cv, construir_cv, guardar_en_cache
+
+logger = logging.getLogger(__name__)
+
+
+def ruta_artefacto(trabajo):
+    """PDF_ARTEFACTOS_DIR/<perfil>/<token>.pdf: cada perfil en su carpeta."""
+    directorio = os.path.join(settings.PDF_ARTEFACTOS_DIR, str(trabajo.idperfil_id))
+    os.makedirs(directorio, exist_ok=True)
+    return os.path.join(directorio, f'{trabajo.token.hex}.pdf')
+
+
+def encolar(perfil, secciones):
+    """Crea el trabajo, o reutiliza uno idéntico que todavía no haya terminado."""
+    codigo = '-'.join(secciones)
+    existente = TrabajoPDF.objects.filter(
+        idperfil=perfil, secciones=codigo, estado__in=('pendiente', 'procesando'),
+    ).first()
+    if existente:
+        return existente
+    return TrabajoPDF.objects.create(idperfil=perfil, secciones=codigo)
+
+
+def reclamar_siguiente():
+    """
+    Toma el trabajo pendiente más antiguo de un perfil que no tenga otro en proceso, para
+    que un perfil con muchos pedidos no ocupe a todos los workers. El UPDATE condicionado al
+    estado hace que, con varios workers, solo uno de ellos lo consiga (SQLite y PostgreSQL).
+    """
+    ocupados = TrabajoPDF.objects.filter(estado='procesando').values('idperfil')
+    pendientes = TrabajoPDF.objects.filter(estado='pendiente').exclude(idperfil__in=ocupados)
+    for trabajo in pendientes.order_by('fechacreacion')[:5]:
+        tomado = TrabajoPDF.objects.filter(pk=trabajo.pk, estado='pendiente').update(
+            estado='procesando', fechainicio=timezone.now(),
+        )
+        if tomado:
+            trabajo.refresh_from_db()
+            return trabajo
+    return None
+
+
+def procesar(trabajo):
+    """Genera el PDF del trabajo y lo deja en PDF_ARTEFACTOS_DIR."""
+    perfil = DatosPersonales.objects.get(pk=trabajo.idperfil_id)
+    secciones = tuple(s for s in trabajo.secciones.split('-') if s)
+    destino = ruta_artefacto(trabajo)
+    motor = settings.PDF_MOTOR
+    try:
+        contenido = cache_de(perfil).get(clave_cv(perfil, secciones, motor))
+        if contenido is not None:
+            with open(destino, 'wb') as f:
+                f.write(contenido)
+        else:
+            resultado = construir_cv(perfil, secciones, motor)
+            guardar_en_cache(perfil, clave_cv(perfil, secciones, motor), resultado)
+            with resultado.archivo, open(destino, 'wb') as f:
+                shutil.copyfileobj(resultado.archivo, f)
+    except Exception as e:
+        logger.exception("Falló el trabajo PDF %s", trabajo.token)
+        trabajo.estado, trabajo.error = 'error', str(e)[:250]  # Solo para el Admin
+    else:
+        trabajo.estado, trabajo.rutaarchivo = 'listo', destino
+    trabajo.fechafin = timezone.now()
+    trabajo.save(update_fields=['estado', 'error', 'rutaarchivo', 'fechafin'])
+    return trabajo
+
+
+def rescatar_abandonados(minutos):
+    """Devuelve a la cola los trabajos de un worker que murió a mitad del proceso."""
+    limite = timezone.now() - timedelta(minutes=minutos)
+    return TrabajoPDF.objects.filter(estado='procesando', fechainicio__lt=limite).update(
+        estado='pendiente', fechainicio=None,
+    )
+
+
+def limpiar_antiguos(horas):
+    """Borra los trabajos terminados (y sus archivos) con más de 'horas' de antigüedad."""
+    limite = timezone.now() - timedelta(hours=horas)
+    viejos = TrabajoPDF.objects.filter(estado__in=('listo', 'error'), fechafin__lt=limite)
+    for ruta in viejos.exclude(rutaarchivo='').values_list('rutaarchivo', flat=True):
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+    return viejos.delete()[0]
@@ -1,7 +1,9 @@
-from django.urls import path
-from . import views
+from django.urls import include, path
+from . import api, views
 
-urlpatterns = [
+# Rutas de un perfil: en la raíz atienden al perfil activo y bajo p/<slug>/ al de ese slug
+# (las vistas reciben slug=None o el slug). {% url_perfil %} elige la que corresponde.
+rutas_perfil = [
     path('', views.home, name='home'),
     path('experiencia/', views.experiencia, name='experiencia'),
     path('cursos/', views.cursos, name='cursos'),
@@ -10,6 +12,18 @@ urlpatterns = [
     # Nueva ruta:
     path('productos-laborales/', views.productos_laborales, name='productos_laborales'),
     path('garage/', views.garage, name='garage'),
+    path('buscar/', views.buscar, name='buscar'),
     path('reporte-personal/', views.pdf_datos_personales, name='pdf_datos_personales'),
+    path('reporte-personal/trabajos/', views.pdf_encolar, name='pdf_encolar'),
+    # API JSON de solo lectura
+    path('api/perfil/', api.api_perfil, name='api_perfil'),
+    path('api/buscar/', api.api_buscar, name='api_buscar'),
+    path('api/<slug:seccion>/', api.api_seccion, name='api_seccion'),
 ]
 
+urlpatterns = rutas_perfil + [
+    path('p/<slug:slug>/', include(rutas_perfil)),
+    path('reporte-personal/estado/', views.pdf_estado, name='pdf_estado'),
+    path('reporte-personal/trabajos/<uuid:token>/', views.pdf_trabajo_estado, name='pdf_trabajo_estado'),
+    path('reporte-personal/trabajos/<uuid:token>/descargar/', views.pdf_trabajo_descargar, name='pdf_trabajo_descargar'),
+]
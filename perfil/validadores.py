@@ -0,0 +1,34 @@
+"""
+Validadores para GET condicional (ETag / Last-Modified). Salen de la versión del contenido
+del perfil de la ruta ya memorizado (activo.py), así que no consultan la base ni renderizan:
+si el cliente ya tiene la versión actual se le responde 304 antes de cualquier trabajo.
+También llevan la fecha: los años de experiencia en curso de la portada cambian con el día
+aunque nadie edite nada, así que cada página se vuelve a validar (y a cachear) una vez por día.
+"""
+import hashlib
+from datetime import datetime, time, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .activo import obtener_perfil
+
+
+def etag_contenido(request, *args, **kwargs):
+    """Ruta + perfil + versión del contenido + día + despliegue + consulta (fields, cursor...)."""
+    perfil = obtener_perfil(kwargs.get('slug'))
+    if perfil is None:
+        return None
+    consulta = hashlib.sha1(request.GET.urlencode().encode('utf-8')).hexdigest()[:12]
+    hoy = timezone.localdate().isoformat()
+    return f'{request.path}:{perfil.pk}:{perfil.version_contenido}:{hoy}:{settings.VERSION_DESPLIEGUE}:{consulta}'
+
+
+def ultima_modificacion(request, *args, **kwargs):
+    perfil = obtener_perfil(kwargs.get('slug'))
+    if perfil is None or not perfil.version_contenido:
+        return None
+    version = datetime.fromtimestamp(perfil.version_contenido / 1_000_000, tz=dt_timezone.utc)
+    # If-Modified-Since de ayer no vale hoy aunque el contenido no haya cambiado
+    inicio_del_dia = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+    return max(version, inicio_del_dia)
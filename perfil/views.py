@@ -1,168 +1,225 @@
-import os
-import io
-import requests
 from django.conf import settings
-from django.contrib.staticfiles import finders
-from django.shortcuts import render, get_object_or_404
-from django.http import HttpResponse
-from django.template.loader import get_template
-from xhtml2pdf import pisa
-from pypdf import PdfWriter 
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import redirect, render, get_object_or_404
+from django.http import FileResponse, HttpResponse, JsonResponse, Http404
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
 
 from .models import (
-    DatosPersonales, ExperienciaLaboral, CursosRealizados, 
+    ExperienciaLaboral, CursosRealizados, 
     Reconocimientos, ProductosAcademicos, ProductosLaborales, 
-    VentaGarage
+    VentaGarage, TrabajoPDF
 )
-
-def link_callback(uri, rel):
-    if uri.startswith('http'):
-        return uri
-    result = finders.find(uri)
-    if result:
-        if not isinstance(result, (list, tuple)):
-            result = [result]
-        result = list(os.path.realpath(path) for path in result)
-        path = result[0]
-    else:
-        s_url = settings.STATIC_URL
-        s_root = settings.STATIC_ROOT
-        m_url = settings.MEDIA_URL
-        m_root = settings.MEDIA_ROOT
-        if uri.startswith(m_url):
-            path = os.path.join(m_root, uri.replace(m_url, ""))
-        elif uri.startswith(s_url):
-            path = os.path.join(s_root, uri.replace(s_url, ""))
-        else:
-            return uri
-    return path
-
-def crear_caratula(texto):
-    packet = io.BytesIO()
-    can = canvas.Canvas(packet, pagesize=letter)
-    can.setFont("Helvetica-Bold", 32)
-    can.drawCentredString(300, 500, texto.upper())
-    can.save()
-    packet.seek(0)
-    return packet
+from .reportes import (
+    SECCIONES, ErrorGeneracionPDF, clave_cv, construir_cv, guardar_en_cache, motor_solicitado, secciones_solicitadas
+)
+from . import admision, busqueda, cache_paginas, certificados, coalescencia, sitio_estatico, trabajos
+from .activo import obtener_perfil
+from .cache_perfil import cache_de
+from .cache_paginas import cache_pagina
+from .paginacion import Pagina, pagina_seccion
+from .resumen import resumen_de, totales
+from .validadores import etag_contenido, ultima_modificacion
 
 # --- VISTAS DEL SITIO WEB CON FILTRO DE ADMIN ---
 
-def home(request):
-    try:
-        perfil = DatosPersonales.objects.filter(perfilactivo=1).first()
-        if not perfil:
-            perfil = DatosPersonales.objects.first()
-        if not perfil:
-            return HttpResponse("No hay perfiles creados.")
-        return render(request, 'home.html', {'perfil': perfil})
-    except Exception as e:
-        return HttpResponse(f"Error: {e}")
-
-def experiencia(request):
-    perfil = DatosPersonales.objects.filter(perfilactivo=1).first()
+def pagina_condicional(vista):
+    """
+    304 sin consultar ni renderizar si el navegador ya tiene la versión actual del contenido;
+    si no, la página sale de la caché de página completa cuando se puede (cache_paginas.py).
+    no-cache obliga al navegador a preguntar siempre, en lugar de adivinar cuánto guardarla.
+    """
+    vista = cache_pagina(vista)
+    vista = condition(etag_func=etag_contenido, last_modified_func=ultima_modificacion)(vista)
+    return cache_control(no_cache=True)(vista)
+
+def _perfil(slug):
+    """Perfil de la ruta (el activo en la raíz, el del slug en /p/<slug>/); 404 si no existe."""
+    perfil = obtener_perfil(slug)
+    if perfil is None:
+        raise Http404("No hay perfiles creados." if slug is None else "Perfil no encontrado.")
+    return perfil
+
+@pagina_condicional
+def home(request, slug=None):
+    # Un slug inexistente es 404; la raíz sin perfiles conserva su aviso
+    perfil = obtener_perfil(slug) if slug is None else _perfil(slug)
+    if not perfil:
+        return HttpResponse("No hay perfiles creados.")
+    # Totales de las secciones visibles: una consulta por clave primaria (ver resumen.py).
+    # Sin try/except: un error es un 500 sin ETag, que ni la caché de página ni el navegador guardan
+    visibles = [codigo for codigo, campo in SECCIONES if getattr(perfil, campo)]
+    return render(request, 'home.html', {'perfil': perfil, 'resumen': totales(resumen_de(perfil), visibles)})
+
+def _seccion(request, plantilla, perfil, modelo, visible):
     # Si está desactivado en Admin, enviamos lista vacía
-    items = ExperienciaLaboral.objects.filter(idperfil=perfil) if perfil.ver_experiencia else []
-    return render(request, 'experiencia.html', {'perfil': perfil, 'items': items})
-
-def cursos(request):
-    perfil = DatosPersonales.objects.filter(perfilactivo=1).first()
-    items = CursosRealizados.objects.filter(idperfil=perfil) if perfil.ver_cursos else []
-    return render(request, 'cursos.html', {'perfil': perfil, 'items': items})
-
-def reconocimientos(request):
-    perfil = DatosPersonales.objects.filter(perfilactivo=1).first()
-    items = Reconocimientos.objects.filter(idperfil=perfil) if perfil.ver_reconocimientos else []
-    return render(request, 'reconocimientos.html', {'perfil': perfil, 'items': items})
-
-def productos_academicos(request):
-    perfil = DatosPersonales.objects.filter(perfilactivo=1).first()
-    items = ProductosAcademicos.objects.filter(idperfil=perfil) if perfil.ver_productos_academicos else []
-    return render(request, 'productos_academicos.html', {'perfil': perfil, 'items': items})
-
-def productos_laborales(request):
-    perfil = DatosPersonales.objects.filter(perfilactivo=1).first()
-    items = ProductosLaborales.objects.filter(idperfil=perfil) if perfil.ver_productos_laborales else []
-    return render(request, 'productos_laborales.html', {'perfil': perfil, 'items': items})
-
-def garage(request):
-    perfil = DatosPersonales.objects.filter(perfilactivo=1).first()
-    items = VentaGarage.objects.filter(idperfil=perfil) if perfil.ver_garage else []
-    return render(request, 'garage.html', {'perfil': perfil, 'items': items})
+    if visible:
+        pagina = pagina_seccion(modelo, perfil, request.GET.get('cursor'), settings.SECCIONES_POR_PAGINA)
+    else:
+        pagina = Pagina([], None)
+    return render(request, plantilla, {
+        'perfil': perfil,
+        'items': pagina.items,
+        'siguiente': pagina.siguiente,
+        'paginado': 'cursor' in request.GET,
+    })
+
+@pagina_condicional
+def experiencia(request, slug=None):
+    perfil = _perfil(slug)
+    return _seccion(request, 'experiencia.html', perfil, ExperienciaLaboral, perfil.ver_experiencia)
+
+@pagina_condicional
+def cursos(request, slug=None):
+    perfil = _perfil(slug)
+    return _seccion(request, 'cursos.html', perfil, CursosRealizados, perfil.ver_cursos)
+
+@pagina_condicional
+def reconocimientos(request, slug=None):
+    perfil = _perfil(slug)
+    return _seccion(request, 'reconocimientos.html', perfil, Reconocimientos, perfil.ver_reconocimientos)
+
+@pagina_condicional
+def productos_academicos(request, slug=None):
+    perfil = _perfil(slug)
+    return _seccion(request, 'productos_academicos.html', perfil, ProductosAcademicos, perfil.ver_productos_academicos)
+
+@pagina_condicional
+def productos_laborales(request, slug=None):
+    perfil = _perfil(slug)
+    return _seccion(request, 'productos_laborales.html', perfil, ProductosLaborales, perfil.ver_productos_laborales)
+
+@pagina_condicional
+def garage(request, slug=None):
+    perfil = _perfil(slug)
+    return _seccion(request, 'garage.html', perfil, VentaGarage, perfil.ver_garage)
+
+@condition(etag_func=etag_contenido, last_modified_func=ultima_modificacion)
+@cache_control(no_cache=True)
+def buscar(request, slug=None):
+    # Sin caché de página: cada texto buscado sería una entrada distinta
+    perfil = _perfil(slug)
+    consulta = request.GET.get('q', '').strip()
+    resultados = [
+        {
+            'seccion': busqueda.NOMBRES_SECCION[r.seccion],
+            'url': reverse(busqueda.URLS_SECCION[r.seccion], kwargs={'slug': slug} if slug else None),
+            'titulo': r.titulo,
+            'fragmento': busqueda.resaltar(r.fragmento),
+        }
+        for r in busqueda.buscar(perfil, consulta, settings.BUSQUEDA_RESULTADOS)
+    ]
+    return render(request, 'busqueda.html', {'perfil': perfil, 'consulta': consulta, 'resultados': resultados})
 
 # --- VISTA PARA GENERAR EL PDF (JERARQUÍA COMPLETA) ---
 
-def pdf_datos_personales(request):
-    perfil = DatosPersonales.objects.filter(perfilactivo=1).first()
-    if not perfil:
-        perfil = get_object_or_404(DatosPersonales)
-
-    # 1. Captura de parámetros del Modal
-    incluir_exp = request.GET.get('exp') == 'on'
-    incluir_cur = request.GET.get('cur') == 'on'
-    incluir_rec = request.GET.get('rec') == 'on'
-    incluir_aca = request.GET.get('aca') == 'on'
-    incluir_lab = request.GET.get('lab') == 'on'
-    incluir_gar = request.GET.get('gar') == 'on'
-
-    # 2. Consultas: Solo si (Usuario quiere) Y (Admin permite)
-    experiencias = ExperienciaLaboral.objects.filter(idperfil=perfil, activarparaqueseveaenfront=True) if (incluir_exp and perfil.ver_experiencia) else []
-    productos_academicos = ProductosAcademicos.objects.filter(idperfil=perfil, activarparaqueseveaenfront=True) if (incluir_aca and perfil.ver_productos_academicos) else []
-    productos_laborales = ProductosLaborales.objects.filter(idperfil=perfil, activarparaqueseveaenfront=True) if (incluir_lab and perfil.ver_productos_laborales) else []
-    cursos_objs = CursosRealizados.objects.filter(idperfil=perfil, activarparaqueseveaenfront=True) if (incluir_cur and perfil.ver_cursos) else []
-    reconocimientos_objs = Reconocimientos.objects.filter(idperfil=perfil, activarparaqueseveaenfront=True) if (incluir_rec and perfil.ver_reconocimientos) else []
-    articulos_garage = VentaGarage.objects.filter(idperfil=perfil, activarparaqueseveaenfront=True) if (incluir_gar and perfil.ver_garage) else []
-    
-    # 3. Renderizado del Template
-    template = get_template('reportes/pdf_personales.html')
-    context = {
-        'perfil': perfil,
-        'items': experiencias,
-        'productos': productos_academicos,
-        'productos_laborales': productos_laborales,
-        'cursos': cursos_objs,
-        'reconocimientos': reconocimientos_objs,
-        'garage': articulos_garage,
-    }
-    html = template.render(context)
-    
-    buffer_cv_base = io.BytesIO()
-    pisa_status = pisa.CreatePDF(html, dest=buffer_cv_base, link_callback=link_callback)
-    
-    if pisa_status.err:
+def _pdf_desde_cache(perfil, contenido, estado):
+    response = HttpResponse(contenido, content_type='application/pdf', headers={'X-Cache-CV': estado})
+    response['Content-Disposition'] = f'inline; filename="CV_{perfil.apellidos}.pdf"'
+    return response
+
+def pdf_datos_personales(request, slug=None):
+    perfil = _perfil(slug)
+
+    # 1. Captura de parámetros del Modal: Solo si (Usuario quiere) Y (Admin permite)
+    secciones = secciones_solicitadas(perfil, request.GET)
+    motor = motor_solicitado(request.GET)
+
+    # Combinación frecuente ya exportada al sitio estático (solo el perfil de la raíz): la sirve WhiteNoise
+    if settings.SITIO_ESTATICO and slug is None:
+        url = sitio_estatico.url_pdf(perfil, secciones, motor)
+        if url:
+            return redirect(url)
+
+    # 2. PDF terminado en caché (se invalida al guardar cualquier sección del perfil)
+    clave = clave_cv(perfil, secciones, motor)
+    cache = cache_de(perfil)
+    contenido = cache.get(clave)
+    if contenido is not None:
+        return _pdf_desde_cache(perfil, contenido, 'HIT')
+
+    # 3. Un solo armado por clave: las peticiones idénticas simultáneas esperan al primero
+    #    y usan el PDF que deja en caché; esa espera dura lo que puede durar el armado
+    #    (PDF_ESPERA_COALESCENCIA). El turno para armar se espera a lo sumo PDF_ESPERA_ADMISION.
+    #    Pasado cualquiera de los dos se responde 503 en vez de ocupar el worker.
+    try:
+        with coalescencia.un_solo_armado(clave):
+            contenido = cache.get(clave)
+            if contenido is None:
+                with admision.admitir(perfil):
+                    resultado = construir_cv(perfil, secciones, motor)
+                guardar_en_cache(perfil, clave, resultado)
+    except (admision.Rechazado, coalescencia.Ocupado):
+        return HttpResponse(
+            'Hay muchas descargas del PDF en curso, inténtalo en unos segundos.',
+            status=503, headers={'Retry-After': str(settings.PDF_RETRY_AFTER)},
+        )
+    except ErrorGeneracionPDF:
         return HttpResponse('Error al generar el PDF', status=500)
-    
-    writer = PdfWriter()
-    buffer_cv_base.seek(0)
-    writer.append(buffer_cv_base)
-
-    # 4. Certificados (Respetando también el interruptor del Admin)
-    if incluir_cur and perfil.ver_cursos:
-        cursos_con_pdf = [c for c in cursos_objs if c.rutacertificado]
-        if cursos_con_pdf:
-            writer.append(crear_caratula("Certificados de Cursos"))
-            for curso in cursos_con_pdf:
-                try:
-                    response = requests.get(curso.rutacertificado.url, timeout=10)
-                    if response.status_code == 200:
-                        writer.append(io.BytesIO(response.content))
-                except: pass
-
-    if incluir_rec and perfil.ver_reconocimientos:
-        reco_con_pdf = [r for r in reconocimientos_objs if r.rutacertificado]
-        if reco_con_pdf:
-            writer.append(crear_caratula("Reconocimientos"))
-            for reco in reco_con_pdf:
-                try:
-                    response = requests.get(reco.rutacertificado.url, timeout=10)
-                    if response.status_code == 200:
-                        writer.append(io.BytesIO(response.content))
-                except: pass
-
-    response = HttpResponse(content_type='application/pdf')
+    if contenido is not None:
+        coalescencia.contar('reutilizados')
+        return _pdf_desde_cache(perfil, contenido, 'COALESCED')
+    coalescencia.contar('armados')
+
+    cabeceras = {'X-Cache-CV': 'MISS'}
+    if resultado.fallidos:
+        cabeceras['X-Certificados-Fallidos'] = str(len(resultado.fallidos))
+    if resultado.descargas:
+        aciertos = sum(1 for d in resultado.descargas if d.origen != 'red')
+        cabeceras['X-Certificados-Cache'] = f'aciertos={aciertos}; fallos={len(resultado.descargas) - aciertos}'
+    cabeceras['X-PDF-Bytes-Ahorrados'] = str(resultado.bytes_ahorrados)
+    if resultado.memoria_pico is not None:
+        cabeceras['X-PDF-Memoria-Pico'] = str(resultado.memoria_pico)
+
+    # Se envía por bloques desde el archivo temporal en lugar de armar la respuesta en memoria
+    response = FileResponse(resultado.archivo, content_type='application/pdf', headers=cabeceras)
     response['Content-Disposition'] = f'inline; filename="CV_{perfil.apellidos}.pdf"'
-    writer.write(response)
-    writer.close()
-    return response
\ No newline at end of file
+    return response
+
+
+@staff_member_required
+def pdf_estado(request):
+    """Contadores del worker que atiende la petición: admisión, coalescencia, cachés de páginas y certificados."""
+    return JsonResponse({
+        'admision': admision.estadisticas(),
+        'coalescencia': coalescencia.estadisticas(),
+        'paginas': cache_paginas.estadisticas(),
+        'certificados': certificados.estadisticas(),
+    })
+
+
+# --- MODO ASÍNCRONO: COLA DE TRABAJOS (worker: manage.py procesar_trabajos_pdf) ---
+
+def _estado_trabajo(trabajo):
+    datos = {
+        'token': str(trabajo.token),
+        'estado': trabajo.estado,
+        'url_estado': reverse('pdf_trabajo_estado', args=[trabajo.token]),
+    }
+    if trabajo.estado == 'listo':
+        datos['url_descarga'] = reverse('pdf_trabajo_descargar', args=[trabajo.token])
+    elif trabajo.estado == 'error':
+        # El detalle queda en el log del worker y en el Admin; el token no exige sesión
+        datos['error'] = "No se pudo generar el PDF. Intente de nuevo más tarde."
+    return datos
+
+@require_POST
+def pdf_encolar(request, slug=None):
+    perfil = _perfil(slug)
+    trabajo = trabajos.encolar(perfil, secciones_solicitadas(perfil, request.POST))
+    return JsonResponse(_estado_trabajo(trabajo), status=202)
+
+def pdf_trabajo_estado(request, token):
+    trabajo = get_object_or_404(TrabajoPDF, token=token)
+    return JsonResponse(_estado_trabajo(trabajo))
+
+def pdf_trabajo_descargar(request, token):
+    trabajo = get_object_or_404(TrabajoPDF, token=token, estado='listo')
+    try:
+        archivo = open(trabajo.rutaarchivo, 'rb')
+    except OSError:
+        raise Http404("El archivo del trabajo ya no está disponible.")
+    response = FileResponse(archivo, content_type='application/pdf')
+    response['Content-Disposition'] = f'inline; filename="CV_{trabajo.idperfil.apellidos}.pdf"'
+    return response
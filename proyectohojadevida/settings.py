@@ -31,7 +31,7 @@ INSTALLED_APPS = [
 # 4. MIDDLEWARE
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware', 
+    'perfil.middleware.SitioEstaticoMiddleware',   # WhiteNoise + copia estática del sitio (sección 16)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -52,6 +52,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'perfil.context_processors.configuracion',
             ],
         },
     },
@@ -108,4 +109,92 @@ CLOUDINARY_STORAGE = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# 9. GENERACIÓN DEL PDF (CERTIFICADOS)
+CERTIFICADOS_MAX_HILOS = 6                       # Descargas simultáneas por petición
+CERTIFICADOS_TIMEOUT = 10                        # Segundos máximos por archivo
+CERTIFICADOS_TIMEOUT_TOTAL = 30                  # Segundos máximos para todas las descargas
+CERTIFICADOS_MAX_BYTES = 15 * 1024 * 1024        # Tamaño máximo por certificado
+
+# Caché local de certificados (se revalida con ETag/Last-Modified pasado este tiempo)
+CERTIFICADOS_CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'certificados')
+CERTIFICADOS_CACHE_MAX_BYTES = 500 * 1024 * 1024
+CERTIFICADOS_CACHE_REVALIDAR = 24 * 3600
+
+# 10. CACHÉ (en disco para que la compartan todos los workers de gunicorn)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'django'),
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    }
+}
+PDF_CACHE_TIMEOUT = 7 * 24 * 3600                # Los PDF terminados se invalidan por versión, no por tiempo
+PDF_CACHE_MAX_BYTES = 10 * 1024 * 1024           # PDFs más grandes no se guardan en caché
+PDF_CACHE_TIMEOUT_INCOMPLETO = 30                # PDFs con certificados fallidos: se reintentan pasado este tiempo
+
+PDF_MOTOR = os.environ.get('PDF_MOTOR', 'xhtml2pdf')  # 'xhtml2pdf' (plantilla HTML) o 'reportlab'; ?motor= lo cambia
+PDF_FRAGMENTOS = True                            # xhtml2pdf: un PDF por sección, cacheado por el contenido de sus filas
+
+# 11. MEMORIA DEL ARMADO DEL PDF
+PDF_SPOOL_MAX_MEMORIA = 2 * 1024 * 1024          # Los temporales pasan a disco al superar este tamaño
+PDF_MAX_BYTES_CERTIFICADOS = 60 * 1024 * 1024    # Suma máxima de certificados unidos en un mismo PDF
+PDF_MAX_BYTES_CERTIFICADOS_PROCESO = 80 * 1024 * 1024  # Suma entre todos los armados a la vez de un worker (tope de memoria por worker)
+PDF_MEDIR_MEMORIA = False                        # Activa tracemalloc y la cabecera X-PDF-Memoria-Pico
+
+# Optimización del PDF final: compresión de streams, imágenes a PDF_IMAGENES_DPI y objetos repetidos unidos
+PDF_OPTIMIZAR = True
+PDF_IMAGENES_DPI = 150
+PDF_IMAGENES_CALIDAD = 80                        # Calidad JPEG de las imágenes reducidas
+PDF_IMAGENES_DIR = os.path.join(BASE_DIR, 'cache', 'imagenes_pdf')
+PDF_IMAGENES_MAX_BYTES = 50 * 1024 * 1024        # Se borran las imágenes usadas hace más tiempo al pasar de esto
+PDF_IMAGEN_MAX_PX = 320                          # La foto se imprime a 100px (~1 pulgada): 320px bastan a 300 dpi
+PDF_IMAGEN_MAX_BYTES = 10 * 1024 * 1024          # Se deja de descargar la foto original al pasar de esto
+PDF_RUTAS_MEMORIZADAS = 1024                     # URIs de imágenes y estáticos ya resueltas que guarda cada worker
+
+# 12. MODO ASÍNCRONO DEL PDF (requiere correr: python manage.py procesar_trabajos_pdf)
+PDF_MODO_ASINCRONO = os.environ.get('PDF_MODO_ASINCRONO') == '1'
+PDF_ARTEFACTOS_DIR = os.path.join(BASE_DIR, 'cache', 'artefactos')
+
+# 13. CONTROL DE ADMISIÓN DEL PDF (para que una ráfaga no ocupe todos los workers)
+PDF_MAX_CONCURRENTES_PROCESO = 1                 # Armados a la vez dentro de un mismo worker
+PDF_MAX_CONCURRENTES = 2                         # Armados a la vez entre todos los workers (archivos de bloqueo)
+PDF_ESPERA_ADMISION = 2.0                        # Segundos que una petición espera turno antes del 503
+PDF_RETRY_AFTER = 10                             # Valor de la cabecera Retry-After del 503
+PDF_MAX_CONCURRENTES_PERFIL = 1                  # Armados a la vez de un mismo perfil (una ráfaga no toma todos los turnos)
+PDF_ADMISION_DIR = os.path.join(BASE_DIR, 'cache', 'admision')
+
+# Peticiones idénticas simultáneas esperan al primer armado en vez de repetirlo: hasta lo que puede
+# durar ese armado (descargas de certificados + render), no PDF_ESPERA_ADMISION, que es solo para el turno
+PDF_ESPERA_COALESCENCIA = CERTIFICADOS_TIMEOUT_TOTAL + 20
+PDF_COALESCER_DIR = os.path.join(BASE_DIR, 'cache', 'coalescer')
+
+# 14. PÁGINAS DE SECCIONES (paginación por cursor, botón "Ver más")
+SECCIONES_POR_PAGINA = 24
+
+BUSQUEDA_RESULTADOS = 30                         # Resultados de la página de búsqueda (la API usa ?limite=)
+
+# Identifica el despliegue en los ETag de las páginas: un deploy nuevo invalida las copias de los navegadores
+VERSION_DESPLIEGUE = os.environ.get('RENDER_GIT_COMMIT', '')[:12]
+
+# 15. CACHÉ DE PÁGINA COMPLETA (la clave lleva la versión del contenido: el Admin se ve al instante)
+PAGINAS_CACHE_ALIAS = 'default'                  # Sirve con FileBasedCache o LocMemCache
+PAGINAS_CACHE_FRESCO = 300                       # Pasado esto se sirve la copia y se regenera en segundo plano
+PAGINAS_CACHE_TIMEOUT = 24 * 3600
+
+# 16. SITIO ESTÁTICO (python manage.py exportar_sitio_estatico; WhiteNoise sirve las páginas sin tocar Django)
+# No con el modo asíncrono: el formulario del PDF necesita la cookie CSRF que pone Django
+SITIO_ESTATICO = os.environ.get('SITIO_ESTATICO') == '1' and not PDF_MODO_ASINCRONO
+SITIO_ESTATICO_DIR = os.path.join(BASE_DIR, 'sitio_estatico')
+# Combinaciones del modal que se dejan armadas: 'todas' = todo lo que el Admin permite
+SITIO_ESTATICO_PDF = ('todas', (), ('exp', 'cur', 'rec'))
+# Sin WHITENOISE_ROOT ni AUTOREFRESH: SitioEstaticoMiddleware indexa la generación publicada cuando cambia
+
+# 17. VARIOS PERFILES (/p/<slug>/...; la raíz sigue mostrando el perfil activo)
+PERFILES_MEMORIZADOS = 512                       # Perfiles por slug (y sus cachés) que cada worker guarda en memoria
+PERFIL_CACHE_MAX_ENTRIES = 300                   # Entradas de la caché propia de cada perfil (páginas, PDF y fragmentos)
+
+# 18. FOTOS DEL GARAGE (variantes WebP y JPEG generadas al subir la foto, ver perfil/fotos.py)
+GARAGE_FOTO_ANCHOS = (320, 640, 960)             # Anchos en px, de menor a mayor
+GARAGE_FOTO_CALIDAD = 75                         # Calidad de WebP y JPEG
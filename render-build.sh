@@ -15,6 +15,11 @@ python manage.py collectstatic --no-input --clear
 # 3. Migraciones de base de datos
 python manage.py migrate
 
+# 3b. Copia estática del sitio (solo si se activó con SITIO_ESTATICO=1)
+if [ "$SITIO_ESTATICO" = "1" ]; then
+    python manage.py exportar_sitio_estatico
+fi
+
 # 4. ACTUALIZAR O CREAR SUPERUSUARIO (Sin borrar)
 echo "Configurando superusuario keyner..."
 echo "from django.contrib.auth import get_user_model; \